@@ -51,6 +51,7 @@ try:
     from app.infrastructure.db.models.user_role import UserRole
     from app.infrastructure.db.models.medical_study import MedicalStudy
     from app.infrastructure.db.models.file_manager import FileStorage
+    from app.infrastructure.db.models.study_result import StudyResult
     print("✅ Modelos importados correctamente")
 except ImportError as e:
     print(f"⚠️  Error importando modelos: {e}")
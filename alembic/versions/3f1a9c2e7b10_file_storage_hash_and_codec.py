@@ -0,0 +1,31 @@
+"""file storage content hash and storage codec
+
+Revision ID: 3f1a9c2e7b10
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2e7b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('file_storage', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column(
+        'file_storage',
+        sa.Column('storage_codec', sa.String(length=20), nullable=False, server_default='raw')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('file_storage', 'storage_codec')
+    op.drop_column('file_storage', 'content_hash')
@@ -0,0 +1,56 @@
+"""study_results table
+
+Revision ID: 8c4d2b7e1f3a
+Revises: 3f1a9c2e7b10
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4d2b7e1f3a'
+down_revision: Union[str, None] = '3f1a9c2e7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'study_results',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('study_id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('is_positive', sa.Boolean(), nullable=False),
+        sa.Column('classification_level', sa.Integer(), nullable=False),
+        sa.Column('binary_confidence', sa.Float(), nullable=True),
+        sa.Column('classification_confidence', sa.Float(), nullable=True),
+        sa.Column('binary_vote_rf', sa.SmallInteger(), nullable=True),
+        sa.Column('binary_vote_xgb', sa.SmallInteger(), nullable=True),
+        sa.Column('binary_vote_keras', sa.SmallInteger(), nullable=True),
+        sa.Column('class_vote_rf', sa.SmallInteger(), nullable=True),
+        sa.Column('class_vote_xgb', sa.SmallInteger(), nullable=True),
+        sa.Column('class_vote_keras', sa.SmallInteger(), nullable=True),
+        sa.Column('model_version', sa.String(length=50), nullable=True),
+        sa.Column('diagnosed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['study_id'], ['medical_studies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('study_id'),
+    )
+    op.create_index('ix_study_results_diagnosed_at', 'study_results', ['diagnosed_at'])
+    op.create_index(
+        'ix_study_results_positive_level_date',
+        'study_results',
+        ['is_positive', 'classification_level', 'diagnosed_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_study_results_positive_level_date', table_name='study_results')
+    op.drop_index('ix_study_results_diagnosed_at', table_name='study_results')
+    op.drop_table('study_results')
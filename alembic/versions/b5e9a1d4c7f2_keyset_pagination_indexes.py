@@ -0,0 +1,27 @@
+"""composite (created_at, id) indexes for keyset pagination
+
+Revision ID: b5e9a1d4c7f2
+Revises: 8c4d2b7e1f3a
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9a1d4c7f2'
+down_revision: Union[str, None] = '8c4d2b7e1f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_medical_studies_created_at_id', 'medical_studies', ['created_at', 'id'])
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_medical_studies_created_at_id', table_name='medical_studies')
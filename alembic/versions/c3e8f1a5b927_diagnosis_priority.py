@@ -0,0 +1,32 @@
+"""diagnosis priority on medical_studies and diagnosis_jobs
+
+Revision ID: c3e8f1a5b927
+Revises: a9c4e2b7d815
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f1a5b927'
+down_revision: Union[str, None] = 'a9c4e2b7d815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('medical_studies', sa.Column('priority', sa.String(length=20), server_default='routine', nullable=False))
+    op.add_column('diagnosis_jobs', sa.Column('priority', sa.Integer(), server_default='1', nullable=False))
+    op.drop_index('ix_diagnosis_jobs_status_available', table_name='diagnosis_jobs')
+    op.create_index('ix_diagnosis_jobs_status_priority_available', 'diagnosis_jobs', ['status', 'priority', 'available_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_diagnosis_jobs_status_priority_available', table_name='diagnosis_jobs')
+    op.create_index('ix_diagnosis_jobs_status_available', 'diagnosis_jobs', ['status', 'available_at'])
+    op.drop_column('diagnosis_jobs', 'priority')
+    op.drop_column('medical_studies', 'priority')
@@ -0,0 +1,80 @@
+"""normalized name columns and FULLTEXT ngram index on users
+
+Revision ID: d2f7c3a9e814
+Revises: b5e9a1d4c7f2
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.text_normalization import normalize_name
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7c3a9e814'
+down_revision: Union[str, None] = 'b5e9a1d4c7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def _backfill(bind) -> None:
+    users = sa.table(
+        'users',
+        sa.column('id', sa.String),
+        sa.column('name', sa.String),
+        sa.column('last_name', sa.String),
+        sa.column('name_normalized', sa.String),
+        sa.column('last_name_normalized', sa.String),
+    )
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(users.c.id, users.c.name, users.c.last_name)
+            .where(users.c.id > last_id)
+            .order_by(users.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            users.update()
+            .where(users.c.id == sa.bindparam('b_id'))
+            .values(
+                name_normalized=sa.bindparam('b_name'),
+                last_name_normalized=sa.bindparam('b_last_name'),
+            ),
+            [
+                {'b_id': id, 'b_name': normalize_name(name), 'b_last_name': normalize_name(last_name)}
+                for id, name, last_name in rows
+            ]
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('name_normalized', sa.String(length=100), nullable=False, server_default=''))
+    op.add_column('users', sa.Column('last_name_normalized', sa.String(length=100), nullable=False, server_default=''))
+
+    bind = op.get_bind()
+    _backfill(bind)
+
+    op.create_index('ix_users_last_name_normalized', 'users', ['last_name_normalized', 'name_normalized'])
+    if bind.dialect.name == 'mysql':
+        op.execute(
+            'CREATE FULLTEXT INDEX ft_users_name_search '
+            'ON users (name_normalized, last_name_normalized) WITH PARSER ngram'
+        )
+    else:
+        op.create_index('ft_users_name_search', 'users', ['name_normalized', 'last_name_normalized'])
+
+
+def downgrade() -> None:
+    op.drop_index('ft_users_name_search', table_name='users')
+    op.drop_index('ix_users_last_name_normalized', table_name='users')
+    op.drop_column('users', 'last_name_normalized')
+    op.drop_column('users', 'name_normalized')
@@ -0,0 +1,55 @@
+"""diagnosis_jobs table (durable diagnosis queue)
+
+Revision ID: e7a3c1f9b2d6
+Revises: d2f7c3a9e814
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c1f9b2d6'
+down_revision: Union[str, None] = 'd2f7c3a9e814'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'diagnosis_jobs',
+        sa.Column('id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('study_id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('user_id', mysql.CHAR(length=36), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('payload', sa.LargeBinary().with_variant(mysql.MEDIUMBLOB(), 'mysql'), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['study_id'], ['medical_studies.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_diagnosis_jobs_study_id', 'diagnosis_jobs', ['study_id'])
+    op.create_index('ix_diagnosis_jobs_status_available', 'diagnosis_jobs', ['status', 'available_at'])
+    op.create_index('ix_diagnosis_jobs_status_lease', 'diagnosis_jobs', ['status', 'lease_expires_at'])
+    op.create_index('ix_diagnosis_jobs_finished_at', 'diagnosis_jobs', ['finished_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_diagnosis_jobs_finished_at', table_name='diagnosis_jobs')
+    op.drop_index('ix_diagnosis_jobs_status_lease', table_name='diagnosis_jobs')
+    op.drop_index('ix_diagnosis_jobs_status_available', table_name='diagnosis_jobs')
+    op.drop_index('ix_diagnosis_jobs_study_id', table_name='diagnosis_jobs')
+    op.drop_table('diagnosis_jobs')
@@ -1,20 +1,35 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
 from uuid import UUID
 from loguru import logger as log
-from ...infrastructure.db.DTOs.auth_schema import UserOut
+from ...infrastructure.db.DTOs.auth_schema import Principal
+from ...infrastructure.db.DTOs.diagnosis_job_dto import DiagnosisJobDTO
 from ...services.diagnose_service import DiagnoseService
-from ...infrastructure.db.DTOs.medical_study_dto import MedicalStudyResponseDTO
+from ...infrastructure.db.DTOs.medical_study_dto import BatchDiagnosisReportDTO, MedicalStudyResponseDTO
 from ...services.medical_study_service import MedicalStudyService
 from ...services.file_manager_service import FileStorageService
+from ...services.study_result_service import StudyResultService
+from ...services.idempotency_service import IdempotencyService
 from ...infrastructure.repositories.medical_study_repo import MedicalStudyRepo
 from ...infrastructure.repositories.file_manager_repo import FileStorageRepo
+from ...infrastructure.repositories.study_result_repo import StudyResultRepo
 from ...infrastructure.repositories.user_repo import UserRepo
+from ...infrastructure.repositories.idempotency_key_repo import IdempotencyKeyRepo
 from ...core.db import get_db_session as get_db
-from ...api.v1.auth import get_current_user
+from ...api.v1.auth import get_current_principal, rate_limited
 
 router = APIRouter(prefix="/diagnose", tags=["Diagnosis"])
 
+IDEMPOTENCY_KEY = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Clave única del cliente: un reintento con la misma clave recibe la respuesta original sin repetir el diagnóstico."
+)
+
+PRIORITY = Form(None, description="`urgent` o `routine`; por defecto, la prioridad del estudio.")
+
 def get_diagnose_service(db: Session = Depends(get_db)) -> DiagnoseService:
     """
     Construye y provee el servicio de diagnóstico con todas sus dependencias.
@@ -26,21 +41,114 @@ def get_diagnose_service(db: Session = Depends(get_db)) -> DiagnoseService:
         ),
         file_service=FileStorageService(
             file_storage_repo=FileStorageRepo()  
+        ),
+        study_result_service=StudyResultService(
+            study_result_repo=StudyResultRepo()
+        ),
+        idempotency_service=IdempotencyService(
+            idempotency_key_repo=IdempotencyKeyRepo()
         )
     )
 
+# Antes de "/{study_id}": si no, "batch" se valida como UUID.
+@router.post("/batch", response_model=BatchDiagnosisReportDTO)
+async def perform_batch_diagnosis(
+    user_id: UUID = Form(..., description="ID del técnico/doctor que realiza los diagnósticos."),
+    files: List[UploadFile] = File(..., description="CSVs llamados <study_id>.csv, sueltos o dentro de archivos .zip."),
+    priority: Optional[Literal["urgent", "routine"]] = PRIORITY,
+    db: Session = Depends(get_db),
+    diagnose_service: DiagnoseService = Depends(get_diagnose_service),
+    current_user: Principal = Depends(get_current_principal)
+) -> BatchDiagnosisReportDTO:
+    """
+    Diagnostica varios estudios en un request, con una sola pasada de
+    inferencia para todos. Devuelve el resultado de cada estudio; los que
+    fallan no impiden completar los demás. Cada estudio (también los de
+    un zip) cuenta para el límite de diagnósticos del usuario.
+    """
+    return await diagnose_service.run_batch_diagnosis(
+        db,
+        files=files,
+        user_id=user_id,
+        priority=priority,
+        rate_limit_key=str(current_user.id) if current_user else None
+    )
+
+@router.get("/jobs/{job_id}", response_model=DiagnosisJobDTO)
+def get_diagnosis_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    diagnose_service: DiagnoseService = Depends(get_diagnose_service),
+    current_user: Principal = Depends(get_current_principal)
+) -> DiagnosisJobDTO:
+    """
+    Estado de un diagnóstico en segundo plano; con `succeeded` incluye el estudio.
+    """
+    return diagnose_service.get_job(db, job_id)
+
+@router.get("/jobs/{job_id}/wait", response_model=DiagnosisJobDTO)
+async def wait_for_diagnosis_job(
+    job_id: UUID,
+    timeout: float = Query(20, ge=0, description="Segundos a esperar como máximo (tope DIAGNOSIS_JOB_MAX_WAIT_SECONDS)."),
+    db: Session = Depends(get_db),
+    diagnose_service: DiagnoseService = Depends(get_diagnose_service),
+    current_user: Principal = Depends(get_current_principal)
+) -> DiagnosisJobDTO:
+    """
+    Espera a que el diagnóstico termine y devuelve su estado. Si se agota
+    `timeout` devuelve el estado actual (`queued` o `running`) y el
+    cliente vuelve a llamar.
+    """
+    return await diagnose_service.wait_for_job(db, job_id, timeout)
+
+@router.post("/{study_id}/jobs", response_model=DiagnosisJobDTO, status_code=status.HTTP_202_ACCEPTED)
+async def submit_diagnosis(
+    study_id: UUID,
+    response: Response,
+    user_id: UUID = Form(..., description="ID del técnico/doctor que realiza el diagnóstico."),
+    file: UploadFile = File(..., description="Archivo CSV con datos del electromiograma."),
+    priority: Optional[Literal["urgent", "routine"]] = PRIORITY,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY,
+    db: Session = Depends(get_db),
+    diagnose_service: DiagnoseService = Depends(get_diagnose_service),
+    current_user: Principal = Depends(rate_limited("diagnose"))
+) -> DiagnosisJobDTO:
+    """
+    Encola el diagnóstico de un estudio y responde enseguida con el trabajo.
+    El estudio queda en `PROCESSING` hasta que termina; el resultado se
+    consulta en `/diagnose/jobs/{job_id}` o `/diagnose/jobs/{job_id}/wait`.
+    """
+    if not file.filename or not file.filename.endswith(('.csv', '.CSV')):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file type. Only CSV files are allowed."
+        )
+
+    job, replayed = await diagnose_service.submit_diagnosis(
+        db, study_id=study_id, file=file, user_id=user_id, idempotency_key=idempotency_key, priority=priority
+    )
+    response.headers["Location"] = f"{router.prefix}/jobs/{job.id}"
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return job
+
 @router.post("/{study_id}", response_model=MedicalStudyResponseDTO)
 async def perform_diagnosis(
     study_id: UUID,
+    response: Response,
     user_id: UUID = Form(..., description="ID del técnico/doctor que realiza el diagnóstico."),
     file: UploadFile = File(..., description="Archivo CSV con datos del electromiograma."),
-    db: Session = Depends(get_db),
+    priority: Optional[Literal["urgent", "routine"]] = PRIORITY,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY,
     diagnose_service: DiagnoseService = Depends(get_diagnose_service),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(rate_limited("diagnose"))
 ):
     """
     Recibe un CSV para un estudio, ejecuta el pipeline de diagnóstico,
-    guarda el archivo y actualiza el estudio con los resultados.
+    guarda el archivo y actualiza el estudio con los resultados, todo
+    dentro del request. Para no esperar, usar `POST /diagnose/{study_id}/jobs`.
+    Con `Idempotency-Key`, los reintentos reciben la respuesta original
+    (con `Idempotent-Replayed: true`).
     """
     
     if not file.filename or not file.filename.endswith(('.csv', '.CSV')):
@@ -51,14 +159,15 @@ async def perform_diagnosis(
         
     try:
         
-        updated_study = await diagnose_service.run_diagnosis_workflow(
-            db, study_id=study_id, file=file, user_id=user_id
+        study, replayed = await diagnose_service.run_diagnosis_workflow(
+            study_id=study_id, file=file, user_id=user_id, idempotency_key=idempotency_key, priority=priority
         )
-        
-        db.commit() 
-        return updated_study
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return study
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
         import traceback
         error_trace = traceback.format_exc()
         log.error(f"Unexpected error in diagnose workflow (DiagnoseService): {str(e)}\nTraceback: {error_trace}")
@@ -0,0 +1,85 @@
+from uuid import UUID
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session
+
+from ...infrastructure.db.DTOs.auth_schema import Principal
+from ...infrastructure.repositories.file_manager_repo import FileStorageRepo
+from ...services.file_manager_service import FileStorageService
+from ...core.db import get_db_session as get_db
+from ...core.file_storage import CODEC_RAW, etag_matches, iter_stored_file, parse_range_header
+from ...api.v1.auth import get_current_principal
+
+router = APIRouter(prefix="/files", tags=["Files"])
+
+def get_file_service() -> FileStorageService:
+    return FileStorageService(file_storage_repo=FileStorageRepo())
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+@router.get("/{file_id}")
+def download_study_file(
+    file_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    file_service: FileStorageService = Depends(get_file_service),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Descarga el CSV almacenado de un estudio médico (`csv_file_id`).
+    Sirve el archivo por bloques, soporta `Range` (un único rango de bytes)
+    y `If-None-Match` con un ETag basado en el hash del contenido.
+    """
+    record = file_service.get_study_file_record(db, file_id)
+    size = record.file_size or 0
+    etag = f'"{record.content_hash}"' if record.content_hash else None
+    media_type = record.file_type or "text/csv"
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _content_disposition(record.original_filename or record.filename),
+    }
+    if etag:
+        headers["ETag"] = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range.strip() != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_range_header(range_header, size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+
+    if byte_range is None and record.storage_codec == CODEC_RAW:
+        # Sin transformaciones: el servidor ASGI puede usar sendfile/pathsend.
+        return FileResponse(record.file_path, media_type=media_type, headers=headers)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            iter_stored_file(record.file_path, record.storage_codec),
+            media_type=media_type,
+            headers=headers
+        )
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_stored_file(record.file_path, record.storage_codec, start=start, end=end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers
+    )
@@ -1,11 +1,14 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Union
+from datetime import datetime
 from enum import Enum
 from loguru import logger as log
 
-from ...infrastructure.db.DTOs.auth_schema import UserOut
+from ...infrastructure.db.DTOs.auth_schema import Principal
 
 from ...services.medical_study_service import MedicalStudyService
 from ...infrastructure.repositories.medical_study_repo import MedicalStudyRepo
@@ -13,9 +16,14 @@ from ...infrastructure.db.DTOs.medical_study_dto import MedicalStudyUpdateDTO
 from ...infrastructure.repositories.user_repo import UserRepo
 from ...infrastructure.db.DTOs.response import MessageResponse
 from ...infrastructure.db.DTOs.medical_study_dto import MedicalStudyCreateDTO, MedicalStudyResponseDTO
-from ...core.db import get_db_session as get_db
+from ...infrastructure.db.DTOs.study_result_dto import StudyResultStatsDTO
+from ...infrastructure.db.DTOs.study_projection import StudyProjection, SUMMARY_FIELDS
+from ...infrastructure.repositories.study_result_repo import StudyResultRepo
+from ...services.study_result_service import StudyResultService
+from ...core.db import get_db_session as get_db, get_read_db_session as get_read_db
+from ...core.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from ...services.auth_service import get_auth_service
-from ...api.v1.auth import get_current_user
+from ...api.v1.auth import get_current_principal
 
 
 class MedicalStudySearchType(str, Enum):
@@ -24,20 +32,48 @@ class MedicalStudySearchType(str, Enum):
     PATIENT_DNI = "patient_dni"
     PATIENT_NAME = "patient_name"
 
+class MedicalStudyView(str, Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
 router = APIRouter(prefix="/medical_studies", tags=["Medical Studies"])
 
+def get_study_projection(
+    fields: Optional[str] = Query(
+        None,
+        description="Campos a devolver separados por coma, ej: id,status,creation_date,patient.name. "
+                    "ml_results solo se descifra si se incluye explícitamente."
+    ),
+    view: MedicalStudyView = Query(MedicalStudyView.FULL, description="'summary' devuelve un resumen sin relaciones")
+) -> Optional[StudyProjection]:
+    if fields:
+        try:
+            return StudyProjection.parse(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if view == MedicalStudyView.SUMMARY:
+        return StudyProjection.parse(SUMMARY_FIELDS)
+    return None
+
+def _projected_response(result, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(content=jsonable_encoder(result), headers=headers)
+
 def get_medical_study_service(db: Session = Depends(get_db)) -> MedicalStudyService:
     study_repo = MedicalStudyRepo()
     user_repo = UserRepo(db)
     return MedicalStudyService(medical_study_repo=study_repo, user_repo=user_repo)
 
 
+def get_study_result_service() -> StudyResultService:
+    return StudyResultService(study_result_repo=StudyResultRepo())
+
+
 @router.post("/", response_model=MedicalStudyResponseDTO, status_code=status.HTTP_201_CREATED)
 def create_medical_study(
     study_data: MedicalStudyCreateDTO,
     db: Session = Depends(get_db),
     study_service: MedicalStudyService = Depends(get_medical_study_service),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> MedicalStudyResponseDTO:
     """
     Crea una nueva orden de estudio médico.
@@ -48,26 +84,53 @@ def create_medical_study(
         log.error(f"Error al crear el estudio: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error al crear el estudio")
 
+@router.post("/batch", response_model=List[MedicalStudyResponseDTO], status_code=status.HTTP_201_CREATED)
+def create_medical_studies(
+    studies_data: List[MedicalStudyCreateDTO],
+    db: Session = Depends(get_db),
+    study_service: MedicalStudyService = Depends(get_medical_study_service),
+    current_user: Principal = Depends(get_current_principal)
+) -> List[MedicalStudyResponseDTO]:
+    """
+    Crea varias órdenes de estudio en una transacción. Si alguna es
+    inválida no se crea ninguna y el error indica cuáles y por qué.
+    """
+    return study_service.create_studies(db, studies_data=studies_data)
+
 @router.get("/search/", response_model=Union[List[MedicalStudyResponseDTO], MedicalStudyResponseDTO])
 def search_medical_studies(
+    response: Response,
     search_type: MedicalStudySearchType = Query(..., description="Tipo de búsqueda a realizar"),
     study_id: Optional[str] = Query(None, description="ID del estudio (si search_type es 'id')"),
     patient_dni: Optional[str] = Query(None, description="DNI del paciente (si search_type es 'patient_dni')"),
     access_code: Optional[str] = Query(None, description="Código de acceso del paciente (si search_type es 'patient_dni')"),
     patient_name: Optional[str] = Query(None, description="Nombre o apellido del paciente (si search_type es 'patient_name')"),
-    db: Session = Depends(get_db),
+    projection: Optional[StudyProjection] = Depends(get_study_projection),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor (si search_type es 'all')"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Tamaño de página (si search_type es 'all' o 'patient_name')"),
+    offset: int = Query(0, ge=0, description="Resultados a saltar (si search_type es 'patient_name')"),
+    db: Session = Depends(get_read_db),
     study_service: MedicalStudyService = Depends(get_medical_study_service),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> Union[List[MedicalStudyResponseDTO], MedicalStudyResponseDTO]:
     """
     Búsqueda unificada de estudios médicos.
+    Admite `fields` (campos dispersos) y `view=summary` para listados livianos.
+    El listado `all` se pagina por cursor: la página siguiente viene en `X-Next-Cursor`.
     """
     if search_type == MedicalStudySearchType.ALL:
-        return study_service.get_all_studies(db)
+        page = study_service.get_all_studies(db, projection=projection, cursor=cursor, limit=limit)
+        headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else {}
+        if projection is not None:
+            return _projected_response(page.items, headers=headers)
+        response.headers.update(headers)
+        return page.items
     
     if search_type == MedicalStudySearchType.ID:
         if not study_id:
             raise HTTPException(status_code=400, detail="study_id is required for 'id' search type")
+        if projection is not None:
+            return _projected_response(study_service.get_by_id(db, study_id=study_id, projection=projection))
         return study_service.get_by_id(db, study_id=study_id)
         
     if search_type == MedicalStudySearchType.PATIENT_DNI:
@@ -76,18 +139,49 @@ def search_medical_studies(
                 status_code=400, 
                 detail="DNI del paciente y código de acceso son requeridos"
             )
+        if projection is not None:
+            return _projected_response(study_service.get_by_patient_dni(
+                db, dni=patient_dni, access_code=access_code, projection=projection
+            ))
         return study_service.get_by_patient_dni(db, dni=patient_dni, access_code=access_code)
         
     if search_type == MedicalStudySearchType.PATIENT_NAME:
         if not patient_name:
             raise HTTPException(status_code=400, detail="patient_name is required for 'patient_name' search type")
-        return study_service.get_by_patient_name(db, name=patient_name)
+        if projection is not None:
+            return _projected_response(study_service.get_by_patient_name(
+                db, name=patient_name, skip=offset, limit=limit, projection=projection
+            ))
+        return study_service.get_by_patient_name(db, name=patient_name, skip=offset, limit=limit)
+
+@router.get("/stats/", response_model=List[StudyResultStatsDTO])
+def get_medical_study_stats(
+    is_positive: Optional[bool] = Query(None, description="Filtrar por resultado binario"),
+    classification_level: Optional[int] = Query(None, description="Filtrar por nivel de clasificación"),
+    date_from: Optional[datetime] = Query(None, description="Diagnosticados desde (inclusive)"),
+    date_to: Optional[datetime] = Query(None, description="Diagnosticados hasta (exclusive)"),
+    db: Session = Depends(get_read_db),
+    result_service: StudyResultService = Depends(get_study_result_service),
+    current_user: Principal = Depends(get_current_principal)
+) -> List[StudyResultStatsDTO]:
+    """
+    Cantidad de estudios diagnosticados agrupados por resultado y nivel.
+    Consulta la tabla indexada `study_results`, sin descifrar `ml_results`.
+    """
+    return result_service.get_stats(
+        db,
+        is_positive=is_positive,
+        classification_level=classification_level,
+        date_from=date_from,
+        date_to=date_to
+    )
 
 @router.get("/public-search/", response_model=Union[List[MedicalStudyResponseDTO], MedicalStudyResponseDTO])
 def public_search_medical_studies(
     patient_dni: Optional[str] = Query(None, description="DNI del paciente"),
     access_code: Optional[str] = Query(None, description="Código de acceso del paciente"),
-    db: Session = Depends(get_db),
+    projection: Optional[StudyProjection] = Depends(get_study_projection),
+    db: Session = Depends(get_read_db),
     study_service: MedicalStudyService = Depends(get_medical_study_service)
 ) -> Union[List[MedicalStudyResponseDTO], MedicalStudyResponseDTO]:
     """
@@ -98,6 +192,10 @@ def public_search_medical_studies(
             status_code=400,
             detail="DNI del paciente y código de acceso son requeridos"
         )
+    if projection is not None:
+        return _projected_response(study_service.get_by_patient_dni(
+            db, dni=patient_dni, access_code=access_code, projection=projection
+        ))
     return study_service.get_by_patient_dni(db, dni=patient_dni, access_code=access_code)
 
 @router.delete("/{study_id}", response_model=MessageResponse)
@@ -105,7 +203,7 @@ def delete_medical_study(
     study_id: UUID,
     db: Session = Depends(get_db),
     study_service: MedicalStudyService = Depends(get_medical_study_service),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Elimina un estudio médico por su ID.
@@ -119,19 +217,15 @@ def partial_update_study(
     study_data: MedicalStudyUpdateDTO, 
     db: Session = Depends(get_db),
     study_service: MedicalStudyService = Depends(get_medical_study_service),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> MedicalStudyResponseDTO:
     """
     Actualiza parcialmente un estudio médico existente.
     Solo envía los campos que deseas cambiar en el cuerpo de la petición.
     """
     try:
-        updated_study = study_service.update(db, study_id=study_id, study_update=study_data)
-        db.commit()
-        return updated_study
+        return study_service.update(db, study_id=study_id, study_update=study_data)
     except HTTPException:
-        db.rollback()
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
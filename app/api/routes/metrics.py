@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+
+from ...core.metrics import render_metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """
+    Métricas en formato Prometheus (consultas por request, tiempos de base
+    de datos, posibles N+1).
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -2,13 +2,13 @@ from fastapi import APIRouter, BackgroundTasks, Depends
 import subprocess
 import os
 
-from app.infrastructure.db.DTOs.auth_schema import UserOut
-from ...api.v1.auth import get_current_user
+from app.infrastructure.db.DTOs.auth_schema import Principal
+from ...api.v1.auth import get_current_principal
 
 train_classify = APIRouter()
 
 @train_classify.post("/train-classify")
-def train_classify_models(background_tasks: BackgroundTasks, current_user: UserOut = Depends(get_current_user)):
+def train_classify_models(background_tasks: BackgroundTasks, current_user: Principal = Depends(get_current_principal)):
     train_script_path = os.path.abspath("train_classify.py")
 
     trained_models_dir = os.path.abspath("trained_models")
@@ -1,24 +1,30 @@
 # app/api/routes/user.py
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ...api.v1.auth import get_current_user
-from ...infrastructure.db.DTOs.auth_schema import UserOut
+from ...api.v1.auth import get_current_principal
+from ...infrastructure.db.DTOs.auth_schema import Principal, UserOut
 from ...core.db import get_db_session as get_db
+from ...core.async_db import get_async_read_db_session as get_async_read_db
+from ...core.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 from ...infrastructure.db.DTOs.user_dto import (
     UserCreateDTO,
     UserUpdateDTO,
     UserResponseDTO as UserResponse,
-    UserCreateInternal
+    UserCreateInternal,
+    UserImportReportDTO
 )
 from ...infrastructure.db.DTOs.user_role_dto import UserRoleCreateDTO
 from ...infrastructure.repositories.user_repo import UserRepo
+from ...infrastructure.repositories.async_user_repo import AsyncUserRepo
 from ...infrastructure.repositories.user_role_repo import UserRoleRepo
 from ...infrastructure.repositories.role_repo import RoleRepo
 from ...services.user_service import UserService
 from ...services.user_role_service import UserRoleService
+from ...services.user_import_service import UserImportService
 
 router = APIRouter(
     prefix="/api/v1/users",
@@ -32,6 +38,9 @@ def get_user_service(db: Session = Depends(get_db)) -> UserService:
 def get_user_repository(db: Session = Depends(get_db)) -> UserRepo:
     return UserRepo(db)
 
+def get_async_user_repository() -> AsyncUserRepo:
+    return AsyncUserRepo()
+
 def get_user_role_service(db: Session = Depends(get_db)) -> UserRoleService:
     user_role_repo = UserRoleRepo(db)
     user_repo = UserRepo(db)
@@ -43,12 +52,12 @@ def get_user_role_service(db: Session = Depends(get_db)) -> UserRoleService:
     )
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(
+def create_user(
     user_data: UserCreateDTO,
     db: Session = Depends(get_db),
     user_service: UserService = Depends(get_user_service),
     user_role_service: UserRoleService = Depends(get_user_role_service),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> UserResponse:
     """Crear un nuevo usuario"""
     try:
@@ -71,7 +80,7 @@ async def create_user(
             )
             user_role_service.create_user_role(db, user_role_data)
         except Exception as role_error:
-            user_service.delete(db, user.id)
+            # El rollback de la unidad de trabajo descarta también el usuario.
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Error assigning role to user: {str(role_error)}"
@@ -88,18 +97,51 @@ async def create_user(
             detail=f"Error creating user: {str(e)}"
         )
 
+@router.post("/import", response_model=UserImportReportDTO)
+def import_users(
+    role_id: uuid.UUID = Form(..., description="Rol asignado a todos los usuarios del archivo"),
+    file: UploadFile = File(..., description="CSV (name,last_name,email,dni,password) o NDJSON con los mismos campos"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+) -> UserImportReportDTO:
+    """
+    Alta masiva de usuarios (p. ej. los pacientes de una clínica) con un
+    mismo rol. Devuelve el resultado de cada fila; las inválidas no
+    impiden crear las demás.
+    """
+    import_service = UserImportService(user_repo=UserRepo(db))
+    return import_service.import_users(
+        db, content=import_service.read_upload(file.file), filename=file.filename or "", role_id=role_id
+    )
+
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    user_repo: UserRepo = Depends(get_user_repository),
-    current_user: UserOut = Depends(get_current_user)
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en la cabecera X-Next-Cursor"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    skip: Optional[int] = Query(None, ge=0, description="Obsoleto: paginación por OFFSET, usar cursor"),
+    db: AsyncSession = Depends(get_async_read_db),
+    user_repo: AsyncUserRepo = Depends(get_async_user_repository),
+    current_user: Principal = Depends(get_current_principal)
 ) -> List[UserResponse]:
-    """Obtener lista de usuarios"""
+    """
+    Obtener lista de usuarios, más recientes primero.
+    Si hay más resultados, el cursor de la página siguiente viene en `X-Next-Cursor`.
+    """
     try:
-        users = user_repo.get_all(db, skip=skip, limit=limit)
-        return [UserResponse.model_validate(user) for user in users]
+        if skip is not None:
+            users = await user_repo.get_all(db, skip=skip, limit=limit)
+            return [UserResponse.model_validate(user) for user in users]
+
+        try:
+            page = await user_repo.get_page(db, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if page.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+        return [UserResponse.model_validate(user) for user in page.items]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -109,13 +151,13 @@ async def get_users(
 @router.get("/by-role/{role_id}", response_model=List[UserResponse])
 async def get_users_by_role(
     role_id: uuid.UUID,  
-    db: Session = Depends(get_db),
-    user_repo: UserRepo = Depends(get_user_repository),
-    current_user: UserOut = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    user_repo: AsyncUserRepo = Depends(get_async_user_repository),
+    current_user: Principal = Depends(get_current_principal)
 ) -> List[UserResponse]:
     """Obtener usuarios por rol"""
     try:
-        users = user_repo.get_users_by_role_id(db, role_id)
+        users = await user_repo.get_users_by_role_id(db, role_id)
         return [UserResponse.model_validate(user) for user in users]
     except Exception as e:
         raise HTTPException(
@@ -124,23 +166,28 @@ async def get_users_by_role(
         )
 
 @router.get("/by-id/{user_id}", response_model=UserOut)
-def get_user_by_uuid(
+async def get_user_by_uuid(
     user_id: uuid.UUID,
-    db: Session = Depends(get_db),
-    user_service: UserService = Depends(get_user_service),
-    current_user: UserOut = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    user_repo: AsyncUserRepo = Depends(get_async_user_repository),
+    current_user: Principal = Depends(get_current_principal)
 ) -> UserOut:
     """Obtiene un usuario por su UUID"""
-    user = user_service.find_by_id(db, user_id=user_id)
+    user = await user_repo.get(db, id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found"
+        )
     return user
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: uuid.UUID,
     user_data: UserUpdateDTO,
     db: Session = Depends(get_db),
     user_service: UserService = Depends(get_user_service),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> UserResponse:
     """Actualizar un usuario"""
     try:
@@ -156,12 +203,12 @@ async def update_user(
 
 
 @router.delete("/{user_id}", response_model=UserResponse)
-async def delete_user(
+def delete_user(
     user_id: uuid.UUID,
     db: Session = Depends(get_db),
     user_service: UserService = Depends(get_user_service),
     user_role_service: UserRoleService = Depends(get_user_role_service),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> UserResponse:
     """Eliminar un usuario"""
     try:
@@ -187,13 +234,18 @@ async def delete_user(
 @router.get("/by-email/{email}", response_model=UserResponse)
 async def get_user_by_email(
     email: str,
-    db: Session = Depends(get_db),
-    user_service: UserService = Depends(get_user_service),
-    current_user: UserOut = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    user_repo: AsyncUserRepo = Depends(get_async_user_repository),
+    current_user: Principal = Depends(get_current_principal)
 ) -> UserResponse:
     """Obtener un usuario por email"""
     try:
-        user = user_service.find_by_email(db, email=email)
+        user = await user_repo.get_by_email(db, email=email)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with email {email} not found"
+            )
         return UserResponse.model_validate(user)
     except HTTPException:
         raise
@@ -206,13 +258,18 @@ async def get_user_by_email(
 @router.get("/by-dni/{dni}", response_model=UserResponse)
 async def get_user_by_dni(
     dni: str,
-    db: Session = Depends(get_db),
-    user_service: UserService = Depends(get_user_service),
-    current_user: UserOut = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    user_repo: AsyncUserRepo = Depends(get_async_user_repository),
+    current_user: Principal = Depends(get_current_principal)
 ) -> UserResponse:
     """Obtener un usuario por DNI"""
     try:
-        user = user_service.find_by_dni(db, dni=dni)
+        user = await user_repo.get_by_dni(db, dni=dni)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with DNI {dni} not found"
+            )
         return UserResponse.model_validate(user)
     except HTTPException:
         raise
@@ -220,4 +277,4 @@ async def get_user_by_dni(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving user: {str(e)}"
-        )
\ No newline at end of file
+        )
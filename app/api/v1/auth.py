@@ -1,18 +1,18 @@
 # app/api/v1/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from ...infrastructure.db.DTOs.auth_schema import Token, UserLogin, UserCreate, UserOut
+from ...infrastructure.db.DTOs.auth_schema import Principal, Token, UserLogin, UserCreate, UserOut
 from ...infrastructure.db.DTOs.user_dto import UserCreateInternal, UserResponseDTO as UserResponse
 from ...infrastructure.db.DTOs.user_role_dto import UserRoleCreateDTO
 from ...infrastructure.db.models.user_role import UserRole
 from ...infrastructure.db.models.user import User
-from ...infrastructure.db.models.role import Role
 from ...services.user_service import UserService
 from ...services.role_service import RoleService
 from ...services.user_role_service import UserRoleService
 from ...infrastructure.repositories.role_repo import RoleRepo
 from ...infrastructure.repositories.user_role_repo import UserRoleRepo
 from ...core.config import settings
+from ...core.rate_limit import enforce_rate_limit
 from jose import jwt
 from ...core.db import get_db_session as get_db
 from ...services.auth_service import AuthService, get_auth_service, oauth2_scheme
@@ -53,6 +53,27 @@ def get_current_user(
     auth_service = get_auth_service(db)
     return auth_service.get_current_user(db, token)
 
+def get_current_principal(
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> Principal:
+    """
+    Dependency para rutas que solo necesitan identidad y roles: usa la
+    caché de principals y evita consultar la base en cada request.
+    """
+    auth_service = get_auth_service(db)
+    return auth_service.get_current_principal(db, token)
+
+def rate_limited(bucket: str):
+    """
+    Como `get_current_principal`, y además cobra el request al límite
+    `bucket` del usuario (429 al agotarlo).
+    """
+    def dependency(principal: Principal = Depends(get_current_principal)) -> Principal:
+        enforce_rate_limit(bucket, str(principal.id) if principal else None)
+        return principal
+    return dependency
+
 router = APIRouter(
     prefix="/api/v1/auth",
     tags=["auth"]
@@ -65,10 +86,10 @@ async def login_for_access_token(
     db: Session = Depends(get_db)
 ):
     user_login = UserLogin(email=form_data.username, password=form_data.password)
-    return auth_service.login(db, user_login)
+    return await auth_service.login(db, user_login)
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(
+def register_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
     user_service: UserService = Depends(get_user_service),
@@ -77,37 +98,25 @@ async def register_user(
 ):
     """Registrar un nuevo usuario"""
     try:
+        role_service.get_role(user_data.role_id)
 
-        all_roles = db.query(Role).all()        
-        role = role_service.get_role(user_data.role_id)
-        
-        if not role:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Role with ID {user_data.role_id} not found"
-            )
-        
         user_for_creation = UserCreateInternal.model_validate(user_data)
         user = user_service.create_user(db, user_for_creation)
 
         user_role_data = UserRoleCreateDTO(user_id=user.id, role_id=user_data.role_id)
         user_role_service.create_user_role(db, obj_in=user_role_data)
-
-        db.commit()
-        db.refresh(user)
         return user
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred(api/v1/auth/register): {str(e)}"
         )
 
 @router.get("/me/test-token", include_in_schema=settings.ENVIRONMENT == "development")
-async def test_token_decoding(token: str = Depends(oauth2_scheme),
+def test_token_decoding(token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)):
     if settings.ENVIRONMENT != "development":
         raise HTTPException(
@@ -65,6 +65,5 @@ def reset_password(
     new_hash = get_password_hash(request.new_password)
     user.password = new_hash
     db.add(user)
-    db.commit()
     
     return {"message": "Contraseña actualizada exitosamente"}
@@ -42,7 +42,7 @@ class PatientRegister(BaseModel):
     last_name: Optional[str] = None
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_patient(
+def register_patient(
     user_data: PatientRegister,
     user_service: UserService = Depends(get_user_service),
     user_role_service: UserRoleService = Depends(get_user_role_service),
@@ -83,14 +83,11 @@ async def register_patient(
 
         user_role_data = UserRoleCreateDTO(user_id=user.id, role_id=default_patient_role_id)
         user_role_service.create_user_role(db, obj_in=user_role_data)
-
-        db.refresh(user)
         return user
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {e}"
@@ -3,13 +3,13 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ...infrastructure.db.DTOs.auth_schema import UserOut
+from ...infrastructure.db.DTOs.auth_schema import Principal
 
-from ...api.v1.auth import get_current_user
+from ...api.v1.auth import get_current_principal
 from ...services.role_service import RoleService
 from ...infrastructure.repositories.role_repo import RoleRepo
 from ...infrastructure.db.DTOs.role_dto import RoleBaseDTO, RoleResponseDTO
-from core.db import get_db_session as get_db
+from ...core.db import get_db_session as get_db
 
 router = APIRouter(prefix="/temp-roles", tags=["Temporary Role Creation"])
 def get_role_service(db: Session = Depends(get_db)) -> RoleService:
@@ -25,11 +25,11 @@ def get_role_service(db: Session = Depends(get_db)) -> RoleService:
     description="TEMPORARY ENDPOINT - Only for initial role creation",
     include_in_schema=True
 )
-async def create_temp_role(
+def create_temp_role(
     role_data: RoleBaseDTO,
     role_service: RoleService = Depends(get_role_service),
     db: Session = Depends(get_db),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     TEMPORARY ENDPOINT - Creates a new role with UUID.
@@ -44,10 +44,10 @@ async def create_temp_role(
             detail=f"Error creating role: {str(e)}"
         )
 @router.get("/", response_model=List[RoleResponseDTO])
-async def get_all_roles(
+def get_all_roles(
     role_service: RoleService = Depends(get_role_service),
     db: Session = Depends(get_db),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 
 ):
     """
@@ -57,13 +57,36 @@ async def get_all_roles(
     return role_service.get_all_roles()
 
 @router.get("/{role_id}", response_model=str)
-async def get_role_name_by_id(
+def get_role_name_by_id(
     role_id: UUID,
     role_service: RoleService = Depends(get_role_service),
     db: Session = Depends(get_db),
-    current_user: UserOut = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Obtiene SOLO el nombre de un rol específico por su UUID.
     """
-    return role_service.get_role(role_id)
\ No newline at end of file
+    return role_service.get_role_name(role_id)
+
+@router.put("/{role_id}", response_model=RoleResponseDTO)
+def update_role(
+    role_id: UUID,
+    role_data: RoleBaseDTO,
+    role_service: RoleService = Depends(get_role_service),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Renombra un rol existente.
+    """
+    return role_service.update_role(role_id, role_data.name)
+
+@router.delete("/{role_id}", response_model=RoleResponseDTO)
+def delete_role(
+    role_id: UUID,
+    role_service: RoleService = Depends(get_role_service),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Elimina un rol y sus asignaciones a usuarios.
+    """
+    return role_service.delete_role(role_id)
\ No newline at end of file
@@ -0,0 +1,105 @@
+from typing import AsyncIterator
+
+from loguru import logger as log
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .config import settings
+from .db import build_engine_kwargs
+from .db_instrumentation import instrument_engine, instrument_pool_events
+from .db_routing import ReplicaSet, RoutingSession
+from .unit_of_work import AsyncUnitOfWork
+
+# Motor asíncrono (aiomysql) para los handlers `async def`. Comparte
+# modelos y metadata con `core.db`; el motor síncrono sigue disponible
+# para las rutas que todavía no migraron.
+async_engine_kwargs = build_engine_kwargs(
+    "api_async", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, poolclass=AsyncAdaptedQueuePool
+)
+
+
+def _async_replica_url(url: str):
+    return make_url(url).set(drivername=settings.ASYNC_DB_DRIVER)
+
+
+try:
+    async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, **async_engine_kwargs)
+    async_replica_engines = [
+        create_async_engine(
+            _async_replica_url(url),
+            **build_engine_kwargs(
+                f"replica{i}_async", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW,
+                poolclass=AsyncAdaptedQueuePool
+            )
+        )
+        for i, url in enumerate(settings.replica_urls)
+    ]
+except Exception as e:
+    raise ValueError(f"Error al crear el motor asíncrono de base de datos MySQL: {e}")
+
+instrument_engine(async_engine.sync_engine)
+instrument_pool_events(async_engine.sync_engine, "api_async")
+for i, replica_engine in enumerate(async_replica_engines):
+    instrument_engine(replica_engine.sync_engine)
+    instrument_pool_events(replica_engine.sync_engine, f"replica{i}_async")
+
+async_replicas = ReplicaSet([replica_engine.sync_engine for replica_engine in async_replica_engines])
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutingSession,
+    replicas=async_replicas,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def get_async_db_session() -> AsyncIterator[AsyncSession]:
+    """
+    Sesión asíncrona del request como unidad de trabajo: un único commit al
+    final (rollback si falla). Las relaciones no se cargan de forma
+    perezosa: los repositorios async deben pedirlas con `selectinload`/`joinedload`.
+    """
+    async with AsyncUnitOfWork(AsyncSessionLocal) as db:
+        yield db
+
+
+async def get_async_read_db_session() -> AsyncIterator[AsyncSession]:
+    """
+    Sesión asíncrona para endpoints de lectura: los SELECT van a las
+    réplicas y, tras un commit con escrituras en el request, al primario.
+    """
+    async with AsyncReadSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def check_async_database_connection() -> bool:
+    """
+    Verifica si la conexión asíncrona a la base de datos funciona
+    """
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        log.error(f"Error en conexión asíncrona a MySQL: {e}")
+        return False
+
+
+async def dispose_async_engine() -> None:
+    """Cierra las conexiones de los pools asíncronos (shutdown)."""
+    await async_engine.dispose()
+    for replica_engine in async_replica_engines:
+        await replica_engine.dispose()
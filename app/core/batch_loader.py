@@ -0,0 +1,42 @@
+from typing import Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Límite de claves por `IN (...)`; más claves se reparten en varias consultas.
+MAX_BATCH_SIZE = 500
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Cargador por lotes al estilo DataLoader, con caché por request.
+    `load_many` junta las claves que todavía no están en caché y las resuelve
+    con una sola llamada a `batch_fn` (un `IN (...)`); las claves sin
+    resultado quedan cacheadas como `None` para no volver a consultarlas.
+    La clave `None` devuelve `None` sin consultar.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[K]], Dict[K, V]], max_batch_size: int = MAX_BATCH_SIZE):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max_batch_size
+        self._cache: Dict[K, Optional[V]] = {None: None}
+
+    def load(self, key: K) -> Optional[V]:
+        return self.load_many([key])[0]
+
+    def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        keys = list(keys)
+        missing = list(dict.fromkeys(key for key in keys if key not in self._cache))
+        for start in range(0, len(missing), self._max_batch_size):
+            chunk = missing[start:start + self._max_batch_size]
+            found = self._batch_fn(chunk)
+            for key in chunk:
+                self._cache[key] = found.get(key)
+        return [self._cache[key] for key in keys]
+
+    def prime(self, key: K, value: V) -> None:
+        """Agrega un valor ya cargado por otra consulta."""
+        self._cache.setdefault(key, value)
+
+    def clear(self) -> None:
+        self._cache = {None: None}
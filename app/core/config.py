@@ -25,11 +25,82 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
     DB_DRIVER: str = "mysql+pymysql"
+    ASYNC_DB_DRIVER: str = "mysql+aiomysql"
+
+    # DB Pool Settings (por proceso; multiplicar por WORKERS para el total)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
+    DB_CONNECT_TIMEOUT: int = 5
+    DB_BACKGROUND_POOL_SIZE: int = 2
+    DB_BACKGROUND_MAX_OVERFLOW: int = 2
+
+    # Read Replica Settings
+    DB_REPLICA_URLS: str = ""  # URLs separadas por coma; vacío: todo va al primario
+    DB_REPLICA_RETRY_SECONDS: int = 30
     
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     RESET_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("RESET_TOKEN_EXPIRE_MINUTES", "60"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # 0 desactiva la caché
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password Hashing Settings
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 2  # Hashes Argon2 simultáneos por proceso (64 MiB cada uno)
+
+    # User Import Settings
+    USER_IMPORT_MAX_ROWS: int = 50000
+    USER_IMPORT_MAX_FILE_BYTES: int = 20 * 1024 * 1024  # Se corta la lectura del upload al superarlo
+    USER_IMPORT_CHUNK_SIZE: int = 1000  # Filas por INSERT multi-fila y por transacción
+    USER_IMPORT_HASH_PROCESSES: int = 2  # Procesos de hashing por import (64 MiB cada uno)
+
+    # Batch Settings
+    MEDICAL_STUDY_BATCH_MAX_SIZE: int = 500
+    DIAGNOSIS_BATCH_MAX_STUDIES: int = 50  # Estudios por request e inferencia
+    DIAGNOSIS_BATCH_MAX_FILE_BYTES: int = 10 * 1024 * 1024  # Por CSV, también descomprimido desde el zip
+
+    # Diagnosis Job Settings
+    DIAGNOSIS_JOB_BACKEND: str = "memory"  # Options: "memory" (hilos de la API), "database" (tabla + app.jobs.diagnosis_worker)
+    DIAGNOSIS_JOB_WORKERS: int = 2  # Hilos del pool; cuántos corren a la vez lo decide INFERENCE_SLOTS
+    DIAGNOSIS_JOB_MAX_PENDING: int = 100  # En cola o en ejecución; por encima se responde 503
+    DIAGNOSIS_JOB_RETENTION_SECONDS: int = 3600  # Trabajos terminados consultables
+    DIAGNOSIS_JOB_MAX_WAIT_SECONDS: int = 25  # Tope de /wait, por debajo del timeout del proxy
+    DIAGNOSIS_JOB_POLL_SECONDS: float = 1.0  # database: consulta de la tabla en /wait y en workers ociosos
+    DIAGNOSIS_JOB_LEASE_SECONDS: int = 60  # database: sin heartbeat durante este tiempo, el trabajo vuelve a la cola
+    DIAGNOSIS_JOB_HEARTBEAT_SECONDS: int = 15
+    DIAGNOSIS_JOB_MAX_ATTEMPTS: int = 3  # database: veces que se toma un trabajo antes de darlo por fallido
+
+    # Inference Scheduler Settings
+    INFERENCE_SLOTS: int = 2  # Inferencias simultáneas por proceso (diagnóstico, lote y trabajos en memoria)
+    INFERENCE_URGENT_WEIGHT: float = 8.0  # Parte de los slots de urgent frente a routine (1) cuando ambas esperan
+
+    # Rate Limit Settings
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_DIAGNOSE_PER_MINUTE: float = 60  # /diagnose*: un token por estudio
+    RATE_LIMIT_DIAGNOSE_BURST: float = 60  # >= DIAGNOSIS_BATCH_MAX_STUDIES para admitir un lote completo
+    RATE_LIMIT_MODEL_TEST_PER_MINUTE: float = 10  # /test-binary y /test-classify
+    RATE_LIMIT_MODEL_TEST_BURST: float = 5
+    RATE_LIMIT_MAX_KEYS: int = 10000
+
+    # Load Shedding Settings
+    DEGRADATION_ENABLED: bool = True
+    DEGRADATION_LEVELS: str = "full,approximate,none,reduced"  # Niveles en orden, separados por coma
+    DEGRADATION_MAX_QUEUE_DEPTH: int = 8  # Inferencias esperando slot a partir de las que se degrada
+    DEGRADATION_MAX_P95_SECONDS: float = 10.0  # p95 de la inferencia (por estudio) a partir del que se degrada
+    DEGRADATION_WINDOW_SECONDS: int = 60  # Ventana de latencias para el p95
+    DEGRADATION_COOLDOWN_SECONDS: int = 15  # Mínimo entre dos cambios de nivel
+
+    # Idempotency Settings
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 3600  # Respuesta guardada por Idempotency-Key
+    IDEMPOTENCY_KEY_LOCK_SECONDS: int = 300  # Reserva de un request en curso; vencida, otro request con la clave la toma
+
+    # DB Retry Settings
+    DB_RETRY_ATTEMPTS: int = 4
+    DB_RETRY_BASE_DELAY: float = 0.2
+    DB_RETRY_MAX_DELAY: float = 5.0
     
     # Email Settings
     EMAILS_ENABLED: bool = True
@@ -48,7 +119,31 @@ class Settings(BaseSettings):
     MODELS_PATH: str = "trained_models"
     BINARY_MODELS_PATH: str = "trained_models/binary"
     CLASSIFY_MODELS_PATH: str = "trained_models/classify"
-    
+    MODELS_VERSION: str = "v1"
+    MODEL_REGISTRY_MAX_VERSIONS: int = 2  # Versiones alternativas de modelos cargadas a la vez (LRU)
+
+    # File Storage Settings
+    UPLOADS_DIR: str = "~/uploads"
+    FILE_STORAGE_CHUNK_SIZE: int = 64 * 1024
+    FILE_STORAGE_COMPRESSION: bool = False
+    FILE_STORAGE_ENCRYPTION: bool = True
+    FILE_ENCRYPTION_SEGMENT_SIZE: int = 64 * 1024
+
+    # DB Instrumentation Settings
+    DB_SLOW_QUERY_MS: int = 200
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
+    DB_DEBUG_HEADERS: Optional[bool] = None  # None: solo en desarrollo
+
+    # Role Catalog Settings
+    ROLE_CATALOG_TTL_SECONDS: int = 300
+
+    # Name Search Settings
+    NAME_SEARCH_BACKEND: str = "mysql"  # Options: "mysql", "trigram"
+    NAME_SEARCH_NGRAM_SIZE: int = 2  # Debe coincidir con ngram_token_size de MySQL
+    NAME_SEARCH_MAX_CANDIDATES: int = 1000
+    NAME_SEARCH_MIN_SIMILARITY: float = 0.3
+    NAME_SEARCH_TRIGRAM_TTL_SECONDS: int = 300
+
     @property
     def is_development(self) -> bool:
         return self.ENVIRONMENT == "development"
@@ -60,6 +155,18 @@ class Settings(BaseSettings):
     @property
     def is_testing(self) -> bool:
         return self.ENVIRONMENT == "testing"
+
+    @property
+    def db_debug_headers(self) -> bool:
+        """Cabeceras X-DB-* en las respuestas; por defecto solo en desarrollo."""
+        if self.DB_DEBUG_HEADERS is None:
+            return self.is_development
+        return self.DB_DEBUG_HEADERS
+    
+    @property
+    def replica_urls(self) -> List[str]:
+        """Convierte DB_REPLICA_URLS a lista"""
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
     
     @property
     def cors_origins(self) -> List[str]:
@@ -98,6 +205,11 @@ class Settings(BaseSettings):
          encoded_password = quote_plus(self.DB_PASS)
          return f"{self.DB_DRIVER}://{self.DB_USER}:{encoded_password}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+         encoded_password = quote_plus(self.DB_PASS)
+         return f"{self.ASYNC_DB_DRIVER}://{self.DB_USER}:{encoded_password}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
 
 try:
     settings = Settings()
@@ -3,7 +3,11 @@ from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import QueuePool
 from sqlalchemy import event
 from .config import settings
+from .db_instrumentation import instrument_engine, instrument_pool_events, instrumented_pool_class
+from .db_routing import ReplicaSet, RoutingSession
+from .unit_of_work import UnitOfWork
 import os
+from contextlib import contextmanager
 from dotenv import load_dotenv
 from pathlib import Path
 from urllib.parse import quote_plus
@@ -12,17 +16,28 @@ from loguru import logger as log
 
 Base = declarative_base()
 
-engine_kwargs = {
-    "poolclass": QueuePool,
-    "pool_size": 5,
-    "max_overflow": 10,
-    "pool_pre_ping": True,
-    "pool_recycle": 3600,
-    "connect_args": {
-        "connect_timeout": 5,
-        "charset": "utf8mb4"
+def build_engine_kwargs(pool_name: str, pool_size: int, max_overflow: int, poolclass=QueuePool) -> dict:
+    """
+    Parámetros del motor tomados de `Settings`. Cada carga de trabajo
+    (`api`, `background`) tiene su propio pool, identificado en las métricas.
+    """
+    return {
+        "poolclass": instrumented_pool_class(pool_name, poolclass),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "connect_args": {
+            "connect_timeout": settings.DB_CONNECT_TIMEOUT,
+            "charset": "utf8mb4"
+        }
     }
-}
+
+engine_kwargs = build_engine_kwargs("api", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+background_engine_kwargs = build_engine_kwargs(
+    "background", settings.DB_BACKGROUND_POOL_SIZE, settings.DB_BACKGROUND_MAX_OVERFLOW
+)
 
 basedir = os.path.abspath(Path(__file__).parents[2])
 load_dotenv(os.path.join(basedir, '.env'))
@@ -31,9 +46,26 @@ SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
 try:
     engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_kwargs)
+    # Pool aparte para trabajos largos (entrenamiento, backfills, exportaciones)
+    # para que no compitan por conexiones con el tráfico interactivo.
+    background_engine = create_engine(SQLALCHEMY_DATABASE_URL, **background_engine_kwargs)
+    replica_engines = [
+        create_engine(url, **build_engine_kwargs(f"replica{i}", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW))
+        for i, url in enumerate(settings.replica_urls)
+    ]
 except Exception as e:
     raise ValueError(f"Error al crear el motor de base de datos MySQL: {e}")
 
+instrument_engine(engine)
+instrument_engine(background_engine)
+instrument_pool_events(engine, "api")
+instrument_pool_events(background_engine, "background")
+for i, replica_engine in enumerate(replica_engines):
+    instrument_engine(replica_engine)
+    instrument_pool_events(replica_engine, f"replica{i}")
+
+replicas = ReplicaSet(replica_engines)
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -41,19 +73,53 @@ SessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+BackgroundSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=background_engine,
+    expire_on_commit=False
+)
+
+# Sesiones de solo lectura: los SELECT van a las réplicas (DB_REPLICA_URLS)
+# y cualquier escritura, o lectura posterior a un commit, al primario.
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    replicas=replicas,
+    autoflush=False,
+    bind=engine,
+    expire_on_commit=False
+)
+
 def get_db_session():
     """
-    Generador de sesiones de base de datos con manejo de errores
+    Sesión del request como unidad de trabajo: los repositorios solo hacen
+    flush y el request se confirma una vez al final (rollback si falla).
+    """
+    with UnitOfWork(SessionLocal) as db:
+        yield db
+
+def get_read_db_session():
+    """
+    Sesión para endpoints de lectura; sin réplicas configuradas usa el primario.
     """
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         yield db
-    except Exception as e:
+    except Exception:
         db.rollback()
         raise
     finally:
         db.close()
 
+@contextmanager
+def get_background_db_session():
+    """
+    Sesión del pool `background` para jobs y tareas fuera del ciclo de un
+    request. Es una unidad de trabajo: lo pendiente se confirma al salir.
+    """
+    with UnitOfWork(BackgroundSessionLocal) as db:
+        yield db
+
 def check_database_connection():
     """
     Verifica si la conexión a la base de datos funciona
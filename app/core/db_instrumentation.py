@@ -0,0 +1,215 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional, Set
+
+from loguru import logger as log
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from .config import settings
+from .metrics import (
+    DB_N_PLUS_ONE,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_INVALIDATIONS,
+    DB_POOL_OVERFLOW,
+    DB_QUERY_DURATION,
+    DB_REQUEST_QUERIES,
+    DB_REQUEST_TIME,
+    DB_SLOW_QUERIES,
+)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+N_PLUS_ONE_HEADER = "X-DB-N-Plus-One"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Reduce una sentencia SQL a su forma: literales y parámetros como `?` y
+    listas `IN (...)` colapsadas, para agrupar ejecuciones equivalentes.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?...)", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+@dataclass
+class RequestDBStats:
+    """Acumulado de las sentencias SQL ejecutadas durante un request."""
+    query_count: int = 0
+    total_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    n_plus_one: Set[str] = field(default_factory=set)
+
+
+_request_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def start_request_stats() -> RequestDBStats:
+    """
+    Empieza a acumular estadísticas para el request actual. El objeto se
+    comparte por referencia, así que también lo ven los handlers síncronos
+    que FastAPI ejecuta en el threadpool (copian el contexto).
+    """
+    stats = RequestDBStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def get_request_stats() -> Optional[RequestDBStats]:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    DB_QUERY_DURATION.observe(elapsed)
+
+    normalized = None
+    if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        normalized = normalize_statement(statement)
+        DB_SLOW_QUERIES.inc()
+        log.warning(f"Slow query ({elapsed * 1000:.1f} ms): {normalized}")
+
+    stats = _request_stats.get()
+    if stats is None:
+        return
+    stats.query_count += 1
+    stats.total_time += elapsed
+    normalized = normalized or normalize_statement(statement)
+    stats.statements[normalized] += 1
+    if stats.statements[normalized] == settings.DB_N_PLUS_ONE_THRESHOLD:
+        stats.n_plus_one.add(normalized)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute no se dispara si la sentencia falla.
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Registra los eventos de cursor en el motor. Para motores asíncronos se
+    pasa `async_engine.sync_engine`.
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class _InstrumentedPoolMixin:
+    """
+    Mide cuánto espera cada checkout del pool y publica conexiones en uso
+    y overflow. `metrics_name` identifica el pool en las métricas.
+    """
+    metrics_name = "default"
+
+    def _publish_usage(self) -> None:
+        DB_POOL_CHECKED_OUT.labels(self.metrics_name).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(self.metrics_name).set(self.overflow())
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.metrics_name).observe(time.perf_counter() - start)
+        self._publish_usage()
+        return conn
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._publish_usage()
+
+
+def instrumented_pool_class(name: str, base: type = QueuePool) -> type:
+    """
+    Subclase de `base` (QueuePool o AsyncAdaptedQueuePool) que reporta
+    métricas con la etiqueta `pool=name`. Se usa como `poolclass`; al ser
+    una clase propia, `engine.dispose()` la recrea con el mismo nombre.
+    """
+    return type(f"Instrumented{base.__name__}_{name}", (_InstrumentedPoolMixin, base), {"metrics_name": name})
+
+
+def _count_invalidation(name: str):
+    def _listener(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATIONS.labels(name).inc()
+    return _listener
+
+
+def instrument_pool_events(engine: Engine, name: str) -> None:
+    """Cuenta las invalidaciones de conexiones del pool del motor."""
+    event.listen(engine, "invalidate", _count_invalidation(name))
+    event.listen(engine, "soft_invalidate", _count_invalidation(name))
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class DBInstrumentationMiddleware:
+    """
+    Middleware ASGI que mide las sentencias SQL de cada request, registra
+    histogramas por ruta, avisa de posibles N+1 y, si `DB_DEBUG_HEADERS`
+    está activo (por defecto en desarrollo), agrega las cabeceras `X-DB-*` a la respuesta.
+    """
+
+    def __init__(self, app, debug_headers: Optional[bool] = None):
+        self.app = app
+        self.debug_headers = settings.db_debug_headers if debug_headers is None else debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_request_stats()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.debug_headers:
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode(), str(stats.query_count).encode()))
+                headers.append((QUERY_TIME_HEADER.lower().encode(), f"{stats.total_time * 1000:.1f}".encode()))
+                if stats.n_plus_one:
+                    headers.append((N_PLUS_ONE_HEADER.lower().encode(), str(len(stats.n_plus_one)).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            method, route = scope["method"], _route_template(scope)
+            DB_REQUEST_QUERIES.labels(method, route).observe(stats.query_count)
+            DB_REQUEST_TIME.labels(method, route).observe(stats.total_time)
+            for statement in stats.n_plus_one:
+                DB_N_PLUS_ONE.labels(method, route).inc()
+                log.warning(
+                    f"Possible N+1 in {method} {route}: executed "
+                    f"{stats.statements[statement]} times: {statement}"
+                )
@@ -0,0 +1,68 @@
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError, OperationalError, TimeoutError as PoolTimeoutError
+from loguru import logger as log
+
+from .config import settings
+from .metrics import DB_TRANSIENT_RETRIES
+
+T = TypeVar("T")
+
+# Errores de MySQL que se resuelven reintentando la transacción completa:
+# lock wait timeout, deadlock, no se pudo conectar, "server has gone away"
+# y conexión perdida durante la consulta.
+TRANSIENT_MYSQL_ERRORS = {1205, 1213, 2003, 2006, 2013}
+
+
+def is_transient_db_error(exc: BaseException) -> bool:
+    """
+    Si el error (o alguno de los que lo causaron, p. ej. un HTTPException
+    levantado al capturarlo) es transitorio: conexión invalidada, timeout
+    del pool o uno de `TRANSIENT_MYSQL_ERRORS`.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, PoolTimeoutError):
+            return True
+        if isinstance(exc, DBAPIError):
+            if exc.connection_invalidated:
+                return True
+            if isinstance(exc, OperationalError):
+                args = getattr(exc.orig, "args", ())
+                if args and args[0] in TRANSIENT_MYSQL_ERRORS:
+                    return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def retry_transient(
+    fn: Callable[[], T],
+    *,
+    operation: str,
+    attempts: Optional[int] = None,
+    base_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+) -> T:
+    """
+    Ejecuta `fn` y la reintenta ante errores transitorios, con backoff
+    exponencial y jitter completo (`DB_RETRY_*`). `fn` debe abrir y
+    confirmar su propia transacción para que cada intento empiece de cero.
+    Los demás errores, y el último transitorio, se propagan.
+    """
+    attempts = settings.DB_RETRY_ATTEMPTS if attempts is None else attempts
+    base_delay = settings.DB_RETRY_BASE_DELAY if base_delay is None else base_delay
+    max_delay = settings.DB_RETRY_MAX_DELAY if max_delay is None else max_delay
+
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= attempts or not is_transient_db_error(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            DB_TRANSIENT_RETRIES.labels(operation).inc()
+            log.warning(f"Transient DB error in {operation} (attempt {attempt}/{attempts}), retrying in {delay:.2f}s: {e}")
+            time.sleep(delay)
@@ -0,0 +1,185 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from loguru import logger as log
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from .config import settings
+from .metrics import DB_READ_ROUTING, DB_REPLICA_FAILURES
+
+# `session.info`: la sesión escribió algo y desde entonces solo usa el primario.
+SESSION_WROTE_KEY = "routing_wrote"
+
+
+@dataclass
+class ReadRoutingState:
+    """Estado de enrutamiento de lecturas del request actual."""
+    pinned_to_primary: bool = False
+
+
+_read_routing: ContextVar[Optional[ReadRoutingState]] = ContextVar("db_read_routing", default=None)
+
+
+def start_read_routing() -> ReadRoutingState:
+    """
+    Empieza un request sin escrituras. Igual que `start_request_stats`, el
+    objeto se comparte por referencia con los handlers del threadpool.
+    """
+    state = ReadRoutingState()
+    _read_routing.set(state)
+    return state
+
+
+def pin_to_primary() -> None:
+    """Envía al primario el resto de las lecturas del request actual."""
+    state = _read_routing.get()
+    if state is not None:
+        state.pinned_to_primary = True
+
+
+def is_pinned_to_primary() -> bool:
+    state = _read_routing.get()
+    return state is not None and state.pinned_to_primary
+
+
+class ReplicaSet:
+    """
+    Réplicas de lectura con su estado de salud. Una réplica que falla al
+    conectar (o pierde la conexión) queda fuera durante
+    `DB_REPLICA_RETRY_SECONDS` y sus lecturas van a otra réplica o al primario.
+    """
+
+    def __init__(self, engines: Sequence[Engine], retry_seconds: Optional[float] = None):
+        self.engines: List[Engine] = list(engines)
+        self.retry_seconds = settings.DB_REPLICA_RETRY_SECONDS if retry_seconds is None else retry_seconds
+        self._down_until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def name(self, engine: Engine) -> str:
+        return f"replica{self.engines.index(engine)}"
+
+    def is_healthy(self, engine: Engine) -> bool:
+        return self._down_until.get(id(engine), 0.0) <= time.monotonic()
+
+    def choose(self, preferred: Optional[Engine] = None) -> Optional[Engine]:
+        """Réplica sana para una sesión, manteniendo la anterior si sigue sana."""
+        healthy = [engine for engine in self.engines if self.is_healthy(engine)]
+        if not healthy:
+            return None
+        if preferred in healthy:
+            return preferred
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def mark_down(self, engine: Engine, error: Exception) -> None:
+        with self._lock:
+            if not self.is_healthy(engine):
+                return
+            self._down_until[id(engine)] = time.monotonic() + self.retry_seconds
+        DB_REPLICA_FAILURES.labels(self.name(engine)).inc()
+        log.warning(
+            f"Read replica {self.name(engine)} unavailable, using primary for "
+            f"{self.retry_seconds}s: {error}"
+        )
+
+    def _on_error(self, exception_context) -> None:
+        if exception_context.connection is None or exception_context.is_disconnect:
+            engine = exception_context.engine
+            self.mark_down(engine, exception_context.original_exception)
+
+
+class RoutingSession(Session):
+    """
+    Sesión que envía los SELECT a una réplica y todo lo demás al primario
+    (`bind`). Lee del primario si:
+    - la sesión ya escribió (flush, UPDATE/DELETE masivos);
+    - el request ya hizo commit de una escritura (read-your-writes);
+    - la sentencia es `SELECT ... FOR UPDATE`;
+    - no hay réplicas sanas.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas or ReplicaSet([])
+        self._replica: Optional[Engine] = None
+
+    def _routes_to_replica(self, clause) -> bool:
+        return (
+            bool(self.replicas)
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and not self._flushing
+            and not self.info.get(SESSION_WROTE_KEY)
+            and not is_pinned_to_primary()
+        )
+
+    def _replica_bind(self) -> Optional[Engine]:
+        # Se conecta al elegirla: si falla, la sesión sigue usable y se prueba
+        # la siguiente réplica o el primario dentro de la misma llamada.
+        while True:
+            replica = self.replicas.choose(preferred=self._replica)
+            if replica is None:
+                return None
+            try:
+                self.connection(bind_arguments={"bind": replica})
+            except DBAPIError as e:
+                self.replicas.mark_down(replica, e)
+                continue
+            self._replica = replica
+            return replica
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if kwargs.get("bind") is None and self._routes_to_replica(clause):
+            replica = self._replica_bind()
+            if replica is not None:
+                DB_READ_ROUTING.labels("replica").inc()
+                return replica
+            DB_READ_ROUTING.labels("primary").inc()
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info[SESSION_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[SESSION_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_request_after_commit(session):
+    # Vale para cualquier sesión del request (también `SessionLocal`): las
+    # réplicas pueden no tener todavía lo que se acaba de confirmar.
+    if session.info.get(SESSION_WROTE_KEY):
+        pin_to_primary()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware ASGI que abre un estado de enrutamiento por request, para que
+    un commit con escrituras mande al primario las lecturas posteriores.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            start_read_routing()
+        await self.app(scope, receive, send)
@@ -1,16 +1,24 @@
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from typing import BinaryIO, Iterator, Optional
+import base64
 import os
+import struct
 from loguru import logger as log
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_fernet():
+def _get_master_key() -> str:
     key = os.getenv("ENCRYPTION_KEY")
     if not key:
         raise ValueError("ENCRYPTION_KEY not found in environment variables")
-    key = key.strip('"').strip("'")
-    return Fernet(key.encode())
+    return key.strip('"').strip("'")
+
+def get_fernet():
+    return Fernet(_get_master_key().encode())
 
 def encrypt_data(data: str) -> str:
     """Encrypts a string using Fernet (AES)."""
@@ -23,6 +31,18 @@ def encrypt_data(data: str) -> str:
         log.error(f"Encryption failed: {e}")
         raise
 
+def encrypt_bytes(data: bytes) -> str:
+    """Encrypts raw bytes using Fernet and returns the token as text."""
+    try:
+        return get_fernet().encrypt(data).decode()
+    except Exception as e:
+        log.error(f"Encryption failed: {e}")
+        raise
+
+def decrypt_bytes(token: str) -> bytes:
+    """Decrypts a Fernet token back to raw bytes. Raises on invalid tokens."""
+    return get_fernet().decrypt(token.encode())
+
 def decrypt_data(data: str) -> str:
     """Decrypts a Fernet token back to string."""
     try:
@@ -33,3 +53,116 @@ def decrypt_data(data: str) -> str:
     except Exception as e:
         log.warning(f"Decryption failed (might be unencrypted data): {e}")
         return data
+
+
+# --- Streaming file encryption -------------------------------------------
+#
+# Layout: header | segment_0 | ... | segment_n
+#   header    = MAGIC (8) | segment_size (u32 BE) | salt (16) | nonce_prefix (7)
+#   segment_i = AES-GCM(plaintext_i) + tag (16)
+# The per-file key is HKDF-SHA256(ENCRYPTION_KEY, salt) and the nonce of each
+# segment is nonce_prefix | i (u32 BE) | last_flag (1), so segments cannot be
+# reordered, dropped or truncated without failing authentication.
+
+STREAM_MAGIC = b"MIELGCM1"
+STREAM_SALT_SIZE = 16
+STREAM_NONCE_PREFIX_SIZE = 7
+STREAM_TAG_SIZE = 16
+STREAM_HEADER_SIZE = len(STREAM_MAGIC) + 4 + STREAM_SALT_SIZE + STREAM_NONCE_PREFIX_SIZE
+DEFAULT_SEGMENT_SIZE = 64 * 1024
+
+def derive_file_key(salt: bytes) -> bytes:
+    """Derives a per-file AES-256 key from ENCRYPTION_KEY and a random salt."""
+    master = base64.urlsafe_b64decode(_get_master_key().encode())
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        info=b"miel-ia file encryption v1",
+    ).derive(master)
+
+def _segment_nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    return prefix + struct.pack(">I", index) + (b"\x01" if last else b"\x00")
+
+class StreamEncryptor:
+    """
+    Encrypts a byte stream into authenticated AES-GCM segments, writing them
+    to `sink` as soon as a full segment is buffered (memory is bounded by the
+    segment size).
+    """
+
+    def __init__(self, sink: BinaryIO, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        salt = os.urandom(STREAM_SALT_SIZE)
+        self._prefix = os.urandom(STREAM_NONCE_PREFIX_SIZE)
+        self._header = STREAM_MAGIC + struct.pack(">I", segment_size) + salt + self._prefix
+        self._aead = AESGCM(derive_file_key(salt))
+        self._segment_size = segment_size
+        self._sink = sink
+        self._buffer = bytearray()
+        self._index = 0
+        self._sink.write(self._header)
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        # Keep at least one byte buffered so the final segment is never empty
+        # unless the whole stream is.
+        while len(self._buffer) > self._segment_size:
+            self._emit(bytes(self._buffer[:self._segment_size]), last=False)
+            del self._buffer[:self._segment_size]
+
+    def finalize(self) -> None:
+        self._emit(bytes(self._buffer), last=True)
+        self._buffer.clear()
+
+    def _emit(self, plaintext: bytes, last: bool) -> None:
+        nonce = _segment_nonce(self._prefix, self._index, last)
+        self._sink.write(self._aead.encrypt(nonce, plaintext, self._header))
+        self._index += 1
+
+def iter_decrypted_stream(
+    source: BinaryIO,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Decrypts a stream written by StreamEncryptor, yielding plaintext between
+    offsets `start` and `end` (inclusive). Seeks directly to the first needed
+    segment when the source is seekable.
+    """
+    header = source.read(STREAM_HEADER_SIZE)
+    if len(header) != STREAM_HEADER_SIZE or not header.startswith(STREAM_MAGIC):
+        raise ValueError("Invalid encrypted stream header")
+
+    offset = len(STREAM_MAGIC)
+    (segment_size,) = struct.unpack(">I", header[offset:offset + 4])
+    offset += 4
+    salt = header[offset:offset + STREAM_SALT_SIZE]
+    prefix = header[offset + STREAM_SALT_SIZE:]
+    aead = AESGCM(derive_file_key(salt))
+
+    encrypted_segment_size = segment_size + STREAM_TAG_SIZE
+    index = start // segment_size
+    skip = start - index * segment_size
+    remaining = None if end is None else end - start + 1
+    if index:
+        source.seek(STREAM_HEADER_SIZE + index * encrypted_segment_size)
+
+    segment = source.read(encrypted_segment_size)
+    if not segment:
+        raise ValueError("Truncated encrypted stream")
+    while segment:
+        following = source.read(encrypted_segment_size)
+        last = not following
+        plaintext = aead.decrypt(_segment_nonce(prefix, index, last), segment, header)
+        if skip:
+            plaintext = plaintext[skip:]
+            skip = 0
+        if remaining is not None:
+            plaintext = plaintext[:remaining]
+            remaining -= len(plaintext)
+        if plaintext:
+            yield plaintext
+        if remaining is not None and remaining <= 0:
+            return
+        segment = following
+        index += 1
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import re
+import zlib
+from typing import Iterator, Optional, Tuple
+
+from .config import settings
+from .encryption import StreamEncryptor, iter_decrypted_stream
+
+CODEC_RAW = "raw"
+CODEC_GZIP = "gzip"
+CODEC_AESGCM = "aesgcm"
+CODEC_GZIP_AESGCM = "gzip+aesgcm"
+
+SUPPORTED_CODECS = (CODEC_RAW, CODEC_GZIP, CODEC_AESGCM, CODEC_GZIP_AESGCM)
+
+_RANGE_RE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+class StoredFileWriter:
+    """
+    Escribe un archivo subido en disco por bloques, aplicando el codec de
+    almacenamiento configurado (compresión y/o cifrado AES-GCM por segmentos)
+    y calculando el hash SHA-256 del contenido original a medida que se escribe.
+    """
+
+    def __init__(self, path: str, codec: str = CODEC_RAW):
+        if codec not in SUPPORTED_CODECS:
+            raise ValueError(f"Unknown storage codec: {codec}")
+        self.path = path
+        self.codec = codec
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if _is_compressed(codec) else None
+        self._fh = open(path, "wb")
+        self._encryptor = None
+        if _is_encrypted(codec):
+            self._encryptor = StreamEncryptor(self._fh, segment_size=settings.FILE_ENCRYPTION_SEGMENT_SIZE)
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        if self._compressor is not None:
+            chunk = self._compressor.compress(chunk)
+        if chunk:
+            self._sink_write(chunk)
+
+    def _sink_write(self, data: bytes) -> None:
+        if self._encryptor is not None:
+            self._encryptor.write(data)
+        else:
+            self._fh.write(data)
+
+    @property
+    def closed(self) -> bool:
+        return self._fh.closed
+
+    def close(self) -> Tuple[int, str]:
+        """Cierra el archivo y devuelve (tamaño en claro, hash SHA-256 hex)."""
+        if self._compressor is not None:
+            self._sink_write(self._compressor.flush())
+        if self._encryptor is not None:
+            self._encryptor.finalize()
+        self._fh.close()
+        return self.size, self._hash.hexdigest()
+
+    def abort(self) -> None:
+        """Cierra y elimina el archivo parcialmente escrito."""
+        try:
+            self._fh.close()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def _is_compressed(codec: str) -> bool:
+    return codec in (CODEC_GZIP, CODEC_GZIP_AESGCM)
+
+
+def _is_encrypted(codec: str) -> bool:
+    return codec in (CODEC_AESGCM, CODEC_GZIP_AESGCM)
+
+
+def default_storage_codec() -> str:
+    compressed = settings.FILE_STORAGE_COMPRESSION
+    encrypted = settings.FILE_STORAGE_ENCRYPTION
+    if compressed and encrypted:
+        return CODEC_GZIP_AESGCM
+    if encrypted:
+        return CODEC_AESGCM
+    if compressed:
+        return CODEC_GZIP
+    return CODEC_RAW
+
+
+def iter_stored_file(
+    path: str,
+    codec: str = CODEC_RAW,
+    start: int = 0,
+    end: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Genera el contenido en claro de un archivo almacenado, entre los offsets
+    `start` y `end` (inclusive), leyendo por bloques para mantener la memoria
+    constante sin importar el tamaño del archivo.
+    """
+    chunk_size = chunk_size or settings.FILE_STORAGE_CHUNK_SIZE
+    remaining = None if end is None else end - start + 1
+
+    if codec == CODEC_RAW:
+        with open(path, "rb") as fh:
+            fh.seek(start)
+            while remaining is None or remaining > 0:
+                to_read = chunk_size if remaining is None else min(chunk_size, remaining)
+                data = fh.read(to_read)
+                if not data:
+                    break
+                if remaining is not None:
+                    remaining -= len(data)
+                yield data
+        return
+
+    if codec == CODEC_AESGCM:
+        # Los segmentos cifrados permiten saltar directamente al offset pedido.
+        with open(path, "rb") as fh:
+            yield from iter_decrypted_stream(fh, start=start, end=end)
+        return
+
+    if codec == CODEC_GZIP:
+        with open(path, "rb") as fh:
+            yield from _slice_stream(_gunzip(_iter_raw(fh, chunk_size)), start, remaining)
+        return
+
+    if codec == CODEC_GZIP_AESGCM:
+        with open(path, "rb") as fh:
+            yield from _slice_stream(_gunzip(iter_decrypted_stream(fh)), start, remaining)
+        return
+
+    raise ValueError(f"Unknown storage codec: {codec}")
+
+
+def _iter_raw(fh, chunk_size: int) -> Iterator[bytes]:
+    while True:
+        data = fh.read(chunk_size)
+        if not data:
+            break
+        yield data
+
+
+def _gunzip(stream: Iterator[bytes]) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj(31)
+    for data in stream:
+        out = decompressor.decompress(data)
+        if out:
+            yield out
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def _slice_stream(stream: Iterator[bytes], start: int, remaining: Optional[int]) -> Iterator[bytes]:
+    """Descarta los primeros `start` bytes de un stream y corta tras `remaining` bytes."""
+    to_skip = start
+    for data in stream:
+        if to_skip:
+            if len(data) <= to_skip:
+                to_skip -= len(data)
+                continue
+            data = data[to_skip:]
+            to_skip = 0
+        if remaining is not None:
+            if remaining <= 0:
+                break
+            data = data[:remaining]
+            remaining -= len(data)
+        yield data
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta un header `Range` de un único rango de bytes.
+
+    Returns:
+        (start, end) inclusivos, o None si el header no existe o no es un rango
+        simple soportado (en ese caso se sirve el archivo completo).
+
+    Raises:
+        ValueError: si el rango no es satisfacible para el tamaño dado.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_RE.match(range_header)
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de ETags según RFC 9110 para `If-None-Match`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == bare:
+            return True
+    return False
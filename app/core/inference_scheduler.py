@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from loguru import logger as log
+
+from .config import settings
+from .metrics import INFERENCE_SCHEDULER_WAIT, INFERENCE_SCHEDULER_WAITING
+
+# Clases de prioridad de un diagnóstico, de mayor a menor.
+URGENT = "urgent"
+ROUTINE = "routine"
+PRIORITY_CLASSES = (URGENT, ROUTINE)
+
+
+def priority_rank(priority: str) -> int:
+    """Posición en `PRIORITY_CLASSES` (0 = más urgente), para ordenar en SQL."""
+    return PRIORITY_CLASSES.index(priority)
+
+
+class _FairQueue:
+    """
+    Start-time fair queuing entre flujos: cada elemento recibe una marca
+    de inicio `max(tiempo virtual, fin del anterior del flujo)` y sale
+    primero el de menor marca. Un flujo con peso `w` avanza `cost / w`
+    por elemento, así que un flujo con muchos pendientes no bloquea a los
+    que llegan después. A igual marca sale el de más peso.
+    """
+
+    def __init__(self):
+        self._vtime = 0.0
+        self._flows: Dict[Hashable, Deque[Tuple[float, float, Any]]] = {}
+        self._finish: Dict[Hashable, float] = {}
+
+    def push(self, flow: Hashable, item: Any, weight: float = 1.0, cost: float = 1.0) -> None:
+        start = self.__stamp(flow, weight, cost)
+        self._flows.setdefault(flow, deque()).append((start, -weight, item))
+
+    def charge(self, flow: Hashable, weight: float = 1.0, cost: float = 1.0) -> None:
+        """Cuenta un elemento que se atendió sin pasar por la cola (no había espera)."""
+        self._vtime = self.__stamp(flow, weight, cost)
+
+    def __stamp(self, flow: Hashable, weight: float, cost: float) -> float:
+        start = max(self._vtime, self._finish.get(flow, 0.0))
+        self._finish[flow] = start + cost / weight
+        return start
+
+    def pop(self) -> Any:
+        flow = min(self._flows, key=lambda key: self._flows[key][0][:2])
+        queue = self._flows[flow]
+        self._vtime, _, item = queue.popleft()
+        if not queue:
+            del self._flows[flow]
+        if len(self._finish) > 2 * len(self._flows) + 64:
+            # Flujos inactivos que ya no adelantan a nadie.
+            self._finish = {
+                key: finish for key, finish in self._finish.items()
+                if key in self._flows or finish > self._vtime
+            }
+        return item
+
+    def __bool__(self) -> bool:
+        return bool(self._flows)
+
+
+class SchedulerTicket:
+    """Un pedido de slot: espera en la cola hasta que `grant(ticket)` lo habilita."""
+    __slots__ = ("user_id", "priority", "cost", "grant", "state", "enqueued_at")
+
+    WAITING, GRANTED, DONE = "waiting", "granted", "done"
+
+    def __init__(self, grant: Callable[["SchedulerTicket"], None], user_id: str, priority: str, cost: float):
+        self.grant = grant
+        self.user_id = user_id
+        self.priority = priority
+        self.cost = cost
+        self.state = self.WAITING
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    """
+    Limita las inferencias simultáneas del proceso (`INFERENCE_SLOTS`) y
+    decide quién sigue cuando se libera un slot: primero entre clases de
+    prioridad, con cola justa ponderada (`urgent` pesa
+    `INFERENCE_URGENT_WEIGHT` frente a 1 de `routine`, así que no deja a
+    `routine` sin atender), y dentro de la clase entre usuarios, con el
+    mismo peso cada uno. Un lote cuesta tantos turnos como estudios: tras
+    un lote de 50, los pedidos de los demás usuarios pasan antes que los
+    siguientes de ese técnico.
+
+    `submit` no bloquea: llama a `grant(ticket)` cuando el slot es suyo, y
+    quien lo recibe llama a `finish(ticket)` al terminar (o para dejar de
+    esperar).
+    """
+
+    def __init__(self, slots: int, weights: Dict[str, float]):
+        self._slots = max(1, slots)
+        self._weights = weights
+        self._busy = 0
+        self._waiting = 0
+        self._classes = _FairQueue()
+        self._users: Dict[str, _FairQueue] = {priority: _FairQueue() for priority in weights}
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        """Pedidos esperando slot."""
+        return self._waiting
+
+    def submit(self, grant: Callable[[SchedulerTicket], None], *, user_id: str, priority: str = ROUTINE, cost: float = 1.0) -> SchedulerTicket:
+        ticket = SchedulerTicket(grant, str(user_id), priority, max(cost, 1.0))
+        with self._lock:
+            granted = self._busy < self._slots and self._waiting == 0
+            if granted:
+                self._busy += 1
+                ticket.state = SchedulerTicket.GRANTED
+                self._classes.charge(priority, weight=self._weights[priority], cost=ticket.cost)
+                self._users[priority].charge(ticket.user_id, cost=ticket.cost)
+            else:
+                self._classes.push(priority, priority, weight=self._weights[priority], cost=ticket.cost)
+                self._users[priority].push(ticket.user_id, ticket, cost=ticket.cost)
+                self._waiting += 1
+                INFERENCE_SCHEDULER_WAITING.labels(priority).inc()
+        if granted:
+            self.__granted(ticket)
+        return ticket
+
+    def finish(self, ticket: SchedulerTicket) -> None:
+        """Libera el slot del ticket, o lo saca de la cola si todavía esperaba."""
+        with self._lock:
+            if ticket.state == SchedulerTicket.WAITING:
+                # Queda en la cola marcado; `__next` lo descarta.
+                ticket.state = SchedulerTicket.DONE
+                self._waiting -= 1
+                INFERENCE_SCHEDULER_WAITING.labels(ticket.priority).dec()
+                return
+            if ticket.state != SchedulerTicket.GRANTED:
+                return
+            ticket.state = SchedulerTicket.DONE
+            self._busy -= 1
+            following = self.__next()
+        if following is not None:
+            self.__granted(following)
+
+    @contextmanager
+    def slot(self, *, user_id: str, priority: str = ROUTINE, cost: float = 1.0):
+        """Espera (bloqueando el hilo) un slot y lo libera al salir."""
+        ready = threading.Event()
+        ticket = self.submit(lambda _: ready.set(), user_id=user_id, priority=priority, cost=cost)
+        try:
+            ready.wait()
+            yield
+        finally:
+            self.finish(ticket)
+
+    @asynccontextmanager
+    async def slot_async(self, *, user_id: str, priority: str = ROUTINE, cost: float = 1.0):
+        """Como `slot`, sin bloquear el event loop mientras espera."""
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def grant(_: SchedulerTicket) -> None:
+            loop.call_soon_threadsafe(lambda: ready.done() or ready.set_result(None))
+
+        ticket = self.submit(grant, user_id=user_id, priority=priority, cost=cost)
+        try:
+            await ready
+            yield
+        finally:
+            self.finish(ticket)
+
+    def __next(self) -> Optional[SchedulerTicket]:
+        while self._busy < self._slots and self._classes:
+            priority = self._classes.pop()
+            ticket = self._users[priority].pop()
+            if ticket.state != SchedulerTicket.WAITING:
+                continue
+            ticket.state = SchedulerTicket.GRANTED
+            self._busy += 1
+            self._waiting -= 1
+            INFERENCE_SCHEDULER_WAITING.labels(priority).dec()
+            return ticket
+        return None
+
+    def __granted(self, ticket: SchedulerTicket) -> None:
+        INFERENCE_SCHEDULER_WAIT.labels(ticket.priority).observe(time.perf_counter() - ticket.enqueued_at)
+        try:
+            ticket.grant(ticket)
+        except Exception as e:
+            log.error(f"Could not start scheduled inference for user {ticket.user_id}: {e}")
+            self.finish(ticket)
+
+
+_scheduler: Optional[InferenceScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_inference_scheduler() -> InferenceScheduler:
+    """Scheduler de inferencias del proceso."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = InferenceScheduler(
+                    slots=settings.INFERENCE_SLOTS,
+                    weights={URGENT: settings.INFERENCE_URGENT_WEIGHT, ROUTINE: 1.0}
+                )
+    return _scheduler
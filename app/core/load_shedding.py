@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Sequence, Tuple
+
+from loguru import logger as log
+
+from .config import settings
+from .inference_scheduler import get_inference_scheduler
+from .metrics import DEGRADATION_CHANGES, DEGRADATION_LEVEL
+
+# Niveles del pipeline de diagnóstico, del más completo al más barato.
+FULL = "full"  # SHAP exacto de todos los modelos
+APPROXIMATE = "approximate"  # SHAP aproximado (Saabas) de los modelos de árboles
+NO_EXPLANATIONS = "none"  # Solo el veredicto
+REDUCED = "reduced"  # Sin explicaciones ni el modelo Keras
+DEGRADATION_LEVELS = (FULL, APPROXIMATE, NO_EXPLANATIONS, REDUCED)
+
+# Con menos latencias en la ventana no se calcula el p95.
+_MIN_SAMPLES = 10
+
+
+class LoadShedder:
+    """
+    Elige el nivel del pipeline según la carga: con más de
+    `max_queue_depth` inferencias esperando slot o un p95 de latencia
+    mayor a `max_p95_seconds`, baja un nivel; cuando ambos quedan por
+    debajo de la mitad, sube uno. Cambia como mucho un nivel cada
+    `cooldown_seconds` y vacía la ventana de latencias en cada cambio,
+    para medir el nivel nuevo y no el anterior. Sin latencias suficientes
+    para el p95 no sube: solo la cola puede cambiar el nivel.
+    """
+
+    def __init__(
+        self,
+        levels: Sequence[str],
+        queue_depth: Callable[[], int],
+        max_queue_depth: int,
+        max_p95_seconds: float,
+        window_seconds: float,
+        cooldown_seconds: float
+    ):
+        unknown = [level for level in levels if level not in DEGRADATION_LEVELS]
+        if not levels or unknown:
+            raise ValueError(f"Invalid degradation levels: {', '.join(levels) or '(empty)'}")
+        self._levels = list(levels)
+        self._queue_depth = queue_depth
+        self._max_queue_depth = max_queue_depth
+        self._max_p95 = max_p95_seconds
+        self._window = window_seconds
+        self._cooldown = cooldown_seconds
+        self._index = 0
+        self._changed_at = float("-inf")
+        self._latencies: Deque[Tuple[float, float]] = deque(maxlen=4096)
+        self._lock = threading.Lock()
+        DEGRADATION_LEVEL.set(DEGRADATION_LEVELS.index(self._levels[0]))
+
+    def observe(self, seconds: float) -> None:
+        """Registra la latencia de una inferencia."""
+        with self._lock:
+            self._latencies.append((time.monotonic(), seconds))
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            return self.__p95(time.monotonic())
+
+    def level(self) -> str:
+        """Nivel a aplicar a la próxima inferencia; reevalúa la carga si pasó el cooldown."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._changed_at < self._cooldown:
+                return self._levels[self._index]
+            depth = self._queue_depth()
+            p95 = self.__p95(now)
+            overloaded = depth > self._max_queue_depth or (p95 is not None and p95 > self._max_p95)
+            relaxed = depth <= self._max_queue_depth / 2 and p95 is not None and p95 <= self._max_p95 / 2
+            if overloaded and self._index < len(self._levels) - 1:
+                self.__change(self._index + 1, now, depth, p95)
+            elif relaxed and self._index > 0:
+                self.__change(self._index - 1, now, depth, p95)
+            return self._levels[self._index]
+
+    def __p95(self, now: float) -> Optional[float]:
+        while self._latencies and self._latencies[0][0] < now - self._window:
+            self._latencies.popleft()
+        if len(self._latencies) < _MIN_SAMPLES:
+            return None
+        latencies = sorted(seconds for _, seconds in self._latencies)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    def __change(self, index: int, now: float, depth: int, p95: Optional[float]) -> None:
+        previous, level = self._levels[self._index], self._levels[index]
+        self._index = index
+        self._changed_at = now
+        self._latencies.clear()
+        DEGRADATION_LEVEL.set(DEGRADATION_LEVELS.index(level))
+        DEGRADATION_CHANGES.labels(level).inc()
+        p95_text = f"{p95:.2f}s" if p95 is not None else "n/a"
+        message = f"Diagnosis pipeline level {previous} -> {level} (queue depth {depth}, p95 {p95_text})"
+        if index > self._levels.index(previous):
+            log.warning(message)
+        else:
+            log.info(message)
+
+
+_shedder: Optional[LoadShedder] = None
+_shedder_lock = threading.Lock()
+
+
+def get_load_shedder() -> LoadShedder:
+    """Controlador de degradación del proceso; la cola que mide es la del scheduler de inferencias."""
+    global _shedder
+    if _shedder is None:
+        with _shedder_lock:
+            if _shedder is None:
+                levels = [level.strip() for level in settings.DEGRADATION_LEVELS.split(",") if level.strip()]
+                if not settings.DEGRADATION_ENABLED:
+                    levels = levels[:1]
+                scheduler = get_inference_scheduler()
+                _shedder = LoadShedder(
+                    levels=levels,
+                    queue_depth=lambda: scheduler.waiting,
+                    max_queue_depth=settings.DEGRADATION_MAX_QUEUE_DEPTH,
+                    max_p95_seconds=settings.DEGRADATION_MAX_P95_SECONDS,
+                    window_seconds=settings.DEGRADATION_WINDOW_SECONDS,
+                    cooldown_seconds=settings.DEGRADATION_COOLDOWN_SECONDS
+                )
+    return _shedder
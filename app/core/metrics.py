@@ -0,0 +1,194 @@
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Métricas de la aplicación en formato Prometheus, expuestas en `/metrics`.
+# Con varios workers de uvicorn cada proceso tiene sus propios valores.
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duración de cada sentencia SQL",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "Sentencias SQL que superaron DB_SLOW_QUERY_MS",
+)
+DB_REQUEST_QUERIES = Histogram(
+    "db_queries_per_request",
+    "Cantidad de sentencias SQL por request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+DB_REQUEST_TIME = Histogram(
+    "db_time_per_request_seconds",
+    "Tiempo total en la base de datos por request",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_N_PLUS_ONE = Counter(
+    "db_n_plus_one_total",
+    "Sentencias repetidas dentro de un request (posible N+1)",
+    ["method", "route"],
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Tiempo de espera para obtener una conexión del pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts que agotaron DB_POOL_TIMEOUT",
+    ["pool"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Conexiones en uso",
+    ["pool"],
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Conexiones abiertas por encima de pool_size (negativo: conexiones aún no creadas)",
+    ["pool"],
+)
+DB_POOL_INVALIDATIONS = Counter(
+    "db_pool_invalidations_total",
+    "Conexiones invalidadas (desconexiones, errores, pre-ping fallido)",
+    ["pool"],
+)
+DB_READ_ROUTING = Counter(
+    "db_read_routing_total",
+    "Lecturas de sesiones de solo lectura según el destino (replica o primary)",
+    ["target"],
+)
+DB_REPLICA_FAILURES = Counter(
+    "db_replica_failures_total",
+    "Veces que una réplica de lectura quedó fuera por errores de conexión",
+    ["replica"],
+)
+AUTH_PRINCIPAL_CACHE = Counter(
+    "auth_principal_cache_total",
+    "Búsquedas en la caché de principals autenticados (hit o miss)",
+    ["result"],
+)
+AUTH_PASSWORD_HASH_WAIT = Histogram(
+    "auth_password_hash_wait_seconds",
+    "Tiempo en cola hasta que el executor de hashing toma la operación",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+AUTH_PASSWORD_HASH_DURATION = Histogram(
+    "auth_password_hash_duration_seconds",
+    "Duración de cada hash o verificación Argon2",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+AUTH_PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "auth_password_hash_in_flight",
+    "Hashes o verificaciones Argon2 en ejecución",
+)
+AUTH_LOGIN_DURATION = Histogram(
+    "auth_login_duration_seconds",
+    "Duración de POST /api/v1/auth/login (consulta, verificación Argon2 y token)",
+    ["result"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+USER_IMPORT_PHASE_DURATION = Histogram(
+    "user_import_phase_duration_seconds",
+    "Duración de cada fase del import masivo de usuarios",
+    ["phase"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+USER_IMPORT_ROWS = Counter(
+    "user_import_rows_total",
+    "Filas procesadas por el import masivo de usuarios (created o error)",
+    ["status"],
+)
+
+DIAGNOSIS_BATCH_INFERENCE_DURATION = Histogram(
+    "diagnosis_batch_inference_seconds",
+    "Duración de la inferencia (modelos y SHAP) de un lote de diagnósticos",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+DIAGNOSIS_BATCH_STUDIES = Counter(
+    "diagnosis_batch_studies_total",
+    "Estudios procesados por el diagnóstico en lote (completed o error)",
+    ["status"],
+)
+
+DIAGNOSIS_JOBS = Counter(
+    "diagnosis_jobs_total",
+    "Trabajos de diagnóstico en segundo plano según su resultado (succeeded, failed, cancelled o rejected)",
+    ["status"],
+)
+DIAGNOSIS_JOB_QUEUE_WAIT = Histogram(
+    "diagnosis_job_queue_wait_seconds",
+    "Tiempo en cola hasta que un worker toma el trabajo de diagnóstico, por prioridad",
+    ["priority"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+DIAGNOSIS_JOB_DURATION = Histogram(
+    "diagnosis_job_duration_seconds",
+    "Duración de un trabajo de diagnóstico (archivo, inferencia, SHAP y escrituras)",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+DIAGNOSIS_JOBS_IN_FLIGHT = Gauge(
+    "diagnosis_jobs_in_flight",
+    "Trabajos de diagnóstico en cola o en ejecución",
+    ["state"],
+)
+DIAGNOSIS_JOB_LEASES_EXPIRED = Counter(
+    "diagnosis_job_leases_expired_total",
+    "Trabajos de la cola durable cuyo worker dejó de renovar el lease (requeued o failed)",
+    ["outcome"],
+)
+INFERENCE_SCHEDULER_WAIT = Histogram(
+    "inference_scheduler_wait_seconds",
+    "Espera por un slot de inferencia en el scheduler, por prioridad",
+    ["priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+INFERENCE_SCHEDULER_WAITING = Gauge(
+    "inference_scheduler_waiting",
+    "Inferencias esperando un slot, por prioridad",
+    ["priority"],
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rechazados con 429 por el límite de su usuario",
+    ["bucket"],
+)
+DEGRADATION_LEVEL = Gauge(
+    "diagnosis_degradation_level",
+    "Nivel de degradación del pipeline de diagnóstico (0 = completo)",
+)
+MODEL_REGISTRY_LOADS = Counter(
+    "model_registry_loads_total",
+    "Versiones alternativas de modelos cargadas desde disco",
+    ["version"],
+)
+DEGRADATION_CHANGES = Counter(
+    "diagnosis_degradation_changes_total",
+    "Cambios de nivel de degradación del pipeline, por nivel alcanzado",
+    ["level"],
+)
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests con Idempotency-Key según el resultado (new, replayed, in_progress o mismatch)",
+    ["scope", "outcome"],
+)
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total",
+    "Llamadas coalescidas: leader ejecuta, shared espera el resultado de otra en curso",
+    ["name", "role"],
+)
+DB_TRANSIENT_RETRIES = Counter(
+    "db_transient_retries_total",
+    "Reintentos por errores transitorios de la base de datos (deadlock, conexión perdida, etc.)",
+    ["operation"],
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Serializa todas las métricas registradas y su content-type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
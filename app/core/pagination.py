@@ -0,0 +1,89 @@
+import base64
+import binascii
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import and_, or_
+
+# Cabecera en la que los endpoints de listado devuelven el cursor de la
+# página siguiente. Ausente cuando no hay más resultados.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+MAX_PAGE_SIZE = 500
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    """Una página de resultados y el cursor opaco para pedir la siguiente."""
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    """Codifica la posición `(created_at, id)` de la última fila como cursor opaco."""
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+
+    Raises:
+        ValueError: si el cursor está mal formado.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def keyset_criteria(created_column, id_column, cursor: Optional[str]) -> List[Any]:
+    """
+    Condiciones para seguir después de la posición del cursor en un orden
+    `(created_at DESC, id DESC)`. Vacío si no hay cursor.
+
+    Raises:
+        ValueError: si el cursor está mal formado.
+    """
+    if not cursor:
+        return []
+    created_at, last_id = decode_cursor(cursor)
+    # `created_at <= x` acota el rango del índice; el OR desempata por id.
+    return [
+        created_column <= created_at,
+        or_(created_column < created_at, and_(created_column == created_at, id_column < last_id)),
+    ]
+
+
+def build_page(rows: List[Any], limit: int) -> Page[Any]:
+    """Arma la página a partir de `limit + 1` filas ordenadas."""
+    if len(rows) <= limit:
+        return Page(items=list(rows))
+    items = list(rows[:limit])
+    last = items[-1]
+    return Page(items=items, next_cursor=encode_cursor(last.created_at, last.id))
+
+
+def keyset_page(query, created_column, id_column, *, cursor: Optional[str], limit: int) -> Page[Any]:
+    """
+    Pagina `query` por `(created_at DESC, id DESC)` sin OFFSET: la página
+    siguiente arranca después de la última fila devuelta, así que el costo
+    no crece con la profundidad. Requiere un índice compuesto sobre
+    `(created_at, id)`.
+
+    Raises:
+        ValueError: si el cursor está mal formado.
+    """
+    rows = (
+        query.filter(*keyset_criteria(created_column, id_column, cursor))
+        .order_by(created_column.desc(), id_column.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    return build_page(rows, limit)
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from .config import settings
+from .metrics import AUTH_PRINCIPAL_CACHE
+
+
+class PrincipalCache:
+    """
+    Caché en memoria de principals autenticados, por token (`jti`) con un
+    TTL corto (`PRINCIPAL_CACHE_TTL_SECONDS`). Mientras la entrada vive, las
+    rutas autenticadas no consultan la base. Al modificar, eliminar o
+    cambiar la contraseña o roles de un usuario se descartan todas sus
+    entradas (`invalidate_user`). Es por proceso: en los demás workers el
+    cambio se ve al vencer el TTL.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = settings.PRINCIPAL_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.PRINCIPAL_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                AUTH_PRINCIPAL_CACHE.labels("miss").inc()
+                return None
+            self._entries.move_to_end(key)
+        AUTH_PRINCIPAL_CACHE.labels("hit").inc()
+        return entry[1]
+
+    def put(self, key: str, principal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        user_id = str(principal.id)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id) -> None:
+        """Descarta las entradas de todos los tokens del usuario."""
+        with self._lock:
+            for key in list(self._keys_by_user.get(str(user_id), ())):
+                self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = str(entry[1].id)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from .config import settings
+from .metrics import RATE_LIMIT_REJECTIONS
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket por clave (usuario): `burst` tokens como máximo, que se
+    reponen a `rate` por segundo. Cada request gasta `cost` tokens; sin
+    tokens suficientes se rechaza e indica cuánto esperar. Guarda hasta
+    `max_keys` claves (las menos usadas se descartan: vuelven con el bucket
+    lleno). Es por proceso, como `PrincipalCache`.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """Gasta `cost` tokens de `key`. Devuelve 0 si pudo, o los segundos hasta que alcancen."""
+        # Un costo mayor que el bucket nunca pasaría: se cobra el bucket entero.
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / self.rate if self.rate > 0 else float("inf")
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Límites por endpoint costoso: (tokens por minuto, ráfaga)
+def _bucket_settings() -> Dict[str, Tuple[float, float]]:
+    return {
+        "diagnose": (settings.RATE_LIMIT_DIAGNOSE_PER_MINUTE, settings.RATE_LIMIT_DIAGNOSE_BURST),
+        "model_test": (settings.RATE_LIMIT_MODEL_TEST_PER_MINUTE, settings.RATE_LIMIT_MODEL_TEST_BURST),
+    }
+
+
+_limiters: Dict[str, TokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(bucket: str) -> TokenBucketLimiter:
+    limiter = _limiters.get(bucket)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(bucket)
+            if limiter is None:
+                per_minute, burst = _bucket_settings()[bucket]
+                limiter = TokenBucketLimiter(
+                    rate=per_minute / 60.0, burst=burst, max_keys=settings.RATE_LIMIT_MAX_KEYS
+                )
+                _limiters[bucket] = limiter
+    return limiter
+
+
+def enforce_rate_limit(bucket: str, user_id: Optional[str], cost: float = 1.0) -> None:
+    """
+    Cobra `cost` tokens del límite `bucket` al usuario; sin tokens lanza
+    429 con `Retry-After`. Sin usuario (rutas sin autenticación) no limita.
+    """
+    if not settings.RATE_LIMIT_ENABLED or user_id is None:
+        return
+    wait = get_rate_limiter(bucket).acquire(str(user_id), cost)
+    if wait > 0:
+        RATE_LIMIT_REJECTIONS.labels(bucket).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded for {bucket}, try again later",
+            headers={"Retry-After": str(max(1, int(min(wait, 3600) + 0.999)))}
+        )
@@ -0,0 +1,72 @@
+import json
+import threading
+from typing import Any, Dict, Optional
+
+import msgpack
+import zstandard
+from loguru import logger as log
+
+from .encryption import decrypt_bytes, decrypt_data, encrypt_bytes
+
+# Formato v2 de `medical_studies.ml_results`:
+#   "mr2$" + Fernet( FORMAT_MSGPACK_ZSTD + zstd(msgpack(resultado)) )
+# Las filas anteriores contienen Fernet(json) o JSON en claro y se siguen
+# leyendo de forma transparente.
+RESULTS_PREFIX_V2 = "mr2$"
+FORMAT_MSGPACK_ZSTD = b"\x01"
+
+_ZSTD_LEVEL = 9
+
+# Los (de)compresores de zstandard no son thread-safe: uno por hilo.
+_zstd = threading.local()
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    compressor = getattr(_zstd, "compressor", None)
+    if compressor is None:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+    return compressor
+
+
+def _decompressor() -> zstandard.ZstdDecompressor:
+    decompressor = getattr(_zstd, "decompressor", None)
+    if decompressor is None:
+        decompressor = _zstd.decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+def encode_results(results: Dict[str, Any]) -> str:
+    """Serializa, comprime y cifra el resultado del pipeline para almacenarlo."""
+    packed = msgpack.packb(results, use_bin_type=True)
+    payload = FORMAT_MSGPACK_ZSTD + _compressor().compress(packed)
+    return RESULTS_PREFIX_V2 + encrypt_bytes(payload)
+
+
+def decode_results(stored: Optional[str]) -> Optional[Any]:
+    """
+    Devuelve el resultado almacenado como objeto Python, sin importar si fue
+    guardado en formato v2 o en el formato JSON anterior.
+    """
+    if not stored:
+        return None
+
+    if stored.startswith(RESULTS_PREFIX_V2):
+        payload = decrypt_bytes(stored[len(RESULTS_PREFIX_V2):])
+        if payload[:1] != FORMAT_MSGPACK_ZSTD:
+            raise ValueError(f"Unknown ml_results payload format: {payload[:1]!r}")
+        return msgpack.unpackb(_decompressor().decompress(payload[1:]), raw=False)
+
+    text = decrypt_data(stored)
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        log.warning("ml_results is not valid JSON, returning it as text")
+        return text
+
+
+def results_to_text(stored: Optional[str]) -> Optional[str]:
+    """Devuelve el resultado almacenado como texto JSON (formato de la API)."""
+    results = decode_results(stored)
+    if results is None or isinstance(results, str):
+        return results
+    return json.dumps(results)
@@ -2,11 +2,17 @@ from click import DateTime
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
 import os
+import threading
+import time
+import uuid
 from dotenv import load_dotenv
 from loguru import logger as log
 from .config import settings
+from .metrics import AUTH_PASSWORD_HASH_DURATION, AUTH_PASSWORD_HASH_IN_FLIGHT, AUTH_PASSWORD_HASH_WAIT
 
 load_dotenv()
 
@@ -22,42 +28,89 @@ pwd_context = CryptContext(
     deprecated="auto"
 )
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica si una contraseña coincide con su versión hasheada"""
-    try:      
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def get_hash_executor() -> ThreadPoolExecutor:
+    """
+    Executor dedicado a Argon2, con `PASSWORD_HASH_MAX_CONCURRENCY` hilos:
+    cada hash reserva 64 MiB, así que el pico de memoria queda acotado a
+    N x 64 MiB. El resto de las operaciones espera en su cola.
+    """
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                _hash_executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.PASSWORD_HASH_MAX_CONCURRENCY),
+                    thread_name_prefix="password-hash"
+                )
+    return _hash_executor
+
+
+def _submit(operation: str, fn: Callable, *args) -> Future:
+    queued_at = time.perf_counter()
+
+    def run():
+        started_at = time.perf_counter()
+        AUTH_PASSWORD_HASH_WAIT.labels(operation).observe(started_at - queued_at)
+        AUTH_PASSWORD_HASH_IN_FLIGHT.inc()
+        try:
+            return fn(*args)
+        finally:
+            AUTH_PASSWORD_HASH_IN_FLIGHT.dec()
+            AUTH_PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - started_at)
+
+    return get_hash_executor().submit(run)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    try:
         if not hashed_password.startswith('$argon2'):
             raise ValueError("Unknown hash format, expected Argon2 hash.")
-            return False
-        result = pwd_context.verify(plain_password, hashed_password)
-        log.info(f"Verification result: {result}")
-        if not result:
-            try:
-                new_hash = pwd_context.hash(plain_password)                
-                stored_params = hashed_password.split('$')[3] if len(hashed_password.split('$')) > 3 else "unknown"
-                new_params = new_hash.split('$')[3] if len(new_hash.split('$')) > 3 else "unknown"                
-                if stored_params != new_params:
-                    log.warning("Hash parameters differ, consider rehashing the password.")
-
-            except Exception as debug_e:
-                log.error(f"Error during rehashing attempt: {debug_e}")
-        return result
-        
+        return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
         log.error(f"Error in verify_password: {e}")
         return False
 
-def get_password_hash(password: str) -> str:
-    """Genera un hash seguro de la contraseña"""
+
+def _hash(password: str) -> str:
     try:
-        hash_result = pwd_context.hash(password)
-        return hash_result
+        return pwd_context.hash(password)
     except Exception as e:
         log.error(f"Error generating hash: {e}")
         raise
 
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hashea en el hilo actual, sin el executor. Lo usan los procesos del
+    import masivo de usuarios, que ya limitan la concurrencia.
+    """
+    return [_hash(password) for password in passwords]
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica si una contraseña coincide con su versión hasheada (en el executor de hashing)"""
+    return _submit("verify", _verify, plain_password, hashed_password).result()
+
+def get_password_hash(password: str) -> str:
+    """Genera un hash seguro de la contraseña (en el executor de hashing)"""
+    return _submit("hash", _hash, password).result()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Como `verify_password`, sin bloquear el event loop ni ocupar el threadpool"""
+    return await asyncio.wrap_future(_submit("verify", _verify, plain_password, hashed_password))
+
+async def get_password_hash_async(password: str) -> str:
+    """Como `get_password_hash`, sin bloquear el event loop ni ocupar el threadpool"""
+    return await asyncio.wrap_future(_submit("hash", _hash, password))
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Crea un token JWT de acceso"""
+    """Crea un token JWT de acceso con un `jti` único (clave de la caché de principals)"""
     to_encode = data.copy()
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -111,6 +164,10 @@ def emergency_password_reset(email: str, new_password: str):
             )
             conn.commit()
 
+        # SQL directo: no pasa por los eventos del ORM que invalidan la caché.
+        from app.core.principal_cache import principal_cache
+        principal_cache.clear()
+
         return True
         
     except Exception as e:
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from .metrics import SINGLE_FLIGHT_CALLS
+
+
+class SingleFlight:
+    """
+    Coalesce llamadas concurrentes con la misma clave: la primera ejecuta
+    `fn` y las que llegan mientras corre esperan su resultado (o su
+    excepción) en lugar de repetir el trabajo. La llamada corre en su
+    propia tarea, así que un cliente que se desconecta no la cancela para
+    los demás. Es por proceso y por event loop: entre procesos hace falta
+    otra barrera (p. ej. un UPDATE condicionado).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            SINGLE_FLIGHT_CALLS.labels(self.name, "leader").inc()
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            SINGLE_FLIGHT_CALLS.labels(self.name, "shared").inc()
+        return await asyncio.shield(call)
+
+    def _forget(self, key: str, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            # Marca la excepción como recuperada aunque nadie siga esperando.
+            call.exception()
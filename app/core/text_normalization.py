@@ -0,0 +1,22 @@
+import re
+import unicodedata
+from typing import List, Optional
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(value: Optional[str]) -> str:
+    """
+    Normaliza un nombre para búsqueda: sin acentos, en minúsculas y solo con
+    letras, dígitos y espacios simples. "  José-María Núñez " -> "jose maria nunez".
+    """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", stripped.casefold()).strip()
+
+
+def name_tokens(value: Optional[str]) -> List[str]:
+    """Palabras del nombre normalizado, sin repetir y en orden de aparición."""
+    return list(dict.fromkeys(normalize_name(value).split()))
@@ -0,0 +1,112 @@
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# `session.info`: hubo escrituras (flush o DML) desde el último commit.
+WROTE_KEY = "unit_of_work_wrote"
+# `session.info`: callbacks a ejecutar cuando la transacción se confirme.
+AFTER_COMMIT_KEY = "unit_of_work_after_commit"
+
+
+def has_writes(session: Session) -> bool:
+    """Si la sesión tiene cambios pendientes o ya enviados sin confirmar."""
+    return bool(session.info.get(WROTE_KEY) or session.new or session.dirty or session.deleted)
+
+
+def after_commit(session: Session, callback: Callable[[], None]) -> None:
+    """
+    Ejecuta `callback` cuando la transacción actual se confirme (se descarta
+    si se revierte). Sirve para invalidar cachés de proceso solo con datos
+    ya visibles para los demás requests.
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+class UnitOfWork:
+    """
+    Una transacción por request u operación de servicio. Los repositorios
+    solo hacen `flush` (envían los cambios y obtienen ids); la unidad de
+    trabajo confirma una sola vez al salir sin errores, y revierte todo si
+    hubo una excepción. Sin escrituras no hay COMMIT.
+
+        with UnitOfWork(BackgroundSessionLocal) as db:
+            ...
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._session_factory = session_factory
+        self.session: Optional[Session] = None
+
+    def __enter__(self) -> Session:
+        self.session = self._session_factory()
+        return self.session
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.session.rollback()
+        finally:
+            self.session.close()
+
+    def commit(self) -> None:
+        if has_writes(self.session):
+            self.session.commit()
+
+
+class AsyncUnitOfWork:
+    """`UnitOfWork` para sesiones asíncronas."""
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self._session_factory = session_factory
+        self.session: Optional[AsyncSession] = None
+
+    async def __aenter__(self) -> AsyncSession:
+        self.session = self._session_factory()
+        return self.session
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                await self.commit()
+            else:
+                await self.session.rollback()
+        finally:
+            await self.session.close()
+
+    async def commit(self) -> None:
+        if has_writes(self.session.sync_session):
+            await self.session.commit()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_execute(orm_execute_state):
+    # UPDATE/DELETE masivos y SQL textual no pasan por el flush.
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session):
+    # También se emite al liberar un SAVEPOINT (`begin_nested`): la
+    # transacción externa sigue abierta y sin confirmar.
+    if session.in_nested_transaction():
+        return
+    session.info.pop(WROTE_KEY, None)
+    for callback in session.info.pop(AFTER_COMMIT_KEY, ()):
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_commit(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(WROTE_KEY, None)
+        session.info.pop(AFTER_COMMIT_KEY, None)
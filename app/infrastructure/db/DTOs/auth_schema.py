@@ -10,6 +10,18 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
 
+class Principal(BaseModel):
+    """
+    Identidad autenticada (id, email y roles) tomada del token. Es lo que
+    necesitan las rutas que solo verifican sesión y roles.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    id: UUID
+    email: str
+    roles: List[UUID] = Field(default_factory=list, description="IDs de los roles del usuario")
+    jti: Optional[str] = Field(default=None, description="ID del token")
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -0,0 +1,17 @@
+from pydantic import Field
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+from .base_dto import BaseDTO
+from .medical_study_dto import MedicalStudyResponseDTO
+
+class DiagnosisJobDTO(BaseDTO):
+    id: UUID
+    study_id: UUID
+    status: str = Field(..., description="queued | running | succeeded | failed | cancelled")
+    attempts: int = Field(0, description="Intentos de guardar el diagnóstico (errores transitorios de la base)")
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    study: Optional[MedicalStudyResponseDTO] = Field(None, description="El estudio diagnosticado, cuando status es succeeded")
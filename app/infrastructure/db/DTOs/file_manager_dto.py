@@ -12,6 +12,9 @@ class FileStorageBaseDTO(BaseDTO):
     file_size: Optional[int] = Field(None, description="El tamaño del archivo en bytes")
     description: Optional[str] = Field(None, description="Descripción opcional")
     user_id: Optional[UUID] = Field(None, description="ID del usuario que subió el archivo")
+    file_path: Optional[str] = Field(None, description="Ruta del archivo en disco")
+    content_hash: Optional[str] = Field(None, description="SHA-256 del contenido original")
+    storage_codec: str = Field("raw", description="Codec de almacenamiento en disco")
 
 class FileStorageResponseDTO(FileStorageBaseDTO):
     id: UUID = Field(..., description="El identificador único del archivo")
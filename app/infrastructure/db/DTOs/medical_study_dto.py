@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from uuid import UUID
 from .user_dto import DoctorInfoDTO, PatientInfoDTO
@@ -13,6 +13,7 @@ class MedicalStudyCreateDTO(BaseDTO):
     patient_id: UUID = Field(..., description="ID del paciente")
     technician_id: Optional[UUID] = Field(None, description="ID del técnico")
     clinical_data: Optional[str] = Field(None, description="Datos clínicos iniciales")
+    priority: Literal["urgent", "routine"] = Field("routine", description="Prioridad del diagnóstico")
 
 class MedicalStudyUpdateDTO(BaseDTO):
     access_code: Optional[str] = None
@@ -21,6 +22,7 @@ class MedicalStudyUpdateDTO(BaseDTO):
     technician_id: Optional[UUID] = None
     clinical_data: Optional[str] = None
     status: Optional[str] = None
+    priority: Optional[Literal["urgent", "routine"]] = None
     ml_results: Optional[str] = None
     csv_file_id: Optional[UUID] = None
 
@@ -30,6 +32,7 @@ class MedicalStudyResponseDTO(BaseDTO):
     id: UUID
     access_code: str
     status: str
+    priority: str = "routine"
     creation_date: Optional[datetime] = None  
     ml_results: Optional[str] = None
     clinical_data: Optional[str] = None
@@ -37,4 +40,16 @@ class MedicalStudyResponseDTO(BaseDTO):
 
     patient: PatientInfoDTO
     doctor: Optional[DoctorInfoDTO] = None
-    technician: Optional[TechnicianInfoDTO] = None
\ No newline at end of file
+    technician: Optional[TechnicianInfoDTO] = None
+class StudyDiagnosisResultDTO(BaseDTO):
+    study_id: Optional[UUID] = Field(None, description="None si el nombre del archivo no es un ID válido")
+    filename: str
+    status: str = Field(..., description="completed | error")
+    error: Optional[str] = None
+    study: Optional[MedicalStudyResponseDTO] = None
+
+class BatchDiagnosisReportDTO(BaseDTO):
+    total: int
+    completed: int
+    failed: int
+    results: List[StudyDiagnosisResultDTO]
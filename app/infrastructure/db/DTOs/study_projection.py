@@ -0,0 +1,81 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Nombre en la API -> atributo del modelo MedicalStudy
+STUDY_COLUMNS = {
+    "id": "id",
+    "access_code": "access_code",
+    "status": "status",
+    "priority": "priority",
+    "creation_date": "created_at",
+    "clinical_data": "clinical_data",
+    "ml_results": "ml_results",
+    "csv_file_id": "csv_file_id",
+}
+STUDY_RELATIONS = ("patient", "doctor", "technician")
+PERSON_FIELDS = ("id", "name", "last_name", "dni", "email")
+
+SUMMARY_FIELDS = "id,access_code,status,creation_date,csv_file_id"
+
+
+@dataclass
+class StudyProjection:
+    """
+    Conjunto de campos pedidos por el cliente (`fields=id,status,patient.name`).
+    Determina qué columnas se cargan, qué relaciones se unen y si hace falta
+    descifrar `ml_results`.
+    """
+    columns: List[str] = field(default_factory=list)
+    relations: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def include_ml_results(self) -> bool:
+        return "ml_results" in self.columns
+
+    @classmethod
+    def parse(cls, fields: str) -> "StudyProjection":
+        """
+        Interpreta la lista de campos separados por coma. Un nombre de relación
+        sin subcampo (`patient`) incluye todos sus campos.
+
+        Raises:
+            ValueError: si algún campo no existe.
+        """
+        projection = cls()
+        for raw in fields.split(","):
+            name = raw.strip()
+            if not name:
+                continue
+            if "." in name:
+                relation, sub = name.split(".", 1)
+                if relation not in STUDY_RELATIONS or sub not in PERSON_FIELDS:
+                    raise ValueError(f"Unknown field: {name}")
+                selected = projection.relations.setdefault(relation, [])
+                if sub not in selected:
+                    selected.append(sub)
+            elif name in STUDY_RELATIONS:
+                projection.relations[name] = list(PERSON_FIELDS)
+            elif name in STUDY_COLUMNS:
+                if name not in projection.columns:
+                    projection.columns.append(name)
+            else:
+                raise ValueError(f"Unknown field: {name}")
+
+        if not projection.columns and not projection.relations:
+            raise ValueError("At least one field is required")
+        return projection
+
+    def to_dict(self, study: Any, ml_results: Optional[str] = None) -> Dict[str, Any]:
+        """Serializa un estudio con solo los campos pedidos."""
+        data: Dict[str, Any] = {}
+        for name in self.columns:
+            if name == "ml_results":
+                data[name] = ml_results
+            else:
+                data[name] = getattr(study, STUDY_COLUMNS[name])
+        for relation, sub_fields in self.relations.items():
+            person = getattr(study, relation)
+            data[relation] = (
+                {sub: getattr(person, sub) for sub in sub_fields} if person is not None else None
+            )
+        return data
@@ -0,0 +1,9 @@
+from pydantic import Field
+from typing import Optional
+from .base_dto import BaseDTO
+
+class StudyResultStatsDTO(BaseDTO):
+    is_positive: bool = Field(..., description="Resultado binario del ensamble")
+    classification_level: int = Field(..., description="Nivel de clasificación asignado")
+    count: int = Field(..., description="Cantidad de estudios")
+    avg_binary_confidence: Optional[float] = Field(None, description="Confianza binaria promedio")
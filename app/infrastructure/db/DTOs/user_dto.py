@@ -36,6 +36,24 @@ class UserCreateDTO(UserBaseDTO):
             raise ValueError('La contraseña debe tener al menos 8 caracteres')
         return v
 
+class UserImportRowDTO(UserCreateDTO):
+    """Fila de un import masivo: como `UserCreateDTO`, con el rol común a todo el archivo."""
+    role_id: Optional[UUID] = Field(None, description="Se ignora: el rol se indica para todo el import")
+
+class UserImportRowResultDTO(BaseDTO):
+    row: int = Field(..., description="Número de registro en el archivo (desde 1)")
+    email: Optional[str] = None
+    status: str = Field(..., description="created | error")
+    user_id: Optional[UUID] = None
+    errors: List[str] = Field(default_factory=list)
+
+class UserImportReportDTO(BaseDTO):
+    role_id: UUID
+    total: int
+    created: int
+    failed: int
+    rows: List[UserImportRowResultDTO]
+
 class UserUpdateDTO(BaseDTO):
     email: Optional[EmailStr] = Field(None)
     password: Optional[str] = Field(None, min_length=8, max_length=100)
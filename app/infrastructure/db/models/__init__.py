@@ -3,4 +3,7 @@ from .user import User
 from .user_role import UserRole
 from .role import Role
 from .file_manager import FileStorage
+from .study_result import StudyResult
+from .diagnosis_job import DiagnosisJobRecord
+from .idempotency_key import IdempotencyKey
 from .base_model import Base
\ No newline at end of file
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, String, Text, DateTime, Index
+from sqlalchemy.dialects.mysql import CHAR, MEDIUMBLOB
+from .base_model import BaseModel
+
+# Estados de un trabajo de diagnóstico (también los de la cola en proceso).
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class DiagnosisJobRecord(BaseModel):
+    __tablename__ = "diagnosis_jobs"
+    """
+    Cola durable de diagnósticos (`DIAGNOSIS_JOB_BACKEND=database`). Los
+    workers toman trabajos con `SELECT ... FOR UPDATE SKIP LOCKED` y los
+    retienen con un lease que renuevan mientras corren; un lease vencido
+    significa que el worker murió y el trabajo vuelve a la cola.
+    """
+
+    study_id = Column(CHAR(36), ForeignKey("medical_studies.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(CHAR(36), ForeignKey("users.id"), nullable=False)
+    status = Column(String(20), nullable=False, default=QUEUED)
+    # Posición en PRIORITY_CLASSES (0 = urgent): el claim toma primero los más urgentes.
+    priority = Column(Integer, nullable=False, default=1, server_default="1")
+    filename = Column(String(255), nullable=False)
+    # El CSV enviado; se borra al terminar.
+    payload = Column(LargeBinary().with_variant(MEDIUMBLOB(), "mysql"), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    available_at = Column(DateTime(timezone=True), nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Claim: WHERE status = 'queued' AND available_at <= ? ORDER BY priority, available_at
+        Index("ix_diagnosis_jobs_status_priority_available", "status", "priority", "available_at"),
+        # Leases vencidos: WHERE status = 'running' AND lease_expires_at < ?
+        Index("ix_diagnosis_jobs_status_lease", "status", "lease_expires_at"),
+        # Limpieza de trabajos terminados
+        Index("ix_diagnosis_jobs_finished_at", "finished_at"),
+    )
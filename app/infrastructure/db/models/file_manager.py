@@ -12,5 +12,7 @@ class FileStorage(BaseModel):
     file_size = Column(Integer)
     file_content_binary = Column(LargeBinary, nullable=True)
     file_path = Column(String(512), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    storage_codec = Column(String(20), nullable=False, default="raw", server_default="raw")
     description = Column(Text)
     user_id = Column(CHAR(36, collation='ascii_bin'), default=lambda: str(uuid.uuid4())) 
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, UniqueConstraint
+from sqlalchemy.dialects.mysql import CHAR, MEDIUMTEXT
+from .base_model import BaseModel
+
+class IdempotencyKey(BaseModel):
+    __tablename__ = "idempotency_keys"
+    """
+    Respuestas guardadas por `Idempotency-Key`. Mientras el request corre,
+    `status_code` es NULL y `expires_at` es el fin de la reserva; al
+    terminar guarda la respuesta y `expires_at` pasa a ser su vencimiento.
+    """
+
+    scope = Column(String(50), nullable=False)
+    key = Column(String(255), nullable=False)
+    # sha256 del request (estudio, usuario y CSV): la misma clave con otro request es un error.
+    fingerprint = Column(CHAR(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text().with_variant(MEDIUMTEXT(), "mysql"), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+        # Limpieza de claves vencidas
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
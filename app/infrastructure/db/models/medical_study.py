@@ -1,5 +1,5 @@
 import uuid  # ← AÑADIR ESTO
-from sqlalchemy import Column, String, ForeignKey, Text, CHAR
+from sqlalchemy import Column, String, ForeignKey, Text, CHAR, Index
 from sqlalchemy.dialects.mysql import CHAR
 from .base_model import BaseModel
 from sqlalchemy.orm import relationship
@@ -11,6 +11,8 @@ class MedicalStudy(BaseModel):
     clinical_data = Column(Text, nullable=True)
     ml_results = Column(Text, nullable=True)
     status = Column(String(50), default="PENDING")
+    # Clase de prioridad del diagnóstico: "urgent" | "routine"
+    priority = Column(String(20), nullable=False, default="routine", server_default="routine")
 
     doctor_id = Column(CHAR(36), ForeignKey("users.id"))
     patient_id = Column(CHAR(36), ForeignKey("users.id"))
@@ -20,4 +22,10 @@ class MedicalStudy(BaseModel):
     doctor = relationship("User", foreign_keys=[doctor_id])
     patient = relationship("User", foreign_keys=[patient_id])
     technician = relationship("User", foreign_keys=[technician_id])
-    csv_file = relationship("FileStorage", foreign_keys=[csv_file_id])
\ No newline at end of file
+    csv_file = relationship("FileStorage", foreign_keys=[csv_file_id])
+    result = relationship("StudyResult", uselist=False, passive_deletes=True)
+
+    # Paginación por cursor: ORDER BY created_at DESC, id DESC
+    __table_args__ = (
+        Index("ix_medical_studies_created_at_id", "created_at", "id"),
+    )
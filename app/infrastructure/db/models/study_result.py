@@ -0,0 +1,33 @@
+from sqlalchemy import Column, ForeignKey, Boolean, Integer, SmallInteger, Float, String, DateTime, Index
+from sqlalchemy.dialects.mysql import CHAR
+from .base_model import BaseModel
+
+class StudyResult(BaseModel):
+    __tablename__ = "study_results"
+    """
+    Resultado estructurado (sin datos identificatorios) de un diagnóstico.
+    Duplica los campos consultables de `medical_studies.ml_results` para que
+    los filtros y agregados usen índices en lugar de descifrar cada estudio.
+    """
+
+    study_id = Column(CHAR(36), ForeignKey("medical_studies.id", ondelete="CASCADE"), nullable=False, unique=True)
+
+    is_positive = Column(Boolean, nullable=False)
+    classification_level = Column(Integer, nullable=False, default=0)
+    binary_confidence = Column(Float, nullable=True)
+    classification_confidence = Column(Float, nullable=True)
+
+    binary_vote_rf = Column(SmallInteger, nullable=True)
+    binary_vote_xgb = Column(SmallInteger, nullable=True)
+    binary_vote_keras = Column(SmallInteger, nullable=True)
+    class_vote_rf = Column(SmallInteger, nullable=True)
+    class_vote_xgb = Column(SmallInteger, nullable=True)
+    class_vote_keras = Column(SmallInteger, nullable=True)
+
+    model_version = Column(String(50), nullable=True)
+    diagnosed_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_study_results_diagnosed_at", "diagnosed_at"),
+        Index("ix_study_results_positive_level_date", "is_positive", "classification_level", "diagnosed_at"),
+    )
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, DateTime, String, Boolean, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, String, Boolean, Index, func
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.ext.associationproxy import association_proxy
 from .base_model import BaseModel
+from ....core.text_normalization import normalize_name
 
 class User(BaseModel):
     __tablename__ = "users"
@@ -11,6 +12,9 @@ class User(BaseModel):
     email: str = Column(String(120), unique=True, nullable=False)
     last_name: str = Column(String(100), nullable=False)
     name: str = Column(String(100), nullable=False)
+    # Copias sin acentos ni mayúsculas para la búsqueda por nombre
+    name_normalized: str = Column(String(100), nullable=False, default="", server_default="")
+    last_name_normalized: str = Column(String(100), nullable=False, default="", server_default="")
     password: str = Column(String(255), nullable=False)
     is_active: bool = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -18,6 +22,25 @@ class User(BaseModel):
     
     role_associations = relationship("UserRole", back_populates="user", cascade="all, delete-orphan")
     roles = association_proxy("role_associations", "role")
+
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY created_at DESC, id DESC
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Búsqueda por prefijo y FULLTEXT ngram (solo MySQL) sobre el nombre normalizado
+        Index("ix_users_last_name_normalized", "last_name_normalized", "name_normalized"),
+        Index(
+            "ft_users_name_search",
+            "name_normalized",
+            "last_name_normalized",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram"
+        ),
+    )
+
+    @validates("name", "last_name")
+    def _sync_normalized_name(self, key: str, value: str) -> str:
+        setattr(self, f"{key}_normalized", normalize_name(value))
+        return value
     
     def verify_password(self, plain_password: str) -> bool:
         from ....core.security import verify_password
@@ -0,0 +1,50 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models.file_manager import FileStorage
+from ..db.models.medical_study import MedicalStudy
+
+
+class AsyncFileStorageRepo:
+    """
+    Variante asíncrona de `FileStorageRepo`.
+    No hace commit; la transacción se maneja en una capa superior.
+    """
+    def __init__(self):
+        self.model = FileStorage
+
+    async def get(self, db: AsyncSession, *, id: str) -> Optional[FileStorage]:
+        return await db.get(self.model, id)
+
+    async def get_study_file(self, db: AsyncSession, *, id: str) -> Optional[FileStorage]:
+        """Archivo referenciado como CSV de algún estudio médico."""
+        result = await db.scalars(
+            select(self.model)
+            .join(MedicalStudy, MedicalStudy.csv_file_id == self.model.id)
+            .where(self.model.id == id)
+        )
+        return result.first()
+
+    async def create(self, db: AsyncSession, *, obj_in: Dict[str, Any]) -> FileStorage:
+        db_obj = self.model(**obj_in)
+        db.add(db_obj)
+        await db.flush()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(self, db: AsyncSession, *, db_obj: FileStorage, obj_in: Dict[str, Any]) -> FileStorage:
+        for field, value in obj_in.items():
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.flush()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def delete(self, db: AsyncSession, *, id: str) -> Optional[FileStorage]:
+        db_obj = await self.get(db, id=id)
+        if db_obj:
+            await db.delete(db_obj)
+        return db_obj
@@ -0,0 +1,90 @@
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from ..db.models.medical_study import MedicalStudy
+from ..db.models.user import User
+from ...core.pagination import Page, build_page, keyset_criteria
+
+
+class AsyncMedicalStudyRepo:
+    """
+    Variante asíncrona de `MedicalStudyRepo` para `AsyncSession`.
+    Las relaciones se cargan explícitamente con `joinedload`.
+    """
+    def __init__(self):
+        self.__study_model = MedicalStudy
+        self.__user_model = User
+
+    def _select_with_people(self):
+        return select(self.__study_model).options(
+            joinedload(self.__study_model.patient),
+            joinedload(self.__study_model.doctor),
+            joinedload(self.__study_model.technician)
+        )
+
+    async def get_by_id(self, db: AsyncSession, id: UUID) -> Optional[MedicalStudy]:
+        result = await db.scalars(self._select_with_people().where(self.__study_model.id == str(id)))
+        return result.first()
+
+    async def get_by_access_code(self, db: AsyncSession, *, access_code: str) -> Optional[MedicalStudy]:
+        result = await db.scalars(select(self.__study_model).where(self.__study_model.access_code == access_code))
+        return result.first()
+
+    async def get_by_patient_dni_and_access_code(self, db: AsyncSession, dni: str, access_code: str) -> List[MedicalStudy]:
+        result = await db.scalars(
+            select(self.__study_model)
+            .options(joinedload(self.__study_model.doctor))
+            .join(self.__user_model, self.__study_model.patient_id == self.__user_model.id)
+            .where(self.__user_model.dni == dni, self.__study_model.access_code == access_code)
+        )
+        return list(result.all())
+
+    async def get_all(self, db: AsyncSession, *, skip: int = 0, limit: int = 100) -> List[MedicalStudy]:
+        result = await db.scalars(
+            self._select_with_people()
+            .order_by(self.__study_model.created_at.desc(), self.__study_model.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.all())
+
+    async def get_page(self, db: AsyncSession, *, cursor: Optional[str] = None, limit: int = 100) -> Page[MedicalStudy]:
+        """
+        Página de estudios por cursor sobre `(created_at, id)`.
+
+        Raises:
+            ValueError: si el cursor es inválido.
+        """
+        result = await db.scalars(
+            self._select_with_people()
+            .where(*keyset_criteria(self.__study_model.created_at, self.__study_model.id, cursor))
+            .order_by(self.__study_model.created_at.desc(), self.__study_model.id.desc())
+            .limit(limit + 1)
+        )
+        return build_page(result.all(), limit)
+
+    async def create(self, db: AsyncSession, *, obj_in: Dict[str, Any]) -> MedicalStudy:
+        db_obj = self.__study_model(**obj_in)
+        db.add(db_obj)
+        await db.flush()
+        return await self.get_by_id(db, db_obj.id)
+
+    async def update(self, db: AsyncSession, *, db_obj: MedicalStudy, obj_in: Dict[str, Any]) -> MedicalStudy:
+        for field, value in obj_in.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.flush()
+        return await self.get_by_id(db, db_obj.id)
+
+    async def delete(self, db: AsyncSession, *, id: UUID) -> MedicalStudy:
+        db_obj = await db.get(self.__study_model, str(id))
+        if not db_obj:
+            raise HTTPException(status_code=404, detail="Medical study not found")
+        await db.delete(db_obj)
+        await db.flush()
+        return db_obj
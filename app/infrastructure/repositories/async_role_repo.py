@@ -0,0 +1,36 @@
+import uuid
+from typing import List, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models.role import Role
+
+
+class AsyncRoleRepo:
+    """Variante asíncrona de `RoleRepo` para `AsyncSession`."""
+    def __init__(self):
+        self.model = Role
+
+    async def get_by_id(self, db: AsyncSession, id: Union[str, uuid.UUID]) -> Optional[Role]:
+        return await db.get(self.model, str(id))
+
+    async def get_by_name(self, db: AsyncSession, name: str) -> Optional[Role]:
+        result = await db.scalars(select(self.model).where(self.model.name == name))
+        return result.first()
+
+    async def get_role_name(self, db: AsyncSession, id: Union[str, uuid.UUID]) -> Optional[str]:
+        result = await db.scalars(select(self.model.name).where(self.model.id == str(id)))
+        return result.first()
+
+    async def get_all(self, db: AsyncSession) -> List[Role]:
+        result = await db.scalars(select(self.model).order_by(self.model.name))
+        return list(result.all())
+
+    async def create(self, db: AsyncSession, *, name: str) -> Role:
+        db_obj = self.model(name=name)
+        db.add(db_obj)
+        await db.flush()
+        # Sin carga perezosa en async: `created_at` (default del servidor) se lee aquí.
+        await db.refresh(db_obj)
+        return db_obj
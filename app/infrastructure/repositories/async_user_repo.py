@@ -0,0 +1,118 @@
+import uuid
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.models.user import User
+from ..db.models.user_role import UserRole
+from ..db.DTOs.user_dto import UserCreateDTO, UserUpdateDTO
+from ...core.pagination import Page, build_page, keyset_criteria
+from ...core.security import get_password_hash_async
+from ..search import get_name_search_backend
+from .loaders import user_roles_eager
+
+
+class AsyncUserRepo:
+    """
+    Variante asíncrona de `UserRepo` para `AsyncSession`.
+    Los roles se cargan siempre con `selectinload` porque en async no hay
+    carga perezosa de relaciones.
+    """
+    def __init__(self):
+        self.model = User
+
+    def _normalize_id(self, id_value: Union[str, uuid.UUID]) -> Optional[str]:
+        return str(id_value) if id_value is not None else None
+
+    def _select(self):
+        return select(self.model).options(user_roles_eager())
+
+    async def get(self, db: AsyncSession, *, id: Union[str, uuid.UUID]) -> Optional[User]:
+        result = await db.scalars(self._select().where(self.model.id == self._normalize_id(id)))
+        return result.first()
+
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.scalars(self._select().where(self.model.email == email))
+        return result.first()
+
+    async def get_by_dni(self, db: AsyncSession, *, dni: str) -> Optional[User]:
+        result = await db.scalars(self._select().where(self.model.dni == dni))
+        return result.first()
+
+    async def email_exists(self, db: AsyncSession, *, email: str) -> bool:
+        result = await db.scalars(select(self.model.id).where(self.model.email == email).limit(1))
+        return result.first() is not None
+
+    async def dni_exists(self, db: AsyncSession, *, dni: str) -> bool:
+        result = await db.scalars(select(self.model.id).where(self.model.dni == dni).limit(1))
+        return result.first() is not None
+
+    async def get_all(self, db: AsyncSession, *, skip: int = 0, limit: int = 100) -> List[User]:
+        result = await db.scalars(
+            self._select()
+            .order_by(self.model.created_at.desc(), self.model.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.all())
+
+    async def get_page(self, db: AsyncSession, *, cursor: Optional[str] = None, limit: int = 100) -> Page[User]:
+        """
+        Página de usuarios por cursor sobre `(created_at, id)`.
+
+        Raises:
+            ValueError: si el cursor es inválido.
+        """
+        result = await db.scalars(
+            self._select()
+            .where(*keyset_criteria(self.model.created_at, self.model.id, cursor))
+            .order_by(self.model.created_at.desc(), self.model.id.desc())
+            .limit(limit + 1)
+        )
+        return build_page(result.all(), limit)
+
+    async def get_by_name(self, db: AsyncSession, *, name: str, skip: int = 0, limit: int = 50) -> List[User]:
+        """Búsqueda por nombre ordenada por relevancia (ver `UserRepo.get_by_name`)."""
+        matches = await db.run_sync(
+            lambda session: get_name_search_backend().search(session, name, limit=limit, offset=skip)
+        )
+        users = {user.id: user for user in await self.get_multiple_by_ids(db, [m.user_id for m in matches])}
+        return [users[m.user_id] for m in matches if m.user_id in users]
+
+    async def get_users_by_role_id(self, db: AsyncSession, role_id: Union[str, uuid.UUID]) -> List[User]:
+        result = await db.scalars(
+            self._select()
+            .join(UserRole, self.model.id == UserRole.user_id)
+            .where(UserRole.role_id == self._normalize_id(role_id))
+        )
+        return list(result.all())
+
+    async def get_multiple_by_ids(self, db: AsyncSession, user_ids: List[Union[str, uuid.UUID]]) -> List[User]:
+        if not user_ids:
+            return []
+        normalized_ids = [self._normalize_id(user_id) for user_id in user_ids]
+        result = await db.scalars(self._select().where(self.model.id.in_(normalized_ids)))
+        return list(result.all())
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreateDTO | Dict[str, Any]) -> User:
+        create_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        if 'password' in create_data:
+            create_data['password'] = await get_password_hash_async(create_data['password'])
+
+        db_obj = self.model(**create_data)
+        db.add(db_obj)
+        await db.flush()
+        return await self.get(db, id=db_obj.id)
+
+    async def update(self, db: AsyncSession, *, db_obj: User, obj_in: UserUpdateDTO | Dict[str, Any]) -> User:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        if 'password' in update_data:
+            update_data['password'] = await get_password_hash_async(update_data['password'])
+
+        for field, value in update_data.items():
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.flush()
+        return await self.get(db, id=db_obj.id)
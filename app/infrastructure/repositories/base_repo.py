@@ -1,9 +1,16 @@
 from abc import ABC, abstractmethod
+from datetime import datetime, timezone
 from typing import Generic, TypeVar, Any, Type
 from sqlalchemy.orm import Session
 
 T = TypeVar("T")
 
+
+def utcnow() -> datetime:
+    """Hora UTC sin zona, como la devuelven las columnas DATETIME."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class BaseRepository(ABC, Generic[T]):
     """Interfaz base para repositorios de datos.
     Define las operaciones CRUD básicas que deben implementarse.
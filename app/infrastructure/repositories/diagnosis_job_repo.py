@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session, defer
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .base_repo import BaseRepository, utcnow
+from ..db.models.diagnosis_job import DiagnosisJobRecord, QUEUED, RUNNING
+
+
+class DiagnosisJobRepo(BaseRepository[DiagnosisJobRecord]):
+    """
+    Repositorio de la cola durable `diagnosis_jobs`.
+    No hace commit: cada operación de un worker es una transacción corta
+    que confirma quien llama. Las transiciones de un trabajo tomado van
+    condicionadas a `locked_by` (fencing): un worker que perdió el lease
+    no puede terminar un trabajo que ya tomó otro.
+    """
+    def __init__(self):
+        self.model = DiagnosisJobRecord
+
+    def get(self, db: Session, *, id: str) -> Optional[DiagnosisJobRecord]:
+        return (
+            db.query(self.model)
+            .options(defer(self.model.payload))
+            .filter(self.model.id == str(id))
+            .first()
+        )
+
+    def create(self, db: Session, *, obj_in: Dict[str, Any]) -> DiagnosisJobRecord:
+        db_obj = self.model(**obj_in)
+        db.add(db_obj)
+        db.flush()
+        return db_obj
+
+    def count_unfinished(self, db: Session) -> int:
+        return db.scalar(
+            select(func.count()).select_from(self.model).where(self.model.status.in_((QUEUED, RUNNING)))
+        )
+
+    def claim(self, db: Session, *, worker_id: str, limit: int, lease_seconds: int) -> List[DiagnosisJobRecord]:
+        """
+        Toma hasta `limit` trabajos disponibles: los más urgentes primero y,
+        dentro de cada prioridad, los más antiguos.
+        `FOR UPDATE SKIP LOCKED` salta las filas que otro worker está
+        tomando en ese momento, así que los workers no se bloquean entre sí.
+        El UPDATE va condicionado a `status` también, para bases sin SKIP LOCKED.
+        """
+        now = utcnow()
+        ids = db.scalars(
+            select(self.model.id)
+            .where(self.model.status == QUEUED, self.model.available_at <= now)
+            .order_by(self.model.priority, self.model.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return []
+        db.execute(
+            update(self.model)
+            .where(self.model.id.in_(ids), self.model.status == QUEUED)
+            .values(
+                status=RUNNING,
+                locked_by=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=self.model.attempts + 1,
+                started_at=now
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return (
+            db.query(self.model)
+            .filter(self.model.id.in_(ids), self.model.status == RUNNING, self.model.locked_by == worker_id)
+            .all()
+        )
+
+    def renew_leases(self, db: Session, *, ids: Iterable[str], worker_id: str, lease_seconds: int) -> Set[str]:
+        """Extiende el lease de los trabajos que el worker sigue reteniendo; devuelve sus IDs."""
+        ids = list(ids)
+        if not ids:
+            return set()
+        held = [
+            self.model.id.in_(ids),
+            self.model.status == RUNNING,
+            self.model.locked_by == worker_id,
+        ]
+        db.execute(
+            update(self.model)
+            .where(*held)
+            .values(lease_expires_at=utcnow() + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        return set(db.scalars(select(self.model.id).where(*held)))
+
+    def finish(self, db: Session, *, id: str, worker_id: str, status: str, error: Optional[str] = None) -> bool:
+        """Marca como terminado un trabajo del worker y borra el CSV. Devuelve si aún lo retenía."""
+        return self.__update_held(
+            db, id, worker_id,
+            status=status,
+            error=error,
+            payload=None,
+            locked_by=None,
+            lease_expires_at=None,
+            finished_at=utcnow()
+        )
+
+    def requeue(self, db: Session, *, id: str, worker_id: str, error: str, delay_seconds: float) -> bool:
+        """Devuelve a la cola un trabajo del worker, disponible tras `delay_seconds`."""
+        return self.__update_held(
+            db, id, worker_id,
+            status=QUEUED,
+            error=error,
+            locked_by=None,
+            lease_expires_at=None,
+            available_at=utcnow() + timedelta(seconds=delay_seconds)
+        )
+
+    def get_expired(self, db: Session, *, limit: int) -> List[DiagnosisJobRecord]:
+        """Trabajos en ejecución con el lease vencido (su worker murió o se colgó), bloqueados para actualizarlos."""
+        return (
+            db.query(self.model)
+            .options(defer(self.model.payload))
+            .filter(self.model.status == RUNNING, self.model.lease_expires_at < utcnow())
+            .order_by(self.model.lease_expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    def delete_finished(self, db: Session, *, before: datetime, limit: int) -> int:
+        """Borra hasta `limit` trabajos terminados antes de `before`."""
+        ids = db.scalars(
+            select(self.model.id).where(self.model.finished_at < before).limit(limit)
+        ).all()
+        if not ids:
+            return 0
+        db.execute(delete(self.model).where(self.model.id.in_(ids)).execution_options(synchronize_session=False))
+        return len(ids)
+
+    def __update_held(self, db: Session, id: str, worker_id: str, **values) -> bool:
+        result = db.execute(
+            update(self.model)
+            .where(self.model.id == str(id), self.model.status == RUNNING, self.model.locked_by == worker_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional
 from .base_repo import BaseRepository
 from ..db.models.file_manager import FileStorage
+from ..db.models.medical_study import MedicalStudy
 
 class FileStorageRepo(BaseRepository[FileStorage]):
     """
@@ -15,6 +16,18 @@ class FileStorageRepo(BaseRepository[FileStorage]):
         """Obtiene un registro de archivo por su ID."""
         return db.query(self.model).filter(self.model.id == id).first()
 
+    def get_study_file(self, db: Session, *, id: str) -> Optional[FileStorage]:
+        """
+        Obtiene un archivo solo si está referenciado como CSV de algún estudio
+        médico (`MedicalStudy.csv_file_id`).
+        """
+        return (
+            db.query(self.model)
+            .join(MedicalStudy, MedicalStudy.csv_file_id == self.model.id)
+            .filter(self.model.id == id)
+            .first()
+        )
+
     def create(self, db: Session, *, obj_in: Dict[str, Any]) -> FileStorage:
         """
         Crea un registro de archivo en la sesión de la base de datos.
@@ -23,7 +36,6 @@ class FileStorageRepo(BaseRepository[FileStorage]):
         db_obj = self.model(**obj_in)
         db.add(db_obj)
         db.flush()
-        db.refresh(db_obj)
         return db_obj
 
     def update(self, db: Session, *, db_obj: FileStorage, obj_in: Dict[str, Any]) -> FileStorage:
@@ -38,7 +50,6 @@ class FileStorageRepo(BaseRepository[FileStorage]):
         
         db.add(db_obj)
         db.flush()
-        db.refresh(db_obj)
         return db_obj
 
     def delete(self, db: Session, *, id: int) -> Optional[FileStorage]:
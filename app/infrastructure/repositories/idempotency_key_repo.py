@@ -0,0 +1,69 @@
+from datetime import datetime
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+
+from .base_repo import BaseRepository, utcnow
+from ..db.models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyKeyRepo(BaseRepository[IdempotencyKey]):
+    """
+    Repositorio de `idempotency_keys`. No hace commit: la reserva de una
+    clave se confirma en su propia transacción corta para que los demás
+    requests (y nodos) la vean enseguida.
+    """
+    def __init__(self):
+        self.model = IdempotencyKey
+
+    def get(self, db: Session, *, scope: str, key: str) -> Optional[IdempotencyKey]:
+        return db.scalars(
+            select(self.model).where(self.model.scope == scope, self.model.key == key)
+        ).first()
+
+    def create(self, db: Session, *, obj_in: Dict[str, Any]) -> IdempotencyKey:
+        """Inserta la reserva; lanza `IntegrityError` si otro request ya tiene la clave."""
+        db_obj = self.model(**obj_in)
+        db.add(db_obj)
+        db.flush()
+        return db_obj
+
+    def take_over(self, db: Session, *, id: str, fingerprint: str, expires_at: datetime) -> bool:
+        """
+        Reserva de nuevo una clave vencida (respuesta caducada o request que
+        nunca terminó). Condicionado a que siga vencida: de dos requests que
+        la encuentran así, solo uno la toma.
+        """
+        result = db.execute(
+            update(self.model)
+            .where(self.model.id == id, self.model.expires_at <= utcnow())
+            .values(fingerprint=fingerprint, status_code=None, response_body=None, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def complete(self, db: Session, *, id: str, status_code: int, response_body: str, expires_at: datetime) -> None:
+        db.execute(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(status_code=status_code, response_body=response_body, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    def release(self, db: Session, *, id: str) -> None:
+        """Borra una reserva sin respuesta, para que el cliente pueda reintentar."""
+        db.execute(
+            delete(self.model)
+            .where(self.model.id == id, self.model.status_code.is_(None))
+            .execution_options(synchronize_session=False)
+        )
+
+    def delete_expired(self, db: Session, *, before: datetime, limit: int) -> int:
+        """Borra hasta `limit` claves vencidas antes de `before`."""
+        ids = db.scalars(
+            select(self.model.id).where(self.model.expires_at < before).limit(limit)
+        ).all()
+        if not ids:
+            return 0
+        db.execute(delete(self.model).where(self.model.id.in_(ids)).execution_options(synchronize_session=False))
+        return len(ids)
@@ -0,0 +1,85 @@
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Union
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from ..db.models.role import Role
+from ..db.models.user import User
+from ..db.models.user_role import UserRole
+from ...core.batch_loader import BatchLoader
+
+# `session.info`: cargadores del request (la sesión vive lo mismo que el request).
+LOADERS_KEY = "batch_loaders"
+
+
+def user_roles_eager():
+    """
+    Opción de carga de roles de usuarios: las asociaciones con
+    `selectinload` (un `IN (...)` para toda la lista) y cada rol en el mismo SELECT.
+    """
+    return selectinload(User.role_associations).joinedload(UserRole.role)
+
+
+def _normalize_id(id_value: Union[str, uuid.UUID]) -> str:
+    return str(id_value) if id_value is not None else None
+
+
+class RequestLoaders:
+    """Cargadores por lotes de usuarios, roles y asociaciones usuario-rol."""
+
+    def __init__(self, db: Session):
+        self.users: BatchLoader[str, User] = BatchLoader(lambda ids: self._load_users(db, ids))
+        self.roles: BatchLoader[str, Role] = BatchLoader(lambda ids: self._load_roles(db, ids))
+        self.user_roles: BatchLoader[str, List[UserRole]] = BatchLoader(lambda ids: self._load_user_roles(db, ids))
+
+    @staticmethod
+    def _load_users(db: Session, ids: List[str]) -> Dict[str, User]:
+        users = db.query(User).options(user_roles_eager()).filter(User.id.in_(ids)).all()
+        return {user.id: user for user in users}
+
+    @staticmethod
+    def _load_roles(db: Session, ids: List[str]) -> Dict[str, Role]:
+        return {role.id: role for role in db.query(Role).filter(Role.id.in_(ids)).all()}
+
+    @staticmethod
+    def _load_user_roles(db: Session, user_ids: List[str]) -> Dict[str, List[UserRole]]:
+        by_user = defaultdict(list)
+        for user_role in (
+            db.query(UserRole).options(joinedload(UserRole.role)).filter(UserRole.user_id.in_(user_ids)).all()
+        ):
+            by_user[user_role.user_id].append(user_role)
+        return {user_id: by_user.get(user_id, []) for user_id in user_ids}
+
+    def load_users(self, ids: List[Union[str, uuid.UUID]]) -> List[User]:
+        """Usuarios en el orden pedido (`None` si no existen)."""
+        return self.users.load_many([_normalize_id(id) for id in ids])
+
+    def load_user(self, id: Union[str, uuid.UUID]) -> User:
+        return self.users.load(_normalize_id(id))
+
+    def load_role(self, id: Union[str, uuid.UUID]) -> Role:
+        return self.roles.load(_normalize_id(id))
+
+    def load_user_roles(self, user_id: Union[str, uuid.UUID]) -> List[UserRole]:
+        return self.user_roles.load(_normalize_id(user_id)) or []
+
+
+def get_loaders(db: Session) -> RequestLoaders:
+    """Cargadores asociados a la sesión del request."""
+    loaders = db.info.get(LOADERS_KEY)
+    if loaders is None:
+        loaders = db.info[LOADERS_KEY] = RequestLoaders(db)
+    return loaders
+
+
+@event.listens_for(Session, "after_flush")
+def _clear_loaders(session, flush_context):
+    # Una escritura puede cambiar usuarios o roles ya cacheados.
+    session.info.pop(LOADERS_KEY, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _clear_loaders_on_rollback(session, previous_transaction):
+    session.info.pop(LOADERS_KEY, None)
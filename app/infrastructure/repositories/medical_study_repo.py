@@ -1,17 +1,40 @@
 from uuid import UUID
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import Dict, Any, Optional, List
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session, joinedload, load_only
+from typing import Dict, Any, Optional, List, Set
 
 from ..db.models.user import User
 from .base_repo import BaseRepository
 from ..db.models.medical_study import MedicalStudy
+from ..db.DTOs.study_projection import StudyProjection, STUDY_COLUMNS
+from ...core.batch_loader import MAX_BATCH_SIZE
+from ...core.config import settings
+from ...core.pagination import Page, keyset_page
+from ..search import get_name_search_backend
 
 class MedicalStudyRepo(BaseRepository[MedicalStudy]):
     def __init__(self):
         self.__study_model = MedicalStudy
         self.__user_model = User
 
+    def _projected_query(self, db: Session, projection: StudyProjection):
+        """
+        Consulta que carga solo las columnas pedidas y une únicamente las
+        relaciones incluidas en la proyección.
+        """
+        columns = [getattr(self.__study_model, STUDY_COLUMNS[name]) for name in projection.columns]
+        options = [load_only(self.__study_model.id, *columns)]
+        for relation, sub_fields in projection.relations.items():
+            options.append(
+                joinedload(getattr(self.__study_model, relation))
+                .load_only(*[getattr(self.__user_model, sub) for sub in sub_fields])
+            )
+        return db.query(self.__study_model).options(*options)
+
+    def get_by_id_projected(self, db: Session, id: UUID, projection: StudyProjection) -> Optional[MedicalStudy]:
+        return self._projected_query(db, projection).filter(self.__study_model.id == str(id)).first()
+
     def get_by_id(self, db: Session, id: UUID) -> Optional[MedicalStudy]:
         """
         Obtiene un estudio médico por ID con todas las relaciones cargadas.
@@ -31,16 +54,23 @@ class MedicalStudyRepo(BaseRepository[MedicalStudy]):
             joinedload(MedicalStudy.doctor),
             joinedload(MedicalStudy.technician)
         ).all()
-    def get_by_patient_dni_and_access_code(self, db: Session, dni: str, access_code: str) -> List[MedicalStudy]:
+    def get_by_patient_dni_and_access_code(
+        self,
+        db: Session,
+        dni: str,
+        access_code: str,
+        projection: Optional[StudyProjection] = None
+    ) -> List[MedicalStudy]:
         """
         Busca estudios médicos por DNI del paciente y código de acceso,
         cargando eficientemente la información del doctor.
         """
+        if projection is not None:
+            query = self._projected_query(db, projection)
+        else:
+            query = db.query(self.__study_model).options(joinedload(self.__study_model.doctor))
         return (
-            db.query(self.__study_model)
-            .options(
-                joinedload(self.__study_model.doctor)
-            )
+            query
             .join(self.__user_model, self.__study_model.patient_id == self.__user_model.id)
             .filter(
                 self.__user_model.dni == dni,
@@ -50,43 +80,170 @@ class MedicalStudyRepo(BaseRepository[MedicalStudy]):
         )
 
 
+    def get_by_patient_name(
+        self,
+        db: Session,
+        *,
+        name: str,
+        skip: int = 0,
+        limit: int = 100,
+        projection: Optional[StudyProjection] = None
+    ) -> List[MedicalStudy]:
+        """
+        Estudios de los pacientes cuyo nombre o apellido coincide con `name`,
+        ordenados por relevancia del paciente y luego por fecha. Solo se
+        consideran los `NAME_SEARCH_MAX_CANDIDATES` pacientes más relevantes.
+        """
+        matches = get_name_search_backend().search(
+            db,
+            name,
+            limit=settings.NAME_SEARCH_MAX_CANDIDATES,
+            scope=select(self.__study_model.patient_id)
+        )
+        if not matches:
+            return []
+
+        rank = {m.user_id: position for position, m in enumerate(matches)}
+        return (
+            self._list_query(db, projection)
+            .filter(self.__study_model.patient_id.in_(rank))
+            .order_by(
+                case(rank, value=self.__study_model.patient_id),
+                self.__study_model.created_at.desc(),
+                self.__study_model.id.desc()
+            )
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
     def get_by_access_code(self, db: Session, *, access_code: str) -> Optional[MedicalStudy]:
         return db.query(self.__study_model).filter(self.__study_model.access_code == access_code).first()
 
     
-    def get_all(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[MedicalStudy]:
+    def _list_query(self, db: Session, projection: Optional[StudyProjection]):
+        if projection is not None:
+            return self._projected_query(db, projection)
+        return db.query(self.__study_model).options(
+            joinedload(self.__study_model.doctor),
+            joinedload(self.__study_model.patient),
+            joinedload(self.__study_model.technician)
+        )
+
+    def get_all(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        projection: Optional[StudyProjection] = None
+    ) -> List[MedicalStudy]:
+        """
+        Listado con OFFSET, se mantiene por compatibilidad.
+        Para recorrer la tabla usar `get_page`.
+        """
         return (
-            db.query(self.__study_model)
-            .options(
-                joinedload(self.__study_model.doctor),
-                joinedload(self.__study_model.patient),
-                joinedload(self.__study_model.technician)  
-            )
-            .order_by(self.__study_model.id.desc())
+            self._list_query(db, projection)
+            .order_by(self.__study_model.created_at.desc(), self.__study_model.id.desc())
             .offset(skip)
             .limit(limit)
             .all()
         )
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        projection: Optional[StudyProjection] = None
+    ) -> Page[MedicalStudy]:
+        """
+        Página de estudios más recientes primero, paginada por cursor sobre
+        `(created_at, id)`.
+
+        Raises:
+            ValueError: si el cursor es inválido.
+        """
+        return keyset_page(
+            self._list_query(db, projection),
+            self.__study_model.created_at,
+            self.__study_model.id,
+            cursor=cursor,
+            limit=limit
+        )
+
+    @staticmethod
+    def _normalize_ids(obj_in: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Los ids como string, igual que en las filas cargadas: sin commit ni
+        refresh, un UUID en la FK haría que `doctor`/`patient` no se
+        resuelvan desde el identity map y se vuelvan a consultar.
+        """
+        return {field: str(value) if isinstance(value, UUID) else value for field, value in obj_in.items()}
+
     def create(self, db: Session, *, obj_in: Dict[str, Any]) -> MedicalStudy:
-        db_obj = self.__study_model(**obj_in)
+        db_obj = self.__study_model(**self._normalize_ids(obj_in))
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
+    def create_many(self, db: Session, *, objs_in: List[Dict[str, Any]]) -> List[MedicalStudy]:
+        """Crea varios estudios con un solo flush (INSERT por lotes)."""
+        db_objs = [self.__study_model(**self._normalize_ids(obj_in)) for obj_in in objs_in]
+        db.add_all(db_objs)
+        db.flush()
+        return db_objs
+
+    def existing_access_codes(self, db: Session, access_codes: List[str]) -> Set[str]:
+        """Códigos de acceso de la lista que ya están en uso."""
+        codes = list(dict.fromkeys(access_codes))
+        found: Set[str] = set()
+        for start in range(0, len(codes), MAX_BATCH_SIZE):
+            found.update(db.scalars(
+                select(self.__study_model.access_code)
+                .where(self.__study_model.access_code.in_(codes[start:start + MAX_BATCH_SIZE]))
+            ))
+        return found
+
+    def get_many_with_patient(self, db: Session, ids: List[UUID]) -> Dict[str, MedicalStudy]:
+        """Estudios por ID con su paciente, en una consulta por `MAX_BATCH_SIZE` IDs."""
+        normalized_ids = list(dict.fromkeys(str(id) for id in ids))
+        studies: Dict[str, MedicalStudy] = {}
+        for start in range(0, len(normalized_ids), MAX_BATCH_SIZE):
+            for study in (
+                db.query(self.__study_model)
+                .options(joinedload(self.__study_model.patient))
+                .filter(self.__study_model.id.in_(normalized_ids[start:start + MAX_BATCH_SIZE]))
+                .all()
+            ):
+                studies[study.id] = study
+        return studies
+
     def update(self, db: Session, *, db_obj: MedicalStudy, obj_in: Dict[str, Any]) -> MedicalStudy:
-        for field, value in obj_in.items():
+        for field, value in self._normalize_ids(obj_in).items():
             setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
+    def transition_status(self, db: Session, *, id: UUID, from_status: str, to_status: str) -> bool:
+        """
+        Cambia el estado con un UPDATE condicional (`WHERE status = from_status`):
+        de dos requests concurrentes solo uno lo consigue. Devuelve si cambió.
+        """
+        result = db.execute(
+            update(self.__study_model)
+            .where(self.__study_model.id == str(id), self.__study_model.status == from_status)
+            .values(status=to_status)
+        )
+        return result.rowcount == 1
+
     def delete(self, db: Session, *, id: UUID) -> MedicalStudy:  
         db_obj = db.query(self.__study_model).filter(self.__study_model.id == str(id)).first()
         if not db_obj:
             raise HTTPException(status_code=404, detail="Medical study not found")
         
         db.delete(db_obj)
-        db.commit()
+        db.flush()
         return db_obj
\ No newline at end of file
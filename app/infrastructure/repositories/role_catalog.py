@@ -0,0 +1,88 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from loguru import logger as log
+from sqlalchemy.orm import Session
+
+from ..db.models.role import Role
+from ...core.config import settings
+
+
+@dataclass(frozen=True)
+class CachedRole:
+    """Copia inmutable de un rol; se comparte entre requests y sesiones."""
+    id: str
+    name: str
+
+
+class RoleCatalog:
+    """
+    Catálogo de roles en memoria (nombre <-> id), uno por proceso. Se carga
+    al iniciar la aplicación, se recarga cuando pasan
+    `ROLE_CATALOG_TTL_SECONDS` y `RoleService` lo invalida al crear,
+    modificar o eliminar un rol. Con varios workers, los demás procesos
+    ven el cambio al vencer su TTL.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = settings.ROLE_CATALOG_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._by_id: Dict[str, CachedRole] = {}
+        self._by_name: Dict[str, CachedRole] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session) -> None:
+        """Recarga el catálogo desde la base de datos."""
+        roles = [CachedRole(id=str(role.id), name=role.name) for role in db.query(Role.id, Role.name).all()]
+        with self._lock:
+            self._by_id = {role.id: role for role in roles}
+            self._by_name = {role.name: role for role in roles}
+            self._loaded_at = time.monotonic()
+        log.debug(f"Role catalog loaded: {len(roles)} roles")
+
+    def invalidate(self) -> None:
+        """Fuerza la recarga en el próximo acceso."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_fresh(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.ttl_seconds:
+            self.refresh(db)
+
+    def get(self, db: Session, role_id: Union[str, uuid.UUID]) -> Optional[CachedRole]:
+        self._ensure_fresh(db)
+        return self._by_id.get(str(role_id)) if role_id is not None else None
+
+    def get_by_name(self, db: Session, name: str) -> Optional[CachedRole]:
+        self._ensure_fresh(db)
+        return self._by_name.get(name)
+
+    def id_for(self, db: Session, name: str) -> Optional[str]:
+        role = self.get_by_name(db, name)
+        return role.id if role else None
+
+    def name_for(self, db: Session, role_id: Union[str, uuid.UUID]) -> Optional[str]:
+        role = self.get(db, role_id)
+        return role.name if role else None
+
+    def all(self, db: Session) -> List[CachedRole]:
+        self._ensure_fresh(db)
+        return sorted(self._by_id.values(), key=lambda role: role.name)
+
+
+_catalog: Optional[RoleCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_role_catalog() -> RoleCatalog:
+    """Catálogo de roles del proceso."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = RoleCatalog()
+    return _catalog
@@ -4,6 +4,7 @@ from ...infrastructure.db.models.role import Role
 from typing import List, Optional, Any, Union
 import uuid
 from ...infrastructure.repositories.base_repo import BaseRepository
+from .role_catalog import get_role_catalog
 
 class RoleRepo(BaseRepository[Role]):
     def __init__(self, db: Session):
@@ -16,12 +17,8 @@ class RoleRepo(BaseRepository[Role]):
         return self.db.query(self.model).filter(self.model.id == id).first()
 
     def get_role_name(self, id: Union[str, uuid.UUID]) -> Optional[str]:
-        """Obtiene solo el nombre del rol (acepta string o UUID)"""
-        if isinstance(id, uuid.UUID):
-            id = str(id)
-
-        role = self.get_by_id(id)
-        return role.name if role else None
+        """Obtiene solo el nombre del rol desde el catálogo en memoria (acepta string o UUID)"""
+        return get_role_catalog().name_for(self.db, id)
 
     def get(self, db: Session = None, id: Any = None) -> List[Role]:
         """Implementación del método abstracto get de BaseRepository"""
@@ -39,10 +36,23 @@ class RoleRepo(BaseRepository[Role]):
             
         db_obj = self.model(name=name)
         self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self.db.flush()
+        return db_obj
+
+    def update(self, db: Session = None, *, db_obj: Role, name: str) -> Role:
+        db_obj.name = name
+        self.db.add(db_obj)
+        self.db.flush()
         return db_obj
 
+    def delete(self, db: Session = None, *, id: Union[str, uuid.UUID]) -> Role:
+        role = self.get_by_id(id)
+        if not role:
+            raise ValueError("Role not found")
+        self.db.delete(role)
+        self.db.flush()
+        return role
+
     def get_all(self) -> List[Role]:
         """Método específico para obtener todos los roles"""
         return self.db.query(self.model).all()
\ No newline at end of file
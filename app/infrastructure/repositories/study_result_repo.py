@@ -0,0 +1,100 @@
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional, List
+
+from .base_repo import BaseRepository
+from ..db.models.medical_study import MedicalStudy
+from ..db.models.study_result import StudyResult
+
+class StudyResultRepo(BaseRepository[StudyResult]):
+    """
+    Repositorio de la tabla `study_results`.
+    No hace commit; la transacción se maneja en una capa superior.
+    """
+    def __init__(self):
+        self.model = StudyResult
+
+    def get(self, db: Session, *, id: str) -> Optional[StudyResult]:
+        return db.query(self.model).filter(self.model.id == id).first()
+
+    def get_by_study_id(self, db: Session, *, study_id: str) -> Optional[StudyResult]:
+        return db.query(self.model).filter(self.model.study_id == study_id).first()
+
+    def create(self, db: Session, *, obj_in: Dict[str, Any]) -> StudyResult:
+        db_obj = self.model(**obj_in)
+        db.add(db_obj)
+        return db_obj
+
+    def upsert(self, db: Session, *, obj_in: Dict[str, Any]) -> StudyResult:
+        """Crea o reemplaza el resultado estructurado de un estudio."""
+        db_obj = self.get_by_study_id(db, study_id=obj_in["study_id"])
+        if db_obj is None:
+            return self.create(db, obj_in=obj_in)
+        for field, value in obj_in.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        return db_obj
+
+    def bulk_create(self, db: Session, *, rows: List[Dict[str, Any]]) -> None:
+        """Inserta varios resultados en un único INSERT multi-fila."""
+        if rows:
+            db.bulk_insert_mappings(self.model, rows)
+
+    def get_studies_without_result(self, db: Session, *, after_id: Optional[str], limit: int) -> List[MedicalStudy]:
+        """
+        Estudios completados con `ml_results` pero sin fila en `study_results`,
+        paginados por ID para el backfill.
+        """
+        query = (
+            db.query(MedicalStudy)
+            .outerjoin(self.model, self.model.study_id == MedicalStudy.id)
+            .filter(
+                self.model.id.is_(None),
+                MedicalStudy.ml_results.isnot(None),
+                MedicalStudy.status == "COMPLETED"
+            )
+        )
+        if after_id is not None:
+            query = query.filter(MedicalStudy.id > after_id)
+        return query.order_by(MedicalStudy.id).limit(limit).all()
+
+    def count_by_level(
+        self,
+        db: Session,
+        *,
+        is_positive: Optional[bool] = None,
+        classification_level: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Cuenta estudios agrupados por resultado y nivel, filtrando por índices."""
+        query = db.query(
+            self.model.is_positive,
+            self.model.classification_level,
+            func.count(self.model.id),
+            func.avg(self.model.binary_confidence)
+        )
+        if is_positive is not None:
+            query = query.filter(self.model.is_positive == is_positive)
+        if classification_level is not None:
+            query = query.filter(self.model.classification_level == classification_level)
+        if date_from is not None:
+            query = query.filter(self.model.diagnosed_at >= date_from)
+        if date_to is not None:
+            query = query.filter(self.model.diagnosed_at < date_to)
+
+        rows = (
+            query.group_by(self.model.is_positive, self.model.classification_level)
+            .order_by(self.model.is_positive, self.model.classification_level)
+            .all()
+        )
+        return [
+            {
+                "is_positive": bool(is_pos),
+                "classification_level": level,
+                "count": count,
+                "avg_binary_confidence": float(avg) if avg is not None else None
+            }
+            for is_pos, level, count, avg in rows
+        ]
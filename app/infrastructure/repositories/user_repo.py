@@ -1,10 +1,32 @@
 import uuid
+from dataclasses import dataclass
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, Iterable, List, Optional, Set, Union
 from ..db.models.user import User
 from ..repositories.base_repo import BaseRepository
 from ...core.security import get_password_hash, verify_password
 from ..db.DTOs.user_dto import UserUpdateDTO, UserCreateDTO
+from ...core.pagination import Page, keyset_page
+from ..search import get_name_search_backend
+from .loaders import user_roles_eager
+from ...core.batch_loader import MAX_BATCH_SIZE
+from ...core.text_normalization import normalize_name
+
+@dataclass(frozen=True)
+class LoginCredentials:
+    """Lo necesario para verificar un login y emitir el token."""
+    id: str
+    email: str
+    password: str
+    role_ids: List[str]
+
+@dataclass(frozen=True)
+class UserWithRoleIds:
+    """Un usuario y los IDs de sus roles."""
+    user: User
+    role_ids: Set[str]
+
 
 class UserRepo(BaseRepository[User]):
     def __init__(self, db: Session = None):
@@ -15,26 +37,54 @@ class UserRepo(BaseRepository[User]):
         if isinstance(id_value, uuid.UUID):
             return str(id_value)
         return str(id_value) if id_value is not None else None
+
+    def _query(self, db: Session):
+        """Consulta de usuarios con sus roles precargados (sin N+1 al serializar)."""
+        return db.query(self.model).options(user_roles_eager())
     
     def get(self, db: Session, *, id: Union[str, uuid.UUID]) -> Optional[User]:
         """Obtiene un usuario por UUID (acepta string o UUID)"""
         normalized_id = self._normalize_id(id)
-        return db.query(self.model).filter(self.model.id == normalized_id).first()
+        return self._query(db).filter(self.model.id == normalized_id).first()
 
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(self.model).filter(self.model.email == email).first()
+        return self._query(db).filter(self.model.email == email).first()
 
     def email_exists(self, db: Session, *, email: str) -> bool:
         return db.query(self.model).filter(self.model.email == email).first() is not None
 
     def get_all(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[User]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return (
+            self._query(db)
+            .order_by(self.model.created_at.desc(), self.model.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
 
-    def get_by_name(self, db: Session, *, name: str) -> List[User]:
-        return db.query(self.model).filter(self.model.name.ilike(f"%{name}%")).all()
+    def get_page(self, db: Session, *, cursor: Optional[str] = None, limit: int = 100) -> Page[User]:
+        """
+        Página de usuarios más recientes primero, paginada por cursor sobre
+        `(created_at, id)`.
+
+        Raises:
+            ValueError: si el cursor es inválido.
+        """
+        return keyset_page(
+            self._query(db), self.model.created_at, self.model.id, cursor=cursor, limit=limit
+        )
+
+    def get_by_name(self, db: Session, *, name: str, skip: int = 0, limit: int = 50) -> List[User]:
+        """
+        Busca usuarios por nombre o apellido (sin distinguir acentos ni
+        mayúsculas) usando el backend de búsqueda configurado. Ordenado por relevancia.
+        """
+        matches = get_name_search_backend().search(db, name, limit=limit, offset=skip)
+        users = {user.id: user for user in self.get_multiple_by_ids(db, [m.user_id for m in matches])}
+        return [users[m.user_id] for m in matches if m.user_id in users]
 
     def get_by_dni(self, db: Session, *, dni: str) -> Optional[User]:
-        return db.query(self.model).filter(self.model.dni == dni).first()
+        return self._query(db).filter(self.model.dni == dni).first()
 
     def dni_exists(self, db: Session, *, dni: str) -> bool:
         """Verifica si existe un usuario con el DNI dado."""
@@ -51,10 +101,57 @@ class UserRepo(BaseRepository[User]):
 
         db_obj = self.model(**create_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
     
+    def bulk_create(self, db: Session, *, users: List[Dict[str, Any]], role_id: Union[str, uuid.UUID]) -> List[Dict[str, Any]]:
+        """
+        Inserta usuarios (contraseña ya hasheada) y su rol con un INSERT
+        multi-fila por tabla, sin cargar entidades. No pasa por los eventos
+        del ORM: completa aquí id y nombres normalizados. Devuelve las filas
+        insertadas, en el mismo orden.
+        """
+        from ..db.models.user_role import UserRole
+
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "name": user["name"],
+                "last_name": user["last_name"],
+                "name_normalized": normalize_name(user["name"]),
+                "last_name_normalized": normalize_name(user["last_name"]),
+                "email": user["email"],
+                "dni": user["dni"],
+                "password": user["password"],
+                "is_active": True,
+            }
+            for user in users
+        ]
+        if not rows:
+            return rows
+        normalized_role_id = self._normalize_id(role_id)
+        db.execute(insert(User.__table__).values(rows))
+        db.execute(insert(UserRole.__table__).values([
+            {"id": str(uuid.uuid4()), "user_id": row["id"], "role_id": normalized_role_id} for row in rows
+        ]))
+        return rows
+
+    def existing_emails(self, db: Session, emails: Iterable[str]) -> Set[str]:
+        """Emails de la lista que ya están registrados."""
+        return self.__existing(db, User.email, emails)
+
+    def existing_dnis(self, db: Session, dnis: Iterable[str]) -> Set[str]:
+        """DNIs de la lista que ya están registrados."""
+        return self.__existing(db, User.dni, dnis)
+
+    @staticmethod
+    def __existing(db: Session, column, values: Iterable[str]) -> Set[str]:
+        values = list(dict.fromkeys(values))
+        found: Set[str] = set()
+        for start in range(0, len(values), MAX_BATCH_SIZE):
+            found.update(db.scalars(select(column).where(column.in_(values[start:start + MAX_BATCH_SIZE]))))
+        return found
+
     def get_users_by_role_id(self, db: Session, role_id: Union[str, uuid.UUID]) -> List[User]:
         """
         Obtiene todos los usuarios que tienen un rol específico usando JOIN.
@@ -64,7 +161,7 @@ class UserRepo(BaseRepository[User]):
         normalized_role_id = self._normalize_id(role_id)
 
         return (
-            db.query(User)
+            self._query(db)
             .join(UserRole, User.id == UserRole.user_id)
             .filter(UserRole.role_id == normalized_role_id)
             .all()
@@ -84,8 +181,7 @@ class UserRepo(BaseRepository[User]):
                 setattr(db_obj, field, update_data[field])
         
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def delete(self, db: Session, *, id: Union[str, uuid.UUID]) -> User:
@@ -96,7 +192,7 @@ class UserRepo(BaseRepository[User]):
             raise ValueError("Usuario no encontrado para eliminar")
         
         db.delete(user)
-        db.commit()
+        db.flush()
         return user
     
     def delete_with_relations(self, db: Session, *, id: Union[str, uuid.UUID]) -> User:
@@ -118,11 +214,10 @@ class UserRepo(BaseRepository[User]):
                 db.flush()
 
             db.delete(user)
-            db.commit()
+            db.flush()
             return user
 
         except Exception as e:
-            db.rollback()
             raise RuntimeError(f"Error eliminando usuario y sus relaciones: {str(e)}")
 
 
@@ -134,7 +229,53 @@ class UserRepo(BaseRepository[User]):
             return None
         return user
     
+    def get_login_credentials(self, db: Session, *, email: str) -> Optional[LoginCredentials]:
+        """
+        Id, email, hash y roles del usuario en una sola consulta
+        (`LEFT JOIN user_roles`), sin cargar entidades.
+        """
+        from ..db.models.user_role import UserRole
+
+        rows = (
+            db.query(User.id, User.email, User.password, UserRole.role_id)
+            .outerjoin(UserRole, UserRole.user_id == User.id)
+            .filter(User.email == email)
+            .all()
+        )
+        if not rows:
+            return None
+        return LoginCredentials(
+            id=rows[0].id,
+            email=rows[0].email,
+            password=rows[0].password,
+            role_ids=[row.role_id for row in rows if row.role_id is not None]
+        )
+
+    def get_with_role_ids(self, db: Session, user_ids: Iterable[Union[str, uuid.UUID]]) -> Dict[str, UserWithRoleIds]:
+        """
+        Usuarios existentes con sus IDs de rol (`LEFT JOIN user_roles`), en
+        una consulta por cada `MAX_BATCH_SIZE` usuarios. Un ID ausente del
+        resultado no existe. Mientras el resultado se conserve, las
+        relaciones hacia estos usuarios se resuelven desde el identity map.
+        """
+        from ..db.models.user_role import UserRole
+
+        ids = list(dict.fromkeys(self._normalize_id(user_id) for user_id in user_ids))
+        found: Dict[str, UserWithRoleIds] = {}
+        for start in range(0, len(ids), MAX_BATCH_SIZE):
+            rows = (
+                db.query(User, UserRole.role_id)
+                .outerjoin(UserRole, UserRole.user_id == User.id)
+                .filter(User.id.in_(ids[start:start + MAX_BATCH_SIZE]))
+                .all()
+            )
+            for user, role_id in rows:
+                entry = found.setdefault(user.id, UserWithRoleIds(user=user, role_ids=set()))
+                if role_id is not None:
+                    entry.role_ids.add(role_id)
+        return found
+
     def get_multiple_by_ids(self, db: Session, user_ids: List[Union[str, uuid.UUID]]) -> List[User]:
         """Obtiene múltiples usuarios por sus UUIDs (acepta strings o UUIDs)"""
         normalized_ids = [self._normalize_id(user_id) for user_id in user_ids]
-        return db.query(User).filter(User.id.in_(normalized_ids)).all()    
+        return self._query(db).filter(User.id.in_(normalized_ids)).all()    
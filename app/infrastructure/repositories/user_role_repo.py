@@ -32,8 +32,7 @@ class UserRoleRepo(BaseRepository[UserRole]):
         
         db_user_role = UserRole(**create_data)
         db.add(db_user_role)
-        db.commit()
-        db.refresh(db_user_role)
+        db.flush()
         return db_user_role
     
     def get_by_user_id(self, db: Session, user_id: Union[str, uuid.UUID]) -> List[UserRole]:
@@ -52,8 +51,7 @@ class UserRoleRepo(BaseRepository[UserRole]):
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
         return db_obj
 
     def delete(self, db: Session, *, id: Union[str, uuid.UUID]) -> UserRole:
@@ -63,7 +61,7 @@ class UserRoleRepo(BaseRepository[UserRole]):
         if not db_user_role:
             raise ValueError("UserRole not found")
         db.delete(db_user_role)
-        db.commit()
+        db.flush()
         return db_user_role
 
     def get_by_user_and_role(self, db: Session, user_id: Union[str, uuid.UUID], role_id: Union[str, uuid.UUID]) -> Optional[UserRole]:
@@ -0,0 +1,7 @@
+from .name_search import (
+    NameMatch,
+    NameSearchBackend,
+    MySQLFulltextNameSearch,
+    TrigramNameSearch,
+    get_name_search_backend,
+)
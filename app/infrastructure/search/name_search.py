@@ -0,0 +1,226 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from loguru import logger as log
+from sqlalchemy import event, literal, or_, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+from ...core.text_normalization import name_tokens
+from ..db.models.user import User
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    user_id: str
+    score: float
+
+
+class NameSearchBackend(ABC):
+    """
+    Búsqueda de usuarios por nombre y apellido normalizados, ordenada por
+    relevancia. `scope` restringe los resultados a los IDs de una subconsulta
+    (ej. solo pacientes con estudios).
+    """
+
+    def add(self, user_id: str, name_normalized: str, last_name_normalized: str) -> None:
+        """
+        Registra un usuario insertado sin pasar por el ORM (import masivo).
+        Los backends indexados por la base no necesitan hacer nada.
+        """
+
+    @abstractmethod
+    def search(
+        self,
+        db: Session,
+        query: str,
+        *,
+        limit: int,
+        offset: int = 0,
+        scope=None
+    ) -> List[NameMatch]:
+        ...
+
+
+class MySQLFulltextNameSearch(NameSearchBackend):
+    """
+    Usa el índice FULLTEXT con parser ngram `ft_users_name_search`.
+    Cada palabra de la consulta debe aparecer como frase; las palabras más
+    cortas que el ngram (iniciales) no están indexadas y, si la consulta
+    solo tiene esas, se busca por prefijo sobre el índice B-tree.
+    """
+
+    def search(self, db: Session, query: str, *, limit: int, offset: int = 0, scope=None) -> List[NameMatch]:
+        tokens = name_tokens(query)
+        if not tokens:
+            return []
+
+        indexed = [t for t in tokens if len(t) >= settings.NAME_SEARCH_NGRAM_SIZE]
+        if indexed:
+            against = " ".join(f'+"{t}"' for t in indexed)
+            relevance = match(User.name_normalized, User.last_name_normalized, against=against).in_boolean_mode()
+            stmt = select(User.id, relevance.label("score")).where(relevance)
+            order = (relevance.desc(), User.id)
+        else:
+            prefix = f"{tokens[0]}%"
+            stmt = select(User.id, literal(1.0).label("score")).where(
+                or_(User.last_name_normalized.like(prefix), User.name_normalized.like(prefix))
+            )
+            order = (User.last_name_normalized, User.name_normalized, User.id)
+
+        if scope is not None:
+            stmt = stmt.where(User.id.in_(scope))
+        rows = db.execute(stmt.order_by(*order).offset(offset).limit(limit)).all()
+        return [NameMatch(user_id=row.id, score=float(row.score)) for row in rows]
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a: Set[str], b: Set[str]) -> float:
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared) if shared else 0.0
+
+
+class TrigramNameSearch(NameSearchBackend):
+    """
+    Índice de trigramas en memoria para desarrollo (sin FULLTEXT).
+    Se construye desde la base en el primer uso, se mantiene con los eventos
+    del modelo `User` de este proceso y se reconstruye cada
+    `NAME_SEARCH_TRIGRAM_TTL_SECONDS` para ver cambios de otros procesos.
+    """
+
+    _SCOPE_CHUNK = 500
+
+    def __init__(self, ttl_seconds: Optional[int] = None, min_similarity: Optional[float] = None):
+        self.__ttl = settings.NAME_SEARCH_TRIGRAM_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.__min_similarity = (
+            settings.NAME_SEARCH_MIN_SIMILARITY if min_similarity is None else min_similarity
+        )
+        self.__lock = threading.RLock()
+        self.__postings: Dict[str, Set[str]] = defaultdict(set)
+        self.__words: Dict[str, List[str]] = {}
+        self.__built_at: Optional[float] = None
+
+    def add(self, user_id: str, name_normalized: str, last_name_normalized: str) -> None:
+        with self.__lock:
+            if self.__built_at is None:
+                return
+            self.__remove(user_id)
+            words = list(dict.fromkeys(f"{name_normalized} {last_name_normalized}".split()))
+            self.__words[user_id] = words
+            for word in words:
+                for gram in _trigrams(word):
+                    self.__postings[gram].add(user_id)
+
+    def remove(self, user_id: str) -> None:
+        with self.__lock:
+            self.__remove(user_id)
+
+    def __remove(self, user_id: str) -> None:
+        for word in self.__words.pop(user_id, []):
+            for gram in _trigrams(word):
+                self.__postings[gram].discard(user_id)
+
+    def __ensure_built(self, db: Session) -> None:
+        with self.__lock:
+            if self.__built_at is not None and time.monotonic() - self.__built_at < self.__ttl:
+                return
+            start = time.perf_counter()
+            self.__postings = defaultdict(set)
+            self.__words = {}
+            self.__built_at = time.monotonic()
+            rows = db.execute(
+                select(User.id, User.name_normalized, User.last_name_normalized)
+                .execution_options(yield_per=5000)
+            )
+            for user_id, name, last_name in rows:
+                self.add(user_id, name or "", last_name or "")
+            log.info(
+                f"Trigram name index built with {len(self.__words)} users "
+                f"in {time.perf_counter() - start:.2f}s (TrigramNameSearch)"
+            )
+
+    def __score(self, tokens: List[str], words: Iterable[str]) -> float:
+        word_grams = [_trigrams(w) for w in words]
+        if not word_grams:
+            return 0.0
+        total = 0.0
+        for token in tokens:
+            token_grams = _trigrams(token)
+            total += max(_similarity(token_grams, grams) for grams in word_grams)
+        return total / len(tokens)
+
+    def __in_scope(self, db: Session, user_ids: List[str], scope) -> Set[str]:
+        allowed: Set[str] = set()
+        for i in range(0, len(user_ids), self._SCOPE_CHUNK):
+            chunk = user_ids[i:i + self._SCOPE_CHUNK]
+            allowed.update(db.scalars(select(User.id).where(User.id.in_(chunk), User.id.in_(scope))))
+        return allowed
+
+    def search(self, db: Session, query: str, *, limit: int, offset: int = 0, scope=None) -> List[NameMatch]:
+        tokens = name_tokens(query)
+        if not tokens:
+            return []
+        self.__ensure_built(db)
+
+        with self.__lock:
+            candidates: Set[str] = set()
+            for token in tokens:
+                for gram in _trigrams(token):
+                    candidates.update(self.__postings.get(gram, ()))
+            scored = [
+                NameMatch(user_id=user_id, score=self.__score(tokens, self.__words.get(user_id, ())))
+                for user_id in candidates
+            ]
+
+        ranked = sorted(
+            (m for m in scored if m.score >= self.__min_similarity),
+            key=lambda m: (-m.score, m.user_id)
+        )
+        if scope is not None:
+            allowed = self.__in_scope(db, [m.user_id for m in ranked], scope)
+            ranked = [m for m in ranked if m.user_id in allowed]
+        return ranked[offset:offset + limit]
+
+
+_backend: Optional[NameSearchBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _register_trigram_listeners(index: TrigramNameSearch) -> None:
+    def _upsert(mapper, connection, target: User) -> None:
+        index.add(target.id, target.name_normalized or "", target.last_name_normalized or "")
+
+    def _delete(mapper, connection, target: User) -> None:
+        index.remove(target.id)
+
+    event.listen(User, "after_insert", _upsert)
+    event.listen(User, "after_update", _upsert)
+    event.listen(User, "after_delete", _delete)
+
+
+def get_name_search_backend() -> NameSearchBackend:
+    """Devuelve el backend configurado en `NAME_SEARCH_BACKEND` (una instancia por proceso)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_name = settings.NAME_SEARCH_BACKEND.lower()
+                if backend_name == "mysql":
+                    _backend = MySQLFulltextNameSearch()
+                elif backend_name == "trigram":
+                    index = TrigramNameSearch()
+                    _register_trigram_listeners(index)
+                    _backend = index
+                else:
+                    raise ValueError(f"Unknown NAME_SEARCH_BACKEND: {settings.NAME_SEARCH_BACKEND}")
+                log.info(f"Name search backend: {backend_name}")
+    return _backend
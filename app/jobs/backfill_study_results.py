@@ -0,0 +1,72 @@
+"""
+Backfill de `study_results` para estudios diagnosticados antes de que existiera
+la tabla. Descifra cada `ml_results` una única vez y escribe las filas por lotes.
+
+Uso:
+    python -m app.jobs.backfill_study_results --batch-size 500
+"""
+import argparse
+from loguru import logger as log
+
+from ..core.db import BackgroundSessionLocal
+from ..core.results_codec import decode_results
+from ..infrastructure.repositories.study_result_repo import StudyResultRepo
+from ..services.study_result_service import build_study_result_row
+
+
+def backfill(batch_size: int = 500, model_version: str = None) -> int:
+    repo = StudyResultRepo()
+    total = 0
+    skipped = 0
+    last_id = None
+
+    while True:
+        db = BackgroundSessionLocal()
+        try:
+            studies = repo.get_studies_without_result(db, after_id=last_id, limit=batch_size)
+            if not studies:
+                break
+
+            rows = []
+            for study in studies:
+                try:
+                    verdict = decode_results(study.ml_results)
+                except Exception as e:
+                    log.warning(f"Could not decode ml_results for study {study.id}: {e}")
+                    verdict = None
+                if not isinstance(verdict, dict):
+                    skipped += 1
+                    continue
+                rows.append(build_study_result_row(
+                    study.id,
+                    verdict,
+                    diagnosed_at=study.updated_at or study.created_at,
+                    model_version=model_version
+                ))
+
+            repo.bulk_create(db, rows=rows)
+            db.commit()
+            total += len(rows)
+            last_id = studies[-1].id
+            log.info(f"Backfilled {total} study results so far ({skipped} skipped)")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    log.success(f"Backfill finished: {total} study results created, {skipped} skipped")
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill de la tabla study_results")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--model-version", default=None,
+                        help="Versión de modelos a registrar (por defecto MODELS_VERSION)")
+    args = parser.parse_args()
+    backfill(batch_size=args.batch_size, model_version=args.model_version)
+
+
+if __name__ == "__main__":
+    main()
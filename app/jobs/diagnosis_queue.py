@@ -0,0 +1,351 @@
+"""
+Cola de los diagnósticos en segundo plano. El request que envía el
+diagnóstico solo valida, deja el estudio en `PROCESSING` y encola; el
+resto (archivo, inferencia, SHAP y escrituras) corre en un worker y el
+cliente consulta el estado del trabajo. `DIAGNOSIS_JOB_BACKEND` elige dónde:
+
+- `memory`: un pool de `DIAGNOSIS_JOB_WORKERS` hilos en el proceso de la
+  API. El orden lo decide el scheduler de inferencias (prioridad y turnos
+  por usuario), compartido con los diagnósticos síncronos y por lote.
+  Los trabajos viven en memoria: con varios workers de uvicorn cada uno
+  ve solo los suyos, y si el proceso muere sin apagarse, sus estudios
+  quedan en `PROCESSING`.
+- `database`: la tabla `diagnosis_jobs`, que consumen los procesos de
+  `python -m app.jobs.diagnosis_worker` en uno o varios hosts, los más
+  urgentes primero.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger as log
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.inference_scheduler import PRIORITY_CLASSES, ROUTINE, InferenceScheduler, SchedulerTicket, get_inference_scheduler, priority_rank
+from ..core.metrics import DIAGNOSIS_JOB_DURATION, DIAGNOSIS_JOB_QUEUE_WAIT, DIAGNOSIS_JOBS, DIAGNOSIS_JOBS_IN_FLIGHT
+from ..core.unit_of_work import after_commit
+from ..infrastructure.db.models.diagnosis_job import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, DiagnosisJobRecord
+from ..infrastructure.repositories.diagnosis_job_repo import DiagnosisJobRepo, utcnow
+
+
+@dataclass
+class DiagnosisJob:
+    """Un diagnóstico pendiente y su estado; `result` al terminar bien."""
+    study_id: str
+    user_id: str
+    filename: str
+    content: bytes = field(default=b"", repr=False)
+    priority: str = ROUTINE
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = QUEUED
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Any = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED, CANCELLED)
+
+
+class DiagnosisJobBackend(ABC):
+    """
+    Dónde se encolan y consultan los trabajos. `run` ejecuta un trabajo y
+    devuelve el estudio diagnosticado; `release` devuelve a `PENDING` el
+    estudio de un trabajo que no llegó a ejecutarse.
+    """
+
+    @abstractmethod
+    def has_capacity(self, db: Session) -> bool:
+        """Si hay menos de `DIAGNOSIS_JOB_MAX_PENDING` trabajos sin terminar."""
+
+    @abstractmethod
+    def enqueue(
+        self,
+        db: Session,
+        job: DiagnosisJob,
+        run: Callable[[DiagnosisJob], Any],
+        release: Callable[[DiagnosisJob], None],
+    ) -> None:
+        """Encola el trabajo como parte de la transacción de `db`."""
+
+    @abstractmethod
+    def get(self, db: Session, job_id: str) -> Optional[DiagnosisJob]:
+        ...
+
+    @abstractmethod
+    async def wait(self, db: Session, job: DiagnosisJob, timeout: float) -> DiagnosisJob:
+        """Espera a que el trabajo termine, como máximo `timeout` segundos."""
+
+    def shutdown(self) -> None:
+        """Libera los recursos del backend (shutdown de la aplicación)."""
+
+
+class InProcessDiagnosisQueue(DiagnosisJobBackend):
+    """
+    Pool de hilos y registro de trabajos en memoria. Un trabajo pasa al
+    pool cuando el scheduler de inferencias le da un slot. Los trabajos que
+    no llegan a ejecutarse (cola llena o apagado) liberan su estudio con
+    `release`.
+    """
+
+    def __init__(self, workers: int, max_pending: int, retention_seconds: int, scheduler: Optional[InferenceScheduler] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="diagnosis-job")
+        self._scheduler = scheduler or get_inference_scheduler()
+        self._max_pending = max_pending
+        self._retention_seconds = retention_seconds
+        self._jobs: Dict[str, DiagnosisJob] = {}
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
+
+    def has_capacity(self, db: Session) -> bool:
+        return self.pending() < self._max_pending
+
+    def enqueue(self, db: Session, job: DiagnosisJob, run: Callable[[DiagnosisJob], Any], release: Callable[[DiagnosisJob], None]) -> None:
+        # Al confirmar: el worker nunca ve el estudio antes de `PROCESSING`.
+        after_commit(db, partial(self.submit, job, run, release))
+
+    def submit(
+        self,
+        job: DiagnosisJob,
+        run: Callable[[DiagnosisJob], Any],
+        release: Callable[[DiagnosisJob], None],
+    ) -> DiagnosisJob:
+        """
+        Registra el trabajo y lo pone en la cola del scheduler. Se llama
+        tras confirmar el estudio en `PROCESSING`, así que no lanza: si la
+        cola se llenó entretanto o ya se apagó, el trabajo queda `failed` y
+        se libera el estudio.
+        """
+        with self._lock:
+            self._prune()
+            full = sum(1 for queued in self._jobs.values() if not queued.done) >= self._max_pending
+            closed = self._closed
+            self._jobs[job.id] = job
+        if full:
+            self._reject(job, release, "Diagnosis queue is full, submit the study again later.")
+            return job
+        if closed:
+            self._reject(job, release, "Diagnosis queue is shut down, submit the study again later.")
+            return job
+        job.future = Future()
+        job.future.add_done_callback(lambda future: self._on_done(job, future, release))
+        DIAGNOSIS_JOBS_IN_FLIGHT.labels(QUEUED).inc()
+        self._scheduler.submit(
+            partial(self._dispatch, job, run, time.perf_counter()),
+            user_id=job.user_id,
+            priority=job.priority
+        )
+        return job
+
+    def get(self, db: Session, job_id: str) -> Optional[DiagnosisJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, db: Session, job: DiagnosisJob, timeout: float) -> DiagnosisJob:
+        if not job.done and job.future is not None and timeout > 0:
+            await asyncio.wait({asyncio.wrap_future(job.future)}, timeout=timeout)
+        return job
+
+    def shutdown(self) -> None:
+        """Cancela los trabajos que no empezaron y espera a los que están en ejecución."""
+        with self._lock:
+            self._closed = True
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.future is not None:
+                # Solo cancela los que no empezaron; sus slots se liberan al tocarles el turno.
+                job.future.cancel()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _dispatch(self, job: DiagnosisJob, run: Callable[[DiagnosisJob], Any], queued_at: float, ticket: SchedulerTicket) -> None:
+        try:
+            self._executor.submit(self._execute, job, run, queued_at, ticket)
+        except RuntimeError:
+            # Pool apagado: el trabajo ya fue cancelado en `shutdown`.
+            self._scheduler.finish(ticket)
+            job.future.cancel()
+
+    def _execute(self, job: DiagnosisJob, run: Callable[[DiagnosisJob], Any], queued_at: float, ticket: SchedulerTicket) -> None:
+        try:
+            if not job.future.set_running_or_notify_cancel():
+                return
+            started = time.perf_counter()
+            DIAGNOSIS_JOB_QUEUE_WAIT.labels(job.priority).observe(started - queued_at)
+            DIAGNOSIS_JOBS_IN_FLIGHT.labels(QUEUED).dec()
+            DIAGNOSIS_JOBS_IN_FLIGHT.labels(RUNNING).inc()
+            job.status = RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            try:
+                result = run(job)
+            except BaseException as e:
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+            finally:
+                DIAGNOSIS_JOBS_IN_FLIGHT.labels(RUNNING).dec()
+                DIAGNOSIS_JOB_DURATION.observe(time.perf_counter() - started)
+        finally:
+            self._scheduler.finish(ticket)
+
+    @staticmethod
+    def _on_done(job: DiagnosisJob, future: Future, release: Callable[[DiagnosisJob], None]) -> None:
+        job.content = b""
+        job.finished_at = datetime.now(timezone.utc)
+        # El estado se asigna al final: `done` implica `finished_at` y `result`.
+        if future.cancelled():
+            DIAGNOSIS_JOBS_IN_FLIGHT.labels(QUEUED).dec()
+            job.error = "Diagnosis cancelled: the server shut down before running it."
+            try:
+                release(job)
+            except Exception as e:
+                log.error(f"Could not release study {job.study_id} of cancelled job {job.id}: {e}")
+            job.status = CANCELLED
+        elif future.exception() is not None:
+            error = future.exception()
+            job.error = str(getattr(error, "detail", None) or error)
+            job.status = FAILED
+        else:
+            job.result = future.result()
+            job.status = SUCCEEDED
+        DIAGNOSIS_JOBS.labels(job.status).inc()
+
+    @staticmethod
+    def _reject(job: DiagnosisJob, release: Callable[[DiagnosisJob], None], error: str) -> None:
+        job.content = b""
+        job.finished_at = datetime.now(timezone.utc)
+        job.error = error
+        try:
+            release(job)
+        except Exception as e:
+            log.error(f"Could not release study {job.study_id} of rejected job {job.id}: {e}")
+        job.status = FAILED
+        DIAGNOSIS_JOBS.labels("rejected").inc()
+
+    def _prune(self) -> None:
+        now = datetime.now(timezone.utc)
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and (now - job.finished_at).total_seconds() > self._retention_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class DatabaseDiagnosisQueue(DiagnosisJobBackend):
+    """
+    Encola en `diagnosis_jobs`, en la misma transacción que pasa el estudio
+    a `PROCESSING`. Los ejecutan los procesos `app.jobs.diagnosis_worker`;
+    la API solo inserta y consulta.
+    """
+
+    def __init__(self, max_pending: int, poll_seconds: float, repo: Optional[DiagnosisJobRepo] = None):
+        self._max_pending = max_pending
+        self._poll_seconds = poll_seconds
+        self._repo = repo or DiagnosisJobRepo()
+
+    def has_capacity(self, db: Session) -> bool:
+        return self._repo.count_unfinished(db) < self._max_pending
+
+    def enqueue(self, db: Session, job: DiagnosisJob, run: Callable[[DiagnosisJob], Any], release: Callable[[DiagnosisJob], None]) -> None:
+        self._repo.create(db, obj_in={
+            "id": job.id,
+            "study_id": job.study_id,
+            "user_id": job.user_id,
+            "status": QUEUED,
+            "priority": priority_rank(job.priority),
+            "filename": job.filename,
+            "payload": job.content,
+            "attempts": 0,
+            "available_at": utcnow(),
+        })
+
+    def get(self, db: Session, job_id: str) -> Optional[DiagnosisJob]:
+        record = self._repo.get(db, id=job_id)
+        return job_from_record(record) if record else None
+
+    async def wait(self, db: Session, job: DiagnosisJob, timeout: float) -> DiagnosisJob:
+        deadline = time.monotonic() + timeout
+        while not job.done:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(self._poll_seconds, remaining))
+            job = await run_in_threadpool(self.__refresh, db, job)
+        return job
+
+    def __refresh(self, db: Session, job: DiagnosisJob) -> DiagnosisJob:
+        # Termina la transacción de lectura: con REPEATABLE READ la
+        # siguiente consulta vería la misma foto.
+        db.rollback()
+        return self.get(db, job.id) or job
+
+
+def job_from_record(record: DiagnosisJobRecord, *, with_payload: bool = False) -> DiagnosisJob:
+    return DiagnosisJob(
+        id=record.id,
+        study_id=record.study_id,
+        user_id=record.user_id,
+        filename=record.filename,
+        content=record.payload if with_payload else b"",
+        priority=PRIORITY_CLASSES[record.priority],
+        status=record.status,
+        attempts=record.attempts,
+        error=record.error,
+        created_at=record.created_at,
+        started_at=record.started_at,
+        finished_at=record.finished_at
+    )
+
+
+_backend: Optional[DiagnosisJobBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_diagnosis_job_backend() -> DiagnosisJobBackend:
+    """Devuelve el backend configurado en `DIAGNOSIS_JOB_BACKEND` (una instancia por proceso)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_name = settings.DIAGNOSIS_JOB_BACKEND.lower()
+                if backend_name == "memory":
+                    _backend = InProcessDiagnosisQueue(
+                        workers=settings.DIAGNOSIS_JOB_WORKERS,
+                        max_pending=settings.DIAGNOSIS_JOB_MAX_PENDING,
+                        retention_seconds=settings.DIAGNOSIS_JOB_RETENTION_SECONDS
+                    )
+                elif backend_name == "database":
+                    _backend = DatabaseDiagnosisQueue(
+                        max_pending=settings.DIAGNOSIS_JOB_MAX_PENDING,
+                        poll_seconds=settings.DIAGNOSIS_JOB_POLL_SECONDS
+                    )
+                else:
+                    raise ValueError(f"Unknown DIAGNOSIS_JOB_BACKEND: {settings.DIAGNOSIS_JOB_BACKEND}")
+                log.info(f"Diagnosis job backend: {backend_name}")
+    return _backend
+
+
+def shutdown_diagnosis_job_backend() -> None:
+    """Apaga el backend si se llegó a crear (shutdown de la aplicación)."""
+    global _backend
+    with _backend_lock:
+        backend, _backend = _backend, None
+    if backend is not None:
+        backend.shutdown()
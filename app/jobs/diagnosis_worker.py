@@ -0,0 +1,279 @@
+"""
+Worker de la cola durable de diagnósticos (`DIAGNOSIS_JOB_BACKEND=database`).
+Se pueden correr tantos procesos como se quiera, en uno o varios hosts,
+contra la misma base: cada uno toma trabajos de `diagnosis_jobs` con
+`SELECT ... FOR UPDATE SKIP LOCKED` (sin bloquearse entre sí), los retiene
+con un lease que renueva cada `DIAGNOSIS_JOB_HEARTBEAT_SECONDS` y, si otro
+worker muere, devuelve a la cola sus trabajos cuando el lease vence.
+
+Cada proceso usa el pool `background`: DB_BACKGROUND_POOL_SIZE +
+DB_BACKGROUND_MAX_OVERFLOW debe ser al menos `--concurrency` + 2.
+Las horas de los leases son las del host (UTC): los relojes deben estar
+sincronizados con holgura bastante menor que DIAGNOSIS_JOB_LEASE_SECONDS.
+
+Uso:
+    python -m app.jobs.diagnosis_worker --concurrency 2 --metrics-port 9101
+"""
+import argparse
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import Callable, Dict, List
+
+from loguru import logger as log
+from prometheus_client import start_http_server
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.db import BackgroundSessionLocal
+from ..core.db_retry import is_transient_db_error, retry_transient
+from ..core.inference_scheduler import PRIORITY_CLASSES
+from ..core.metrics import DIAGNOSIS_JOB_DURATION, DIAGNOSIS_JOB_LEASES_EXPIRED, DIAGNOSIS_JOB_QUEUE_WAIT, DIAGNOSIS_JOBS, DIAGNOSIS_JOBS_IN_FLIGHT
+from ..core.unit_of_work import UnitOfWork
+from ..infrastructure.db.models.diagnosis_job import FAILED, QUEUED, RUNNING, SUCCEEDED
+from ..infrastructure.repositories.diagnosis_job_repo import DiagnosisJobRepo, utcnow
+from ..infrastructure.repositories.file_manager_repo import FileStorageRepo
+from ..infrastructure.repositories.medical_study_repo import MedicalStudyRepo
+from ..infrastructure.repositories.study_result_repo import StudyResultRepo
+from ..infrastructure.repositories.user_repo import UserRepo
+from ..services.diagnose_service import DiagnoseService
+from ..services.file_manager_service import FileStorageService
+from ..services.medical_study_service import MedicalStudyService
+from ..services.study_result_service import StudyResultService
+from .diagnosis_queue import DiagnosisJob, job_from_record
+
+# Trabajos vencidos o terminados que se procesan por transacción de mantenimiento.
+MAINTENANCE_BATCH_SIZE = 100
+
+
+class LeaseLostError(Exception):
+    """El lease del trabajo venció y lo tomó otro worker."""
+
+
+class DiagnosisWorker:
+    def __init__(
+        self,
+        diagnose_service: DiagnoseService,
+        study_service: MedicalStudyService,
+        *,
+        concurrency: int,
+        session_factory: Callable[[], Session] = BackgroundSessionLocal,
+        repo: DiagnosisJobRepo = None
+    ):
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.__diagnose_service = diagnose_service
+        self.__study_service = study_service
+        self.__session_factory = session_factory
+        self.__repo = repo or DiagnosisJobRepo()
+        self.__concurrency = max(1, concurrency)
+        self.__running: Dict[str, DiagnosisJob] = {}
+        self.__lock = threading.Lock()
+        self.__stopping = threading.Event()
+        self.__drained = threading.Event()
+        self.__slot_freed = threading.Event()
+
+    def stop(self) -> None:
+        """Deja de tomar trabajos; los que están corriendo terminan."""
+        self.__stopping.set()
+
+    def run(self) -> None:
+        log.info(f"Diagnosis worker {self.id} started with {self.__concurrency} slots")
+        heartbeat = threading.Thread(target=self.__heartbeat, name="diagnosis-heartbeat", daemon=True)
+        heartbeat.start()
+        next_maintenance = 0.0
+        try:
+            with ThreadPoolExecutor(max_workers=self.__concurrency, thread_name_prefix="diagnosis-worker") as pool:
+                while not self.__stopping.is_set():
+                    if time.monotonic() >= next_maintenance:
+                        self.__maintenance()
+                        next_maintenance = time.monotonic() + settings.DIAGNOSIS_JOB_LEASE_SECONDS / 2
+
+                    with self.__lock:
+                        free = self.__concurrency - len(self.__running)
+                    if free <= 0:
+                        self.__slot_freed.wait(settings.DIAGNOSIS_JOB_POLL_SECONDS)
+                        self.__slot_freed.clear()
+                        continue
+
+                    jobs = self.__claim(free)
+                    for job in jobs:
+                        pool.submit(self.__execute, job)
+                    if not jobs:
+                        # Con jitter, para que los workers ociosos no consulten a la vez.
+                        self.__stopping.wait(settings.DIAGNOSIS_JOB_POLL_SECONDS * random.uniform(0.5, 1.5))
+                log.info(f"Diagnosis worker {self.id} stopping, waiting for {len(self.__running)} running jobs")
+        finally:
+            self.__drained.set()
+            heartbeat.join()
+        log.info(f"Diagnosis worker {self.id} stopped")
+
+    def __claim(self, limit: int) -> List[DiagnosisJob]:
+        def claim():
+            with UnitOfWork(self.__session_factory) as db:
+                records = self.__repo.claim(
+                    db, worker_id=self.id, limit=limit, lease_seconds=settings.DIAGNOSIS_JOB_LEASE_SECONDS
+                )
+                for record in records:
+                    DIAGNOSIS_JOB_QUEUE_WAIT.labels(PRIORITY_CLASSES[record.priority]).observe(
+                        max(0.0, (record.started_at - record.available_at).total_seconds())
+                    )
+                return [job_from_record(record, with_payload=True) for record in records]
+        try:
+            jobs = retry_transient(claim, operation="diagnosis_job_claim")
+        except Exception as e:
+            log.error(f"Could not claim diagnosis jobs (worker {self.id}): {e}")
+            return []
+        with self.__lock:
+            for job in jobs:
+                self.__running[job.id] = job
+        DIAGNOSIS_JOBS_IN_FLIGHT.labels(RUNNING).inc(len(jobs))
+        return jobs
+
+    def __execute(self, job: DiagnosisJob) -> None:
+        started = time.perf_counter()
+        # Veces que se tomó el trabajo; persist_job suma a job.attempts sus reintentos locales.
+        claims = job.attempts
+        try:
+            self.__diagnose_service.persist_job(
+                job, self.__diagnose_service.diagnose_job(job), fence=partial(self.__fence, job)
+            )
+            DIAGNOSIS_JOBS.labels(SUCCEEDED).inc()
+            log.success(f"Diagnosis job {job.id} completed for study {job.study_id} (worker {self.id})")
+        except LeaseLostError as e:
+            # Otro worker lo tomó: él decide el resultado.
+            log.warning(str(e))
+        except Exception as e:
+            self.__fail(job, e, claims)
+        finally:
+            job.content = b""
+            DIAGNOSIS_JOB_DURATION.observe(time.perf_counter() - started)
+            DIAGNOSIS_JOBS_IN_FLIGHT.labels(RUNNING).dec()
+            with self.__lock:
+                self.__running.pop(job.id, None)
+            self.__slot_freed.set()
+
+    def __fence(self, job: DiagnosisJob, db: Session) -> None:
+        if not self.__repo.finish(db, id=job.id, worker_id=self.id, status=SUCCEEDED):
+            raise LeaseLostError(f"Lease of diagnosis job {job.id} lost, discarding its result (worker {self.id})")
+
+    def __fail(self, job: DiagnosisJob, error: Exception, claims: int) -> None:
+        """
+        Errores transitorios: el trabajo vuelve a la cola con backoff
+        mientras queden intentos. Los demás (CSV, modelos, estudio que ya
+        no está en `PROCESSING`) lo dan por fallido y liberan el estudio.
+        """
+        message = str(getattr(error, "detail", None) or error)
+        requeue = is_transient_db_error(error) and claims < settings.DIAGNOSIS_JOB_MAX_ATTEMPTS
+
+        def record():
+            with UnitOfWork(self.__session_factory) as db:
+                if requeue:
+                    delay = min(settings.DIAGNOSIS_JOB_LEASE_SECONDS, 2 ** claims)
+                    return self.__repo.requeue(db, id=job.id, worker_id=self.id, error=message, delay_seconds=delay)
+                if self.__repo.finish(db, id=job.id, worker_id=self.id, status=FAILED, error=message):
+                    self.__study_service.transition_status(
+                        db, study_id=job.study_id, from_status="PROCESSING", to_status="PENDING"
+                    )
+                    return True
+                return False
+
+        try:
+            held = retry_transient(record, operation="diagnosis_job_fail")
+        except Exception as e:
+            log.error(f"Could not record failure of diagnosis job {job.id} (worker {self.id}): {e}")
+            return
+        if not held:
+            log.warning(f"Lease of diagnosis job {job.id} lost before recording its failure (worker {self.id})")
+            return
+        DIAGNOSIS_JOBS.labels(QUEUED if requeue else FAILED).inc()
+        log.error(f"Diagnosis job {job.id} {'requeued' if requeue else 'failed'} (attempt {claims}, worker {self.id}): {message}")
+
+    def __heartbeat(self) -> None:
+        while not self.__drained.wait(settings.DIAGNOSIS_JOB_HEARTBEAT_SECONDS):
+            with self.__lock:
+                ids = set(self.__running)
+            if not ids:
+                continue
+            try:
+                with UnitOfWork(self.__session_factory) as db:
+                    held = self.__repo.renew_leases(
+                        db, ids=ids, worker_id=self.id, lease_seconds=settings.DIAGNOSIS_JOB_LEASE_SECONDS
+                    )
+            except Exception as e:
+                log.error(f"Could not renew diagnosis job leases (worker {self.id}): {e}")
+                continue
+            for job_id in ids - held:
+                with self.__lock:
+                    still_running = job_id in self.__running
+                if still_running:
+                    log.warning(f"Lease of diagnosis job {job_id} lost (worker {self.id})")
+
+    def __maintenance(self) -> None:
+        """Devuelve a la cola los trabajos con lease vencido y borra los terminados hace más de la retención."""
+        try:
+            with UnitOfWork(self.__session_factory) as db:
+                for record in self.__repo.get_expired(db, limit=MAINTENANCE_BATCH_SIZE):
+                    log.warning(f"Diagnosis job {record.id} lease held by {record.locked_by} expired (attempt {record.attempts})")
+                    if record.attempts >= settings.DIAGNOSIS_JOB_MAX_ATTEMPTS:
+                        record.status = FAILED
+                        record.error = f"Worker stopped responding, gave up after {record.attempts} attempts."
+                        record.payload = None
+                        record.finished_at = utcnow()
+                        self.__study_service.transition_status(
+                            db, study_id=record.study_id, from_status="PROCESSING", to_status="PENDING"
+                        )
+                        DIAGNOSIS_JOB_LEASES_EXPIRED.labels(FAILED).inc()
+                    else:
+                        record.status = QUEUED
+                        record.available_at = utcnow()
+                        DIAGNOSIS_JOB_LEASES_EXPIRED.labels("requeued").inc()
+                    record.locked_by = None
+                    record.lease_expires_at = None
+                db.flush()
+
+            with UnitOfWork(self.__session_factory) as db:
+                before = utcnow() - timedelta(seconds=settings.DIAGNOSIS_JOB_RETENTION_SECONDS)
+                self.__repo.delete_finished(db, before=before, limit=MAINTENANCE_BATCH_SIZE)
+        except Exception as e:
+            log.error(f"Diagnosis job maintenance failed (worker {self.id}): {e}")
+
+
+def build_worker(concurrency: int) -> DiagnosisWorker:
+    study_service = MedicalStudyService(medical_study_repo=MedicalStudyRepo(), user_repo=UserRepo())
+    diagnose_service = DiagnoseService(
+        study_service=study_service,
+        file_service=FileStorageService(file_storage_repo=FileStorageRepo()),
+        study_result_service=StudyResultService(study_result_repo=StudyResultRepo())
+    )
+    return DiagnosisWorker(diagnose_service, study_service, concurrency=concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker de la cola durable de diagnósticos")
+    parser.add_argument("--concurrency", type=int, default=settings.DIAGNOSIS_JOB_WORKERS,
+                        help="Diagnósticos en paralelo en este proceso (por defecto DIAGNOSIS_JOB_WORKERS)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Expone las métricas Prometheus del worker en este puerto")
+    args = parser.parse_args()
+
+    pool_capacity = settings.DB_BACKGROUND_POOL_SIZE + settings.DB_BACKGROUND_MAX_OVERFLOW
+    if pool_capacity < args.concurrency + 2:
+        log.warning(f"Background DB pool ({pool_capacity} connections) is smaller than concurrency + 2 ({args.concurrency + 2})")
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+
+    worker = build_worker(args.concurrency)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: worker.stop())
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Borra las respuestas de `idempotency_keys` ya vencidas
+(`IDEMPOTENCY_KEY_TTL_SECONDS`). Pensado para correr periódicamente (cron).
+
+Uso:
+    python -m app.jobs.purge_idempotency_keys --batch-size 500
+"""
+import argparse
+from loguru import logger as log
+
+from ..infrastructure.repositories.idempotency_key_repo import IdempotencyKeyRepo
+from ..services.idempotency_service import IdempotencyService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Limpieza de la tabla idempotency_keys")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    deleted = IdempotencyService(idempotency_key_repo=IdempotencyKeyRepo()).purge_expired(batch_size=args.batch_size)
+    log.success(f"Purged {deleted} expired idempotency keys")
+
+
+if __name__ == "__main__":
+    main()
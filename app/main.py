@@ -3,7 +3,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .core.config import settings
-from .core.db import get_db_session, check_database_connection
+from .core.db import SessionLocal, get_db_session, check_database_connection
+from .core.async_db import dispose_async_engine
+from fastapi.concurrency import run_in_threadpool
+from .core.pagination import NEXT_CURSOR_HEADER
+from .core.db_routing import ReadYourWritesMiddleware
+from .core.db_instrumentation import (
+    DBInstrumentationMiddleware,
+    N_PLUS_ONE_HEADER,
+    QUERY_COUNT_HEADER,
+    QUERY_TIME_HEADER,
+)
+
+from .infrastructure.repositories.role_catalog import get_role_catalog
+from .jobs.diagnosis_queue import shutdown_diagnosis_job_backend
+from .ml_pipeline.model_registry import get_model_registry
 
 from .api.routes.test_binary import test_binary
 from .api.routes.train_binary import train_binary
@@ -12,6 +26,8 @@ from .api.routes.test_classify import test_classify
 from .api.routes.user import router as user_router
 from .api.routes.medical_study import router as medical_study_router
 from .api.routes.diagnose import router as diagnose_router
+from .api.routes.file_storage import router as file_storage_router
+from .api.routes.metrics import router as metrics_router
 from .api.v1.auth import router as auth_router
 from .api.v1.role import router as role_router
 from .api.v1.register import router as register_router
@@ -28,7 +44,8 @@ async def lifespan(app: FastAPI):
     try:
         db_connected = check_database_connection()
         if db_connected:
-            pass
+            with SessionLocal() as db:
+                get_role_catalog().refresh(db)
         else:
             if settings.is_development:
                 log.warning("DB connection failed, continuing in development mode without DB.")
@@ -39,9 +56,19 @@ async def lifespan(app: FastAPI):
             log.warning("🔧 Continuing in development mode...")
         else:
             log.error(f"Database connection failed: {str(e)}")
+
+    try:
+        # La primera predicción de Keras arma su grafo: que no la pague el primer request.
+        await run_in_threadpool(get_model_registry().get().warm_up)
+    except Exception as e:
+        log.warning(f"Model warm-up failed: {str(e)}")
     
     yield
 
+    # Espera los diagnósticos en curso; los encolados vuelven a PENDING.
+    await run_in_threadpool(shutdown_diagnosis_job_backend)
+    await dispose_async_engine()
+
 app = FastAPI(
     title=settings.APP,
     description=settings.APP_DESCRIPTION,
@@ -72,7 +99,10 @@ app.add_middleware(
     allow_credentials=settings.ALLOW_CREDENTIALS,
     allow_methods=settings.cors_methods,
     allow_headers=settings.cors_headers,
+    expose_headers=[NEXT_CURSOR_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER, N_PLUS_ONE_HEADER],
 )
+app.add_middleware(DBInstrumentationMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
 
 app.include_router(test_binary, tags=["Test"])
 app.include_router(test_classify, tags=["Test"])
@@ -81,6 +111,8 @@ app.include_router(train_classify, tags=["Train"])
 app.include_router(user_router)
 app.include_router(medical_study_router)
 app.include_router(diagnose_router)
+app.include_router(file_storage_router)
+app.include_router(metrics_router)
 app.include_router(auth_router)
 app.include_router(role_router)
 app.include_router(register_router)
@@ -175,18 +175,80 @@ class MLExplainer:
 
         return explanations
 
+    def explain_binary_batch(self, df: pd.DataFrame, predictions: List[Dict[str, Any]],
+                             approximate: bool = False) -> List[List[Dict[str, Any]]]:
+        """Como `explain_binary_prediction`, para un estudio por fila."""
+        return self._explain_batch(
+            df, predictions, self.predictor.binary_rf, self.predictor.binary_xgb, "binary", approximate
+        )
+
+    def explain_classification_batch(self, df: pd.DataFrame, predictions: List[Dict[str, Any]],
+                                     approximate: bool = False) -> List[List[Dict[str, Any]]]:
+        """Como `explain_classification_prediction`, para un estudio por fila."""
+        return self._explain_batch(
+            df, predictions, self.predictor.classify_rf, self.predictor.classify_xgb, "classification", approximate
+        )
+
+    def _explain_batch(self, df: pd.DataFrame, predictions: List[Dict[str, Any]],
+                       rf_model, xgb_model, task_type: str, approximate: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Un `TreeExplainer` y un cálculo SHAP por modelo para todas las filas;
+        cada fila se explica igual que en el camino individual. Con
+        `approximate` usa la aproximación de Saabas (un recorrido por árbol
+        en lugar de TreeSHAP exacto), bastante más barata.
+        """
+        try:
+            rf_shap = shap.TreeExplainer(rf_model).shap_values(df, approximate=approximate)
+            xgb_shap = shap.TreeExplainer(xgb_model).shap_values(df, approximate=approximate)
+        except Exception as e:
+            raise RuntimeError(f"{task_type.capitalize()} explanation error: {e}")
+
+        explanations = []
+        for i, prediction in enumerate(predictions):
+            pred_dict = prediction.get('predictions', prediction)
+            row = df.iloc[[i]]
+            try:
+                explanations.append([
+                    self._explain_model(
+                        rf_model, row, "Random Forest", pred_dict.get("Random_Forest", 0), task_type,
+                        shap_values=self._shap_row(rf_shap, i)
+                    ),
+                    self._explain_model(
+                        xgb_model, row, "XGBoost", pred_dict.get("XGBoost", 0), task_type,
+                        shap_values=self._shap_row(xgb_shap, i)
+                    ),
+                    self._explain_keras_model(
+                        row, "TensorFlow Logistic Regression",
+                        pred_dict.get("TensorFlow_Logistic_Regression", 0), task_type
+                    ),
+                ])
+            except Exception as e:
+                raise RuntimeError(f"{task_type.capitalize()} explanation error: {e}")
+        return explanations
+
+    @staticmethod
+    def _shap_row(shap_values, i: int):
+        """Valores SHAP de la fila `i`, con la forma que tendría un DataFrame de una fila."""
+        if isinstance(shap_values, list):
+            return [values[i:i + 1] for values in shap_values]
+        return shap_values[i:i + 1]
+
     def _explain_model(self, model, df: pd.DataFrame, model_name: str,
-                       prediction: int, task_type: str) -> Dict[str, Any]:
-        """Explica un modelo individual usando SHAP."""
+                       prediction: int, task_type: str, shap_values=None) -> Dict[str, Any]:
+        """Explica un modelo individual usando SHAP (o los valores ya calculados)."""
         try:
-            explainer = shap.TreeExplainer(model)
-            shap_values = explainer.shap_values(df)
+            if shap_values is None:
+                explainer = shap.TreeExplainer(model)
+                shap_values = explainer.shap_values(df)
 
             if isinstance(shap_values, list):
                 if len(shap_values) > prediction:
                     shap_values = shap_values[prediction]
                 else:
                     shap_values = shap_values[0]
+            elif shap_values.ndim == 3:
+                # SHAP >= 0.45: (filas, features, clases) en lugar de una lista por clase.
+                shap_values = shap_values[..., prediction if shap_values.shape[-1] > prediction else 0]
 
             if shap_values.ndim > 1:
                 shap_values = shap_values[0]
@@ -37,6 +37,8 @@ def should_classify(binary_preds: Dict[str, Any]) -> bool:
     """
     Devuelve True si 2 o más modelos binarios votaron '1' (positivo).
     CORREGIDO: Maneja el formato actual con nested dictionary.
+    Con el ensamble reducido (2 modelos) un empate lo decide la confianza
+    promedio.
     """
     print(f"🔍 [DEBUG] Evaluando binary_preds: {binary_preds}")
 
@@ -52,6 +54,8 @@ def should_classify(binary_preds: Dict[str, Any]) -> bool:
         else:
             pass
     result = positive_votes >= 2
+    if len(predictions) == 2 and positive_votes == 1:
+        result = float(binary_preds.get('ensemble_confidence', 0)) > 0.5
 
     return result
 
@@ -61,7 +65,8 @@ def build_final_verdict(
         classify_preds: Dict[str, Any] | None,
         binary_explanations: list = None,
         classify_explanations: list = None,
-        summary_insights: Dict[str, Any] = None
+        summary_insights: Dict[str, Any] = None,
+        degradation_level: str = None
 ) -> Dict[str, Any]:
     """
     Construye el objeto de resultado final con explicabilidad completa.
@@ -73,6 +78,8 @@ def build_final_verdict(
         binary_explanations: Explicaciones SHAP para modelos binarios
         classify_explanations: Explicaciones SHAP para modelos de clasificación
         summary_insights: Resumen de insights cruzados
+        degradation_level: Nivel del pipeline aplicado (ver `app.core.load_shedding`);
+            se registra en `explanations.metadata`
     """
     is_positive = should_classify(binary_preds)
     binary_interpretation = "Posible positivo para EMG" if is_positive else "Posible Negativo para EMG"
@@ -87,7 +94,7 @@ def build_final_verdict(
 
         if predictions:
             votes = list(predictions.values())
-            final_class = max(set(votes), key=votes.count)
+            final_class = classify_preds.get('predicted_class', max(set(votes), key=votes.count))
             classification_interpretation = f"Clasificado en Nivel {final_class}"
 
     result = {
@@ -116,7 +123,10 @@ def build_final_verdict(
             result["explanations"]["summary_insights"] = summary_insights
 
         result["explanations"]["metadata"] = {
-            "explanation_method": "SHAP (SHapley Additive exPlanations)",
+            "explanation_method": (
+                "SHAP aproximado (Saabas)" if degradation_level == "approximate"
+                else "SHAP (SHapley Additive exPlanations)"
+            ),
             "explanation_timestamp": pd.Timestamp.now().isoformat(),
             "models_explained": len(binary_explanations or []) + len(classify_explanations or []),
             "interpretation_notes": {
@@ -127,6 +137,16 @@ def build_final_verdict(
             }
         }
 
+    if degradation_level is not None:
+        # Aun sin explicaciones (pipeline degradado) queda registrado el nivel aplicado.
+        metadata = result.setdefault("explanations", {}).setdefault("metadata", {
+            "explanation_method": None,
+            "explanation_timestamp": pd.Timestamp.now().isoformat(),
+            "models_explained": 0
+        })
+        metadata["degradation_level"] = degradation_level
+        metadata["models_used"] = list(binary_preds.get("predictions", binary_preds))
+
     return result
 
 
@@ -0,0 +1,109 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from loguru import logger as log
+
+from .predictor import MODELS_DIR, MLPredictor, ml_predictor
+from ..core.config import settings
+from ..core.metrics import MODEL_REGISTRY_LOADS
+
+_VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+
+class ModelRegistry:
+    """
+    Modelos de ML por versión. La versión en uso (`MODELS_VERSION`) es el
+    `ml_predictor` del pipeline, ya cargado en memoria. Otra versión se
+    carga de `trained_models/<versión>/{binary,classify}` la primera vez
+    que se pide y queda en un LRU de `max_versions` versiones; la menos
+    usada se descarta al cargar una nueva.
+    """
+
+    def __init__(self, default: MLPredictor, default_version: str, base_path: str, max_versions: int):
+        self._default = default
+        self._default_version = default_version
+        self._base_path = base_path
+        self._max_versions = max(1, max_versions)
+        self._versions: "OrderedDict[str, MLPredictor]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, version: Optional[str] = None) -> MLPredictor:
+        """
+        Modelos de `version` (por defecto, la versión en uso). Carga desde
+        disco si hace falta: llamar fuera del event loop.
+
+        Raises:
+            ValueError: si la versión no es válida o no existe.
+        """
+        if not version or version == self._default_version:
+            return self._default
+        if not _VERSION_PATTERN.match(version):
+            raise ValueError(f"Invalid model version: {version}")
+
+        predictor = self.__cached(version)
+        if predictor is not None:
+            return predictor
+
+        path = os.path.join(self._base_path, version)
+        if not os.path.isdir(path):
+            raise ValueError(f"Model version not found: {version}")
+
+        with self._lock:
+            loading = self._loading.setdefault(version, threading.Lock())
+        # Un solo hilo carga cada versión; los demás esperan y la toman del LRU.
+        # El lock se descarta recién al entrar la versión al LRU: si la carga
+        # falla, queda y el siguiente reintenta con él, nunca en paralelo.
+        with loading:
+            predictor = self.__cached(version)
+            if predictor is not None:
+                return predictor
+            predictor = self.__load(version, path)
+            with self._lock:
+                self._versions[version] = predictor
+                while len(self._versions) > self._max_versions:
+                    evicted, _ = self._versions.popitem(last=False)
+                    log.info(f"Model version {evicted} evicted from the registry")
+                self._loading.pop(version, None)
+        return predictor
+
+    def loaded_versions(self) -> List[str]:
+        """Versión en uso y alternativas cargadas, de la menos a la más usada."""
+        with self._lock:
+            return [self._default_version, *self._versions]
+
+    def __cached(self, version: str) -> Optional[MLPredictor]:
+        with self._lock:
+            predictor = self._versions.get(version)
+            if predictor is not None:
+                self._versions.move_to_end(version)
+            return predictor
+
+    def __load(self, version: str, path: str) -> MLPredictor:
+        log.info(f"Loading model version {version} from {path}")
+        predictor = MLPredictor(path)
+        predictor.warm_up()
+        MODEL_REGISTRY_LOADS.labels(version).inc()
+        return predictor
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Registro de modelos del proceso."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(
+                    default=ml_predictor,
+                    default_version=settings.MODELS_VERSION,
+                    base_path=MODELS_DIR,
+                    max_versions=settings.MODEL_REGISTRY_MAX_VERSIONS
+                )
+    return _registry
@@ -1,11 +1,27 @@
 import pandas as pd
-from typing import IO
+from typing import IO, List
 from .predictor import ml_predictor
-from .helpers import validate_data, should_classify, build_final_verdict, generate_human_readable_summary
+from .helpers import validate_data, should_classify, build_final_verdict
 from .explainer import ml_explainer
+from ..core.load_shedding import APPROXIMATE, FULL, REDUCED
 
 
-def run_diagnosis_pipeline(file_stream: IO, include_explanations: bool = True) -> dict:
+def read_study_frame(file_stream: IO) -> pd.DataFrame:
+    """
+    Lee y valida el CSV de un estudio. Devuelve la fila que usan los
+    modelos (la primera), solo con las columnas de características.
+
+    Raises:
+        ValueError: si el CSV no se puede leer o le faltan columnas.
+    """
+    try:
+        df = pd.read_csv(file_stream)
+        return validate_data(df).head(1)
+    except Exception as e:
+        raise ValueError(f"Error processing CSV file: {e}")
+
+
+def run_diagnosis_pipeline(file_stream: IO, include_explanations: bool = True, degradation_level: str = FULL) -> dict:
     """
     Ejecuta el pipeline completo de diagnóstico desde un stream de archivo.
     Ahora incluye explicabilidad usando SHAP.
@@ -13,55 +29,78 @@ def run_diagnosis_pipeline(file_stream: IO, include_explanations: bool = True) -
     Args:
         file_stream: Un objeto tipo archivo (como el de UploadFile.file de FastAPI).
         include_explanations: Si incluir explicaciones SHAP (por defecto True)
+        degradation_level: Nivel del pipeline bajo carga (ver `app.core.load_shedding`)
 
     Returns:
         Un diccionario con el veredicto final, detalles del proceso y explicabilidad.
     """
-    try:
-        df = pd.read_csv(file_stream)
-        df_valid = validate_data(df)
-    except Exception as e:
-        raise ValueError(f"Error processing CSV file: {e}")
+    return run_diagnosis_pipeline_batch([read_study_frame(file_stream)], include_explanations, degradation_level)[0]
+
+
+def run_diagnosis_pipeline_batch(
+    frames: List[pd.DataFrame],
+    include_explanations: bool = True,
+    degradation_level: str = FULL
+) -> List[dict]:
+    """
+    Pipeline de diagnóstico para varios estudios (frames de `read_study_frame`).
+    Cada modelo y cada explicador SHAP se invoca una vez por lote en lugar
+    de una vez por estudio. Devuelve un veredicto por frame, en orden.
 
-    binary_predictions = ml_predictor.predict_binary(df_valid)
+    `degradation_level` abarata el pipeline bajo carga: `approximate` usa
+    SHAP aproximado, `none` omite las explicaciones y `reduced` además no
+    usa el modelo Keras. El nivel queda en `explanations.metadata`.
+    """
+    if not frames:
+        return []
+    df_batch = pd.concat(frames, ignore_index=True)
+    include_keras = degradation_level != REDUCED
+    include_explanations = include_explanations and degradation_level in (FULL, APPROXIMATE)
+    approximate = degradation_level == APPROXIMATE
+
+    binary_predictions = ml_predictor.predict_binary_batch(df_batch, include_keras=include_keras)
+
+    # Solo los positivos pasan por los modelos de clasificación.
+    positives = [i for i, prediction in enumerate(binary_predictions) if should_classify(prediction)]
+    classify_predictions = [None] * len(frames)
+    if positives:
+        df_positives = df_batch.iloc[positives].reset_index(drop=True)
+        for i, prediction in zip(positives, ml_predictor.predict_classify_batch(df_positives, include_keras=include_keras)):
+            classify_predictions[i] = prediction
 
-    classify_predictions = None
-    if should_classify(binary_predictions):
-        classify_predictions = ml_predictor.predict_classify(df_valid)
-    else:
-        pass
-    binary_explanations = None
-    classify_explanations = None
-    summary_insights = None
+    binary_explanations = [None] * len(frames)
+    classify_explanations = [None] * len(frames)
+    summary_insights = [None] * len(frames)
 
     if include_explanations:
         try:
             print("🔍 Generando explicaciones SHAP...")
 
-            binary_explanations = ml_explainer.explain_binary_prediction(df_valid, binary_predictions)
+            binary_explanations = ml_explainer.explain_binary_batch(df_batch, binary_predictions, approximate=approximate)
 
-            if classify_predictions:
-                classify_explanations = ml_explainer.explain_classification_prediction(df_valid, classify_predictions)
+            if positives:
+                explained = ml_explainer.explain_classification_batch(
+                    df_positives, [classify_predictions[i] for i in positives], approximate=approximate
+                )
+                for i, explanation in zip(positives, explained):
+                    classify_explanations[i] = explanation
 
-            summary_insights = ml_explainer.generate_summary_insights(
-                binary_explanations or [],
-                classify_explanations or []
-            )
+            summary_insights = [
+                ml_explainer.generate_summary_insights(binary or [], classify or [])
+                for binary, classify in zip(binary_explanations, classify_explanations)
+            ]
 
         except Exception as e:
             raise RuntimeError(f"Error generating explanations: {e}")
-            binary_explanations = None
-            classify_explanations = None
-            summary_insights = None
-
-    final_verdict = build_final_verdict(
-        binary_predictions,
-        classify_predictions,
-        binary_explanations,
-        classify_explanations,
-        summary_insights
-    )
-
-    readable_summary = generate_human_readable_summary(final_verdict)
 
-    return final_verdict
\ No newline at end of file
+    return [
+        build_final_verdict(
+            binary_predictions[i],
+            classify_predictions[i],
+            binary_explanations[i],
+            classify_explanations[i],
+            summary_insights[i],
+            degradation_level
+        )
+        for i in range(len(frames))
+    ]
@@ -3,15 +3,21 @@ import numpy as np
 from joblib import load
 from tensorflow.keras.models import load_model
 import pandas as pd
+from typing import Dict, List, Optional
+
+from .helpers import FEATURE_COLUMNS
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "trained_models"))
 
 class MLPredictor:
     """
     Clase que carga todos los modelos de ML en memoria una sola vez (Singleton)
     y proporciona métodos para realizar predicciones con probabilidades.
+    `base_path` apunta a otra versión de los modelos (ver `ModelRegistry`).
     """
-    def __init__(self):
+    def __init__(self, base_path: Optional[str] = None):
         try:
-            base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "trained_models"))
+            base_path = base_path or MODELS_DIR
             
             self.binary_rf = load(os.path.join(base_path, "binary", "random_forest_model.pkl"))
             self.binary_xgb = load(os.path.join(base_path, "binary", "xgboost_model.pkl"))
@@ -26,6 +32,12 @@ class MLPredictor:
         except Exception as e:
             raise RuntimeError(f"Error loading models - Background task: {e}")
 
+    def warm_up(self) -> None:
+        """Una predicción de prueba por modelo: la primera de Keras arma su grafo y es lenta."""
+        df = pd.DataFrame([[0.0] * len(FEATURE_COLUMNS)], columns=FEATURE_COLUMNS)
+        self.predict_binary_batch(df)
+        self.predict_classify_batch(df)
+
     def _get_binary_probabilities(self, model, df: pd.DataFrame, model_type: str):
         """Obtiene probabilidades para modelos binarios."""
         if model_type == "keras":
@@ -56,65 +68,75 @@ class MLPredictor:
 
     def predict_binary(self, df: pd.DataFrame) -> dict:
         """Realiza predicciones con el ensamblaje de modelos binarios."""
-        df_single_row = df.head(1)
-        
-        rf_probs = self._get_binary_probabilities(self.binary_rf, df_single_row, "sklearn")
-        xgb_probs = self._get_binary_probabilities(self.binary_xgb, df_single_row, "sklearn")
-        keras_probs = self._get_binary_probabilities(self.binary_log, df_single_row, "keras")
-        
-        rf_pred = int(rf_probs[0] > 0.5)
-        xgb_pred = int(xgb_probs[0] > 0.5)
-        keras_pred = int(keras_probs[0] > 0.5)
-        
-        ensemble_confidence = float(np.mean([rf_probs[0], xgb_probs[0], keras_probs[0]]))
-        
-        return {
-            "predictions": {
-                "Random_Forest": rf_pred,
-                "XGBoost": xgb_pred,
-                "TensorFlow_Logistic_Regression": keras_pred,
-            },
-            "probabilities": {
-                "Random_Forest_preds": rf_probs.tolist(),
-                "XGBoost_preds": xgb_probs.tolist(),
-                "TensorFlow_Logistic_Regression_preds": keras_probs.tolist(),
-            },
-            "ensemble_confidence": ensemble_confidence
+        return self.predict_binary_batch(df.head(1))[0]
+
+    def binary_probabilities(self, df: pd.DataFrame, include_keras: bool = True) -> Dict[str, np.ndarray]:
+        """Probabilidad de positivo de cada modelo binario, una por fila."""
+        members = {
+            "Random_Forest": self._get_binary_probabilities(self.binary_rf, df, "sklearn"),
+            "XGBoost": self._get_binary_probabilities(self.binary_xgb, df, "sklearn"),
         }
+        if include_keras:
+            members["TensorFlow_Logistic_Regression"] = self._get_binary_probabilities(self.binary_log, df, "keras")
+        return members
+
+    def predict_binary_batch(self, df: pd.DataFrame, include_keras: bool = True) -> List[dict]:
+        """
+        Como `predict_binary`, para un estudio por fila: cada modelo se
+        invoca una sola vez con todas las filas. Sin `include_keras`
+        (ensamble reducido) votan solo Random Forest y XGBoost.
+        """
+        members = self.binary_probabilities(df, include_keras)
+
+        results = []
+        for i in range(len(df)):
+            results.append({
+                "predictions": {name: int(probs[i] > 0.5) for name, probs in members.items()},
+                "probabilities": {f"{name}_preds": probs[i:i + 1].tolist() for name, probs in members.items()},
+                "ensemble_confidence": float(np.mean([probs[i] for probs in members.values()]))
+            })
+        return results
 
     def predict_classify(self, df: pd.DataFrame) -> dict:
         """Realiza predicciones con el ensamblaje de modelos de clasificación."""
-        df_single_row = df.head(1)
-        
-        rf_probs = self._get_multiclass_probabilities(self.classify_rf, df_single_row, "sklearn")
-        xgb_probs = self._get_multiclass_probabilities(self.classify_xgb, df_single_row, "sklearn")
-        keras_probs = self._get_multiclass_probabilities(self.classify_log, df_single_row, "keras")
-        
-        rf_pred = int(np.argmax(rf_probs[0]))
-        xgb_pred = int(np.argmax(xgb_probs[0]))
-        keras_pred = int(np.argmax(keras_probs[0]))
-        
-        predictions = [rf_pred, xgb_pred, keras_pred]
-        predicted_class = max(set(predictions), key=predictions.count)
-        
-        rf_conf = rf_probs[0][predicted_class]
-        xgb_conf = xgb_probs[0][predicted_class]
-        keras_conf = keras_probs[0][predicted_class]
-        ensemble_confidence = float(np.mean([rf_conf, xgb_conf, keras_conf]))
-        
-        return {
-            "predictions": {
-                "Random_Forest": rf_pred,
-                "XGBoost": xgb_pred,
-                "TensorFlow_Logistic_Regression": keras_pred,
-            },
-            "probabilities": {
-                "Random_Forest_preds": rf_probs.tolist(),
-                "XGBoost_preds": xgb_probs.tolist(),
-                "TensorFlow_Logistic_Regression_preds": keras_probs.tolist(),
-            },
-            "predicted_class": predicted_class,
-            "ensemble_confidence": ensemble_confidence
+        return self.predict_classify_batch(df.head(1))[0]
+
+    def classify_probabilities(self, df: pd.DataFrame, include_keras: bool = True) -> Dict[str, np.ndarray]:
+        """Probabilidades por clase de cada modelo de clasificación, una fila por estudio."""
+        members = {
+            "Random_Forest": self._get_multiclass_probabilities(self.classify_rf, df, "sklearn"),
+            "XGBoost": self._get_multiclass_probabilities(self.classify_xgb, df, "sklearn"),
         }
+        if include_keras:
+            members["TensorFlow_Logistic_Regression"] = self._get_multiclass_probabilities(self.classify_log, df, "keras")
+        return members
+
+    def predict_classify_batch(self, df: pd.DataFrame, include_keras: bool = True) -> List[dict]:
+        """
+        Como `predict_classify`, para un estudio por fila. Sin
+        `include_keras`, si los dos modelos restantes no coinciden gana la
+        clase con mayor probabilidad promedio.
+        """
+        members = self.classify_probabilities(df, include_keras)
+
+        results = []
+        for i in range(len(df)):
+            predictions = {name: int(np.argmax(probs[i])) for name, probs in members.items()}
+
+            votes = list(predictions.values())
+            if len(votes) == 2 and votes[0] != votes[1]:
+                predicted_class = int(np.argmax(np.mean([probs[i] for probs in members.values()], axis=0)))
+            else:
+                predicted_class = max(set(votes), key=votes.count)
+
+            ensemble_confidence = float(np.mean([probs[i][predicted_class] for probs in members.values()]))
+
+            results.append({
+                "predictions": predictions,
+                "probabilities": {f"{name}_preds": probs[i:i + 1].tolist() for name, probs in members.items()},
+                "predicted_class": predicted_class,
+                "ensemble_confidence": ensemble_confidence
+            })
+        return results
 
 ml_predictor = MLPredictor()
\ No newline at end of file
@@ -1,22 +1,30 @@
 # app/services/auth_service.py
+import time
+import uuid
+from functools import partial
 from datetime import timedelta
-from typing import List
+from typing import Optional
 from jose import JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 
 from app.api.v1.register import get_user_role_service, get_user_service
 
-from ..infrastructure.db.DTOs.user_role_dto import UserRoleResponseDTO
-
 from ..services.user_role_service import UserRoleService
 from ..services.user_service import UserService
-from ..core.security import create_access_token, decode_access_token, get_password_hash, verify_password
+from ..core.security import create_access_token, decode_access_token, verify_password_async
 from ..core.config import settings
-from ..infrastructure.repositories.user_repo import UserRepo
-from ..infrastructure.db.DTOs.auth_schema import Token, UserLogin, UserOut
+from ..infrastructure.repositories.user_repo import LoginCredentials, UserRepo
+from ..infrastructure.db.DTOs.auth_schema import Principal, Token, UserLogin, UserOut
+from ..infrastructure.db.models.user import User
+from ..infrastructure.db.models.user_role import UserRole
 from ..core.db import get_db_session
+from ..core.principal_cache import principal_cache
+from ..core.unit_of_work import after_commit
+from ..core.metrics import AUTH_LOGIN_DURATION
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
@@ -26,23 +34,42 @@ class AuthService:
         self.__user_service = user_service
         self.__user_role_service = user_role_service
 
-    def login(self, db: Session, user_login: UserLogin) -> Token:
-        user = self.__user_repo.authenticate(db, email=user_login.email, password=user_login.password)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect email or password (AuthService)",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    async def login(self, db: Session, user_login: UserLogin) -> Token:
+        """
+        Una consulta (usuario y roles), la verificación Argon2 en el
+        executor de hashing y el token. También deja el principal del token
+        en la caché, así el primer request autenticado no consulta la base.
+        """
+        started_at = time.perf_counter()
+        result = "failure"
+        try:
+            credentials = await run_in_threadpool(self.__get_credentials, db, user_login.email)
+            if not credentials or not await verify_password_async(user_login.password, credentials.password):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Incorrect email or password (AuthService)",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            token = self.__issue_token(credentials)
+            result = "success"
+            return token
+        finally:
+            AUTH_LOGIN_DURATION.labels(result).observe(time.perf_counter() - started_at)
 
-        user_dto = self.__user_service.find_by_email(db, user_login.email)
-        
-        user_roles: List[UserRoleResponseDTO] = self.__user_role_service.get_user_roles_by_user_id(db, user_dto.id)
-        
+    def __get_credentials(self, db: Session, email: str) -> Optional[LoginCredentials]:
+        credentials = self.__user_repo.get_login_credentials(db, email=email)
+        # Devuelve la conexión al pool mientras el login espera turno para verificar.
+        db.rollback()
+        return credentials
+
+    @staticmethod
+    def __issue_token(credentials: LoginCredentials) -> Token:
+        jti = uuid.uuid4().hex
         token_data = {
-            "sub": user.email,
-            "user_id": str(user_dto.id), 
-            "roles": [str(role.role_id) for role in user_roles]
+            "sub": credentials.email,
+            "user_id": credentials.id,
+            "roles": credentials.role_ids,
+            "jti": jti
         }
 
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -50,6 +77,9 @@ class AuthService:
             data=token_data,
             expires_delta=access_token_expires
         )
+        principal_cache.put(jti, Principal(
+            id=credentials.id, email=credentials.email, roles=credentials.role_ids, jti=jti
+        ))
         return Token(access_token=access_token, token_type="bearer")
 
     def get_current_user(self, db: Session, token: str = Depends(oauth2_scheme)) -> UserOut:
@@ -72,7 +102,62 @@ class AuthService:
         if user is None:
             raise credentials_exception
         return user
-    
+
+    def get_current_principal(self, db: Session, token: str) -> Principal:
+        """
+        Identidad y roles del token. Solo consulta la base si el token no
+        está en la caché de principals (primer uso, TTL vencido o usuario
+        modificado), para confirmar que el usuario sigue existiendo.
+        """
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        payload = decode_access_token(token)
+        if payload is None or not payload.get("user_id"):
+            raise credentials_exception
+
+        cache_key = payload.get("jti") or token
+        principal = principal_cache.get(cache_key)
+        if principal is not None and str(principal.id) == payload["user_id"]:
+            return principal
+
+        user = self.__user_repo.get(db, id=payload["user_id"])
+        if user is None:
+            raise credentials_exception
+        principal = Principal(
+            id=user.id,
+            email=user.email,
+            roles=[association.role_id for association in user.role_associations],
+            jti=payload.get("jti")
+        )
+        principal_cache.put(cache_key, principal)
+        return principal
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_principals(mapper, connection, target: User) -> None:
+    # Cambios de datos, contraseña (incluido el reset) o baja del usuario.
+    _invalidate_principals(target, target.id)
+
+
+@event.listens_for(UserRole, "after_insert")
+@event.listens_for(UserRole, "after_update")
+@event.listens_for(UserRole, "after_delete")
+def _invalidate_role_principals(mapper, connection, target: UserRole) -> None:
+    _invalidate_principals(target, target.user_id)
+
+
+def _invalidate_principals(target, user_id) -> None:
+    principal_cache.invalidate_user(user_id)
+    # Otro request puede volver a cachear los datos anteriores antes del
+    # commit de la unidad de trabajo: se invalida de nuevo al confirmar.
+    session = object_session(target)
+    if session is not None:
+        after_commit(session, partial(principal_cache.invalidate_user, user_id))
+
 
 def get_auth_service(
     db: Session = Depends(get_db_session),
@@ -1,97 +1,683 @@
-import json
+import hashlib
+import io
 import pathlib
+import time
+import zipfile
+from dataclasses import dataclass
+from functools import partial
+from typing import Awaitable, Callable, List, Optional, Tuple, Type, TypeVar
 from sqlalchemy.orm import Session
 from fastapi import UploadFile, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
 from uuid import UUID
 from .medical_study_service import MedicalStudyService
 from .file_manager_service import FileStorageService
-from ..infrastructure.db.DTOs.medical_study_dto import MedicalStudyUpdateDTO
-from ..ml_pipeline.pipeline import run_diagnosis_pipeline
-from ..core.encryption import encrypt_data
+from .study_result_service import StudyResultService
+from .idempotency_service import IdempotencyReservation, IdempotencyService
+from ..core.config import settings
+from ..core.db import BackgroundSessionLocal
+from ..core.db_retry import retry_transient
+from ..core.unit_of_work import UnitOfWork
+from ..core.metrics import DIAGNOSIS_BATCH_INFERENCE_DURATION, DIAGNOSIS_BATCH_STUDIES
+from ..core.single_flight import SingleFlight
+from ..core.inference_scheduler import ROUTINE, URGENT, get_inference_scheduler
+from ..core.load_shedding import get_load_shedder
+from ..core.rate_limit import enforce_rate_limit
+from ..infrastructure.db.DTOs.diagnosis_job_dto import DiagnosisJobDTO
+from ..infrastructure.db.DTOs.medical_study_dto import (
+    BatchDiagnosisReportDTO,
+    MedicalStudyResponseDTO,
+    MedicalStudyUpdateDTO,
+    StudyDiagnosisResultDTO,
+)
+from ..infrastructure.db.models.diagnosis_job import SUCCEEDED
+from ..jobs.diagnosis_queue import DiagnosisJob, get_diagnosis_job_backend
+from ..infrastructure.db.models.medical_study import MedicalStudy
+from ..infrastructure.repositories.idempotency_key_repo import IdempotencyKeyRepo
+from ..ml_pipeline.pipeline import read_study_frame, run_diagnosis_pipeline, run_diagnosis_pipeline_batch
+from ..core.results_codec import encode_results
 from loguru import logger as log
 
+R = TypeVar("R", bound=BaseModel)
+
+# Diagnósticos síncronos en curso en este proceso, por estudio, usuario y CSV.
+_diagnosis_flights = SingleFlight("diagnosis")
+
+
+@dataclass
+class _BatchEntry:
+    """Un CSV del lote; `error` si no se puede diagnosticar."""
+    filename: str
+    study_id: Optional[UUID] = None
+    content: bytes = b""
+    error: Optional[str] = None
+
 
 class DiagnoseService:
-    def __init__(self, study_service: MedicalStudyService, file_service: FileStorageService):
+    def __init__(
+        self,
+        study_service: MedicalStudyService,
+        file_service: FileStorageService,
+        study_result_service: StudyResultService,
+        session_factory: Callable[[], Session] = BackgroundSessionLocal,
+        idempotency_service: Optional[IdempotencyService] = None
+    ):
         self.__study_service = study_service
         self.__file_service = file_service
+        self.__study_result_service = study_result_service
+        # Sesiones de los trabajos en segundo plano, fuera del request.
+        self.__session_factory = session_factory
+        self.__idempotency_service = idempotency_service or IdempotencyService(
+            idempotency_key_repo=IdempotencyKeyRepo(), session_factory=session_factory
+        )
 
-    async def run_diagnosis_workflow(self, db: Session, study_id: UUID, file: UploadFile, user_id: UUID):
-        try:         
-            study_dto = self.__study_service.get_by_id(db, study_id=study_id)
-            
-            if not study_dto:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Medical study with ID {study_id} not found.(DiagnoseService)"
+    async def run_diagnosis_workflow(
+        self,
+        study_id: UUID,
+        file: UploadFile,
+        user_id: UUID,
+        idempotency_key: Optional[str] = None,
+        priority: Optional[str] = None
+    ) -> Tuple[MedicalStudyResponseDTO, bool]:
+        """
+        Diagnostica un estudio dentro del request. Devuelve el estudio y si
+        la respuesta es la guardada para `idempotency_key`. Los requests
+        concurrentes con el mismo estudio, usuario y CSV comparten una sola
+        ejecución; entre procesos, el paso atómico `PENDING`→`PROCESSING`
+        deja pasar a uno solo y los demás reciben 409. La inferencia espera
+        su turno en el scheduler con `priority` (por defecto, la del estudio).
+        """
+        content = await self.__read_csv(file)
+        flight_key = f"{study_id}:{user_id}:{hashlib.sha256(content).hexdigest()}"
+        return await self.__idempotent(
+            scope="diagnose",
+            key=idempotency_key,
+            fingerprint=flight_key,
+            response_model=MedicalStudyResponseDTO,
+            call=lambda: _diagnosis_flights.do(
+                flight_key, partial(self.__diagnose_now, study_id, user_id, file.filename, content, priority)
+            ),
+            joinable=lambda: _diagnosis_flights.in_flight(flight_key)
+        )
+
+    async def submit_diagnosis(
+        self,
+        db: Session,
+        *,
+        study_id: UUID,
+        file: UploadFile,
+        user_id: UUID,
+        idempotency_key: Optional[str] = None,
+        priority: Optional[str] = None
+    ) -> Tuple[DiagnosisJobDTO, bool]:
+        """
+        Valida el CSV y el estudio, pasa el estudio a `PROCESSING` y encola
+        el diagnóstico en la misma transacción; arranca cuando el request
+        confirma. El resto (archivo, inferencia, SHAP, cifrado y escrituras)
+        corre en un worker, en el orden de `priority` (por defecto, la del
+        estudio). Con `idempotency_key`, un reintento recibe el mismo trabajo.
+        """
+        content = await self.__read_csv(file)
+
+        async def submit() -> DiagnosisJobDTO:
+            return await run_in_threadpool(self.__submit, db, study_id, user_id, file.filename, content, priority)
+
+        return await self.__idempotent(
+            scope="diagnose_job",
+            key=idempotency_key,
+            fingerprint=f"{study_id}:{user_id}:{hashlib.sha256(content).hexdigest()}",
+            response_model=DiagnosisJobDTO,
+            call=submit,
+            db=db
+        )
+
+    def __submit(
+        self,
+        db: Session,
+        study_id: UUID,
+        user_id: UUID,
+        filename: str,
+        content: bytes,
+        priority: Optional[str]
+    ) -> DiagnosisJobDTO:
+        backend = get_diagnosis_job_backend()
+        if not backend.has_capacity(db):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Diagnosis queue is full, try again later (DiagnoseService)",
+                headers={"Retry-After": "30"}
+            )
+
+        study_model = self.__claim_study(db, study_id)
+        job = DiagnosisJob(
+            study_id=str(study_id),
+            user_id=str(user_id),
+            filename=filename,
+            content=content,
+            priority=priority or study_model.priority
+        )
+        backend.enqueue(db, job, self.process_job, self.release_job)
+        log.info(f"Diagnosis job {job.id} submitted for study {study_id} (DiagnoseService)")
+        return self.job_dto(job)
+
+    async def __diagnose_now(
+        self,
+        study_id: UUID,
+        user_id: UUID,
+        filename: str,
+        content: bytes,
+        priority: Optional[str]
+    ) -> MedicalStudyResponseDTO:
+        # El estudio queda en `PROCESSING` (confirmado) antes de la inferencia:
+        # un reintento concurrente en otro proceso recibe 409 y no la repite.
+        study_priority = await run_in_threadpool(self.__claim_committed, study_id)
+        priority = priority or study_priority
+
+        job = DiagnosisJob(
+            study_id=str(study_id), user_id=str(user_id), filename=filename, content=content, priority=priority
+        )
+        started = False
+        try:
+            # Inferencia, archivo y resultados fuera del event loop; si falla, el estudio vuelve a `PENDING`.
+            async with get_inference_scheduler().slot_async(user_id=str(user_id), priority=priority):
+                started = True
+                updated_study = await run_in_threadpool(self.process_job, job)
+        except BaseException as e:
+            # `process_job` libera el estudio si corrió; si la espera del slot falló
+            # o se canceló (p. ej. al apagar), nunca corrió y hay que liberarlo acá.
+            if not started:
+                await run_in_threadpool(self.__release_quietly, job)
+            if isinstance(e, HTTPException) or not isinstance(e, Exception):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Internal server error (DiagnoseService): {str(e)}"
+            )
+        log.success(f"Study updated successfully (DiagnoseService)")
+        return updated_study
+
+    async def __idempotent(
+        self,
+        *,
+        scope: str,
+        key: Optional[str],
+        fingerprint: str,
+        response_model: Type[R],
+        call: Callable[[], Awaitable[R]],
+        joinable: Callable[[], bool] = lambda: False,
+        db: Optional[Session] = None
+    ) -> Tuple[R, bool]:
+        """
+        Ejecuta `call` una vez por `Idempotency-Key`. Con la respuesta ya
+        guardada la devuelve (o relanza el error guardado) sin ejecutar
+        nada. Si la clave está en curso y `joinable()`, espera a esa
+        ejecución en este proceso; si no, 409. Con `db`, la respuesta
+        exitosa se guarda en la transacción del request.
+        """
+        if not key:
+            return await call(), False
+
+        # Reserva, respuesta y liberación usan la Session síncrona (con reintentos): fuera del event loop.
+        idempotency = self.__idempotency_service
+        reservation = await run_in_threadpool(
+            idempotency.reserve, scope=scope, key=key, fingerprint=IdempotencyService.fingerprint(fingerprint)
+        )
+        if reservation.replay:
+            return self.__replay(reservation, response_model), True
+        if reservation.in_progress:
+            if joinable():
+                return await call(), False
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress (DiagnoseService)",
+                headers={"Retry-After": "1"}
+            )
+
+        try:
+            result = await call()
+        except HTTPException as e:
+            if e.status_code < 500:
+                await run_in_threadpool(
+                    idempotency.save, reservation, status_code=e.status_code, body={"detail": e.detail}
                 )
-                        
-            from sqlalchemy.orm import joinedload
-            from ..infrastructure.db.models.medical_study import MedicalStudy
-            
-            study_model = db.query(MedicalStudy).options(
-                joinedload(MedicalStudy.patient),
-                joinedload(MedicalStudy.doctor),
-                joinedload(MedicalStudy.technician)
-            ).filter(MedicalStudy.id == str(study_id)).first()
-            
-            if not study_model:
-                raise HTTPException(
-                    status_code= status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Internal server error: data inconsistency (DiagnoseService)"
+            else:
+                await run_in_threadpool(idempotency.release, reservation)
+            raise
+        except BaseException:
+            await run_in_threadpool(idempotency.release, reservation)
+            raise
+        await run_in_threadpool(
+            idempotency.save, reservation, status_code=status.HTTP_200_OK, body=jsonable_encoder(result), db=db
+        )
+        return result, False
+
+    @staticmethod
+    def __replay(reservation: IdempotencyReservation, response_model: Type[R]) -> R:
+        if reservation.status_code >= 400:
+            raise HTTPException(
+                status_code=reservation.status_code,
+                detail=reservation.body.get("detail"),
+                headers={"Idempotent-Replayed": "true"}
+            )
+        return response_model.model_validate(reservation.body)
+
+    async def __read_csv(self, file: UploadFile) -> bytes:
+        """Lee el CSV del request (hasta `DIAGNOSIS_BATCH_MAX_FILE_BYTES`) y valida su formato."""
+        max_bytes = settings.DIAGNOSIS_BATCH_MAX_FILE_BYTES
+        content = await file.read(max_bytes + 1)
+        if len(content) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large (max {max_bytes} bytes) (DiagnoseService)"
+            )
+        try:
+            read_study_frame(io.BytesIO(content))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f'Bad Request raised for DiagnoseService: {str(e)}')
+        return content
+
+    def __claim_study(self, db: Session, study_id: UUID) -> MedicalStudy:
+        study_model = self.__study_service.get_for_diagnosis(db, [study_id]).get(str(study_id))
+        self.__check_diagnosable(study_model, study_id)
+        # UPDATE condicionado: de dos requests que leyeron `PENDING`, solo uno lo cambia.
+        if not self.__study_service.transition_status(db, study_id=study_id, from_status="PENDING", to_status="PROCESSING"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Medical study with ID {study_id} is not in PENDING state.(DiagnoseService)"
+            )
+        return study_model
+
+    def __claim_committed(self, study_id: UUID) -> str:
+        """Pasa el estudio a `PROCESSING` en una transacción propia; devuelve su prioridad."""
+        with UnitOfWork(self.__session_factory) as db:
+            return self.__claim_study(db, study_id).priority
+
+    def __release_quietly(self, job: DiagnosisJob) -> None:
+        try:
+            self.release_job(job)
+        except Exception as e:
+            log.error(f"Could not release study {job.study_id} (DiagnoseService): {e}")
+
+    def process_job(self, job: DiagnosisJob) -> MedicalStudyResponseDTO:
+        """
+        Ejecuta un trabajo de la cola en proceso. Si falla, el estudio
+        vuelve a `PENDING` para poder reenviarlo.
+        """
+        try:
+            updated_study = self.persist_job(job, self.diagnose_job(job))
+            log.success(f"Diagnosis job {job.id} completed for study {job.study_id} (DiagnoseService)")
+            return updated_study
+        except Exception as e:
+            log.error(f"Diagnosis job {job.id} failed for study {job.study_id} (DiagnoseService): {e}")
+            try:
+                self.release_job(job)
+            except Exception as release_error:
+                log.error(f"Could not release study {job.study_id} (DiagnoseService): {release_error}")
+            raise
+
+    def diagnose_job(self, job: DiagnosisJob) -> dict:
+        """Inferencia del trabajo, fuera de toda transacción, al nivel que permite la carga."""
+        shedder = get_load_shedder()
+        started = time.perf_counter()
+        try:
+            return run_diagnosis_pipeline(io.BytesIO(job.content), degradation_level=shedder.level())
+        except Exception as e:
+            raise RuntimeError(f"ML processing error (DiagnoseService): {str(e)}") from e
+        finally:
+            shedder.observe(time.perf_counter() - started)
+
+    def persist_job(
+        self,
+        job: DiagnosisJob,
+        ml_verdict: dict,
+        fence: Optional[Callable[[Session], None]] = None
+    ) -> MedicalStudyResponseDTO:
+        """
+        Guarda archivo y resultados en una transacción, que se repite ante
+        errores transitorios. `fence(db)` corre primero dentro de ella: la
+        cola durable marca ahí el trabajo como terminado, o lanza si el
+        worker perdió el lease y nada se escribe.
+        """
+        return retry_transient(partial(self.__persist_job, job, ml_verdict, fence), operation="diagnosis_job")
+
+    def release_job(self, job: DiagnosisJob) -> None:
+        """Devuelve a `PENDING` el estudio de un trabajo que no terminó."""
+        def release():
+            with UnitOfWork(self.__session_factory) as db:
+                self.__study_service.transition_status(
+                    db, study_id=job.study_id, from_status="PROCESSING", to_status="PENDING"
                 )
-            
-            if study_model.status != "PENDING":
+        retry_transient(release, operation="diagnosis_job_release")
+
+    def get_job(self, db: Session, job_id: UUID) -> DiagnosisJobDTO:
+        return self.__job_response(db, self.__find_job(db, job_id))
+
+    async def wait_for_job(self, db: Session, job_id: UUID, timeout: float) -> DiagnosisJobDTO:
+        """Estado del trabajo cuando termina, o tras `timeout` segundos (tope `DIAGNOSIS_JOB_MAX_WAIT_SECONDS`)."""
+        timeout = min(max(timeout, 0), settings.DIAGNOSIS_JOB_MAX_WAIT_SECONDS)
+        # Las consultas con la Session síncrona, fuera del event loop.
+        job = await run_in_threadpool(self.__find_job, db, job_id)
+        job = await get_diagnosis_job_backend().wait(db, job, timeout)
+        return await run_in_threadpool(self.__job_response, db, job)
+
+    @staticmethod
+    def job_dto(job: DiagnosisJob) -> DiagnosisJobDTO:
+        return DiagnosisJobDTO(
+            id=job.id,
+            study_id=job.study_id,
+            status=job.status,
+            attempts=job.attempts,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            study=job.result
+        )
+
+    def __job_response(self, db: Session, job: DiagnosisJob) -> DiagnosisJobDTO:
+        dto = self.job_dto(job)
+        if job.status == SUCCEEDED and dto.study is None:
+            # La cola durable no guarda el resultado: el estudio es la fuente.
+            dto.study = self.__study_service.get_by_id(db, job.study_id)
+        return dto
+
+    @staticmethod
+    def __find_job(db: Session, job_id: UUID) -> DiagnosisJob:
+        job = get_diagnosis_job_backend().get(db, str(job_id))
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Diagnosis job with ID {job_id} not found.(DiagnoseService)"
+            )
+        return job
+
+    def __persist_job(
+        self,
+        job: DiagnosisJob,
+        ml_verdict: dict,
+        fence: Optional[Callable[[Session], None]]
+    ) -> MedicalStudyResponseDTO:
+        job.attempts += 1
+        with UnitOfWork(self.__session_factory) as db:
+            if fence is not None:
+                fence(db)
+            study_model = self.__study_service.get_for_diagnosis(db, [job.study_id]).get(job.study_id)
+            if not study_model or study_model.status != "PROCESSING":
                 raise HTTPException(
                     status_code=status.HTTP_409_CONFLICT,
-                    detail=f"Medical study with ID {study_id} is not in PENDING state. Current status: {study_model.status}(DiagnoseService)"
+                    detail=f"Medical study with ID {job.study_id} is no longer PROCESSING.(DiagnoseService)"
                 )
+            saved_file = self.__file_service.save_stream_to_db(
+                db,
+                io.BytesIO(job.content),
+                original_filename=job.filename,
+                content_type="text/csv",
+                user_id=job.user_id,
+                patient_dni=study_model.patient.dni,
+                custom_filename=self.__stored_filename(study_model, job.filename)
+            )
+            return self.__complete_study(db, job.study_id, saved_file.id, ml_verdict)
 
-            if not study_model.patient:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Patient not found for this study(DiagnoseService)"
-                )
+    async def run_batch_diagnosis(
+        self,
+        db: Session,
+        *,
+        files: List[UploadFile],
+        user_id: UUID,
+        priority: Optional[str] = None,
+        rate_limit_key: Optional[str] = None
+    ) -> BatchDiagnosisReportDTO:
+        """
+        Diagnostica varios estudios en un request. Cada CSV se llama
+        `<study_id>.csv` y puede venir suelto o dentro de un zip. Los
+        estudios se cargan en una consulta y la inferencia (modelos y SHAP)
+        se hace en un solo lote fuera del event loop. Cada estudio se guarda
+        en su propia transacción, como un trabajo de la cola: un error
+        afecta solo a ese estudio y lo devuelve a `PENDING`.
 
-            patient = study_model.patient
-            study_date_str = study_model.created_at.strftime('%Y%m%d')
-            original_extension = pathlib.Path(file.filename).suffix
-            new_filename = f"{patient.id}_{patient.name}_{patient.last_name}_{study_date_str}{original_extension}".replace(" ", "_")
-            
-            saved_file = await self.__file_service.save_file_to_db(
-                db, 
-                file=file, 
-                user_id=user_id, 
-                patient_dni=patient.dni, 
-                custom_filename=new_filename
-            )
-        
+        En el scheduler el lote cuesta un turno por estudio; sin `priority`
+        es urgente si alguno de sus estudios lo es. Con `rate_limit_key`
+        cobra un token por estudio leído antes de la inferencia.
+        """
+        entries = await self.__read_entries(files)
+        enforce_rate_limit("diagnose", rate_limit_key, cost=len(entries))
+        results = [
+            StudyDiagnosisResultDTO(study_id=entry.study_id, filename=entry.filename, status="error", error=entry.error)
+            for entry in entries
+        ]
+        pending = [i for i, entry in enumerate(entries) if entry.error is None]
+        studies = await run_in_threadpool(
+            self.__study_service.get_for_diagnosis, db, [entries[i].study_id for i in pending]
+        )
+
+        ready, frames = [], []
+        for i in pending:
+            entry = entries[i]
             try:
-                await file.seek(0)
-                ml_verdict = run_diagnosis_pipeline(file.file)
+                self.__check_diagnosable(studies.get(str(entry.study_id)), entry.study_id)
+                frames.append(read_study_frame(io.BytesIO(entry.content)))
+                ready.append(i)
+            except HTTPException as e:
+                results[i].error = e.detail
             except ValueError as e:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f'Bad Request raised for DiagnoseService: {str(e)}')
-            except Exception as e:
-                raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"ML processing error (DiagnoseService): {str(e)}")
+                results[i].error = f"Bad Request raised for DiagnoseService: {str(e)}"
+
+        # Como `__claim_study`: cada estudio pasa a `PROCESSING` (confirmado) antes de la
+        # inferencia; los que ya tomó otro diagnóstico quedan con error y no se infieren.
+        claimed = await run_in_threadpool(self.__claim_batch, [entries[i].study_id for i in ready])
+        for i in ready:
+            if entries[i].study_id not in claimed:
+                results[i].error = f"Medical study with ID {entries[i].study_id} is not in PENDING state.(DiagnoseService)"
+        frames = [frame for i, frame in zip(ready, frames) if entries[i].study_id in claimed]
+        ready = [i for i in ready if entries[i].study_id in claimed]
 
-            update_data = MedicalStudyUpdateDTO(
-                status="COMPLETED",
-                ml_results=encrypt_data(json.dumps(ml_verdict)),
-                csv_file_id=saved_file.id
+        verdicts = []
+        if frames:
+            if priority is None:
+                urgent = any(studies[str(entries[i].study_id)].priority == URGENT for i in ready)
+                priority = URGENT if urgent else ROUTINE
+            shedder = get_load_shedder()
+            started = time.perf_counter()
+            try:
+                async with get_inference_scheduler().slot_async(user_id=str(user_id), priority=priority, cost=len(frames)):
+                    inference_started = time.perf_counter()
+                    verdicts = await run_in_threadpool(
+                        run_diagnosis_pipeline_batch, frames, degradation_level=shedder.level()
+                    )
+                    # Latencia por estudio: un lote grande no cuenta como una inferencia lenta.
+                    shedder.observe((time.perf_counter() - inference_started) / len(frames))
+            except BaseException as e:
+                # También si se cancela la espera: los estudios tomados no pueden quedar en `PROCESSING`.
+                log.error(f"Batch inference failed for {len(frames)} studies (DiagnoseService): {e!r}")
+                await run_in_threadpool(self.__release_batch, [entries[i].study_id for i in ready])
+                if not isinstance(e, Exception):
+                    raise
+                for i in ready:
+                    results[i].error = f"ML processing error (DiagnoseService): {str(e)}"
+                ready = []
+            finally:
+                DIAGNOSIS_BATCH_INFERENCE_DURATION.observe(time.perf_counter() - started)
+
+        for i, verdict in zip(ready, verdicts):
+            entry = entries[i]
+            job = DiagnosisJob(
+                study_id=str(entry.study_id),
+                user_id=str(user_id),
+                filename=entry.filename,
+                content=entry.content,
+                priority=priority
             )
-            
-            
-            updated_study = self.__study_service.update(db, study_id=study_id, study_update=update_data)
-            log.success(f"Study updated successfully (DiagnoseService)")
-            return updated_study
-            
-        except HTTPException:
+            try:
+                results[i].study = await run_in_threadpool(self.__persist_batch_study, job, verdict)
+                results[i].status = "completed"
+                results[i].error = None
+            except Exception as e:
+                results[i].error = e.detail if isinstance(e, HTTPException) else f"Internal server error (DiagnoseService): {str(e)}"
+
+        completed = sum(1 for result in results if result.status == "completed")
+        DIAGNOSIS_BATCH_STUDIES.labels("completed").inc(completed)
+        DIAGNOSIS_BATCH_STUDIES.labels("error").inc(len(results) - completed)
+        log.success(f"Batch diagnosis finished: {completed}/{len(results)} studies completed (DiagnoseService)")
+        return BatchDiagnosisReportDTO(
+            total=len(results),
+            completed=completed,
+            failed=len(results) - completed,
+            results=results
+        )
+
+    def __persist_batch_study(self, job: DiagnosisJob, ml_verdict: dict) -> MedicalStudyResponseDTO:
+        """Guarda un estudio del lote en su transacción; si falla, vuelve a `PENDING`."""
+        try:
+            return self.persist_job(job, ml_verdict)
+        except Exception as e:
+            log.error(f"Could not save diagnosis for study {job.study_id} (DiagnoseService): {e}")
+            try:
+                self.release_job(job)
+            except Exception as release_error:
+                log.error(f"Could not release study {job.study_id} (DiagnoseService): {release_error}")
             raise
+
+    def __claim_batch(self, study_ids: List[UUID]) -> set:
+        """Pasa a `PROCESSING` los estudios que siguen en `PENDING`; devuelve los que tomó."""
+        if not study_ids:
+            return set()
+
+        def claim():
+            with UnitOfWork(self.__session_factory) as db:
+                return {
+                    study_id for study_id in study_ids
+                    if self.__study_service.transition_status(
+                        db, study_id=study_id, from_status="PENDING", to_status="PROCESSING"
+                    )
+                }
+        return retry_transient(claim, operation="diagnosis_batch_claim")
+
+    def __release_batch(self, study_ids: List[UUID]) -> None:
+        """Devuelve a `PENDING` estudios tomados que no se llegaron a diagnosticar."""
+        if not study_ids:
+            return
+
+        def release():
+            with UnitOfWork(self.__session_factory) as db:
+                for study_id in study_ids:
+                    self.__study_service.transition_status(
+                        db, study_id=study_id, from_status="PROCESSING", to_status="PENDING"
+                    )
+        try:
+            retry_transient(release, operation="diagnosis_batch_release")
         except Exception as e:
-            log.error(f"Unexpected error in diagnose workflow (DiagnoseService): {e}")
-            import traceback
-            log.error(f"Traceback: {traceback.format_exc()}")
+            log.error(f"Could not release batch studies (DiagnoseService): {e}")
+
+    def __complete_study(self, db: Session, study_id: UUID, csv_file_id: UUID, verdict: dict):
+        update_data = MedicalStudyUpdateDTO(
+            status="COMPLETED",
+            ml_results=encode_results(verdict),
+            csv_file_id=csv_file_id
+        )
+        # Se agrega a la sesión antes del update para que ambos se
+        # confirmen en la misma transacción.
+        self.__study_result_service.record_verdict(db, study_id=str(study_id), verdict=verdict)
+        return self.__study_service.update(db, study_id=study_id, study_update=update_data)
+
+    @staticmethod
+    def __check_diagnosable(study_model: Optional[MedicalStudy], study_id: UUID) -> None:
+        if not study_model:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Internal server error (DiagnoseService): {str(e)}"
-            )
\ No newline at end of file
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Medical study with ID {study_id} not found.(DiagnoseService)"
+            )
+
+        if study_model.status != "PENDING":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Medical study with ID {study_id} is not in PENDING state. Current status: {study_model.status}(DiagnoseService)"
+            )
+
+        if not study_model.patient:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Patient not found for this study(DiagnoseService)"
+            )
+
+    @staticmethod
+    def __stored_filename(study_model: MedicalStudy, original_filename: str) -> str:
+        patient = study_model.patient
+        study_date_str = study_model.created_at.strftime('%Y%m%d')
+        original_extension = pathlib.Path(original_filename).suffix
+        return f"{patient.id}_{patient.name}_{patient.last_name}_{study_date_str}{original_extension}".replace(" ", "_")
+
+    async def __read_entries(self, files: List[UploadFile]) -> List[_BatchEntry]:
+        """
+        CSVs del request, sueltos o desde zips, con su estudio según el
+        nombre. Los límites de estudios y de tamaño se validan antes de
+        descomprimir: un zip chico con miles de miembros no se expande.
+        """
+        max_bytes = settings.DIAGNOSIS_BATCH_MAX_FILE_BYTES
+        max_studies = settings.DIAGNOSIS_BATCH_MAX_STUDIES
+        entries: List[_BatchEntry] = []
+        for upload in files:
+            filename = upload.filename or ""
+            suffix = pathlib.Path(filename).suffix.lower()
+            if suffix == ".csv":
+                self.__check_batch_size(len(entries) + 1)
+                content = await upload.read(max_bytes + 1)
+                entries.append(self.__entry(filename, content, max_bytes))
+            elif suffix == ".zip":
+                max_zip_bytes = max_studies * max_bytes
+                data = await upload.read(max_zip_bytes + 1)
+                if len(data) > max_zip_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Zip file too large (max {max_zip_bytes} bytes): {filename} (DiagnoseService)"
+                    )
+                try:
+                    archive = zipfile.ZipFile(io.BytesIO(data))
+                except zipfile.BadZipFile:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Invalid zip file: {filename} (DiagnoseService)"
+                    )
+                with archive:
+                    members = [
+                        info for info in archive.infolist()
+                        if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+                    ]
+                    self.__check_batch_size(len(entries) + len(members))
+                    for info in members:
+                        # El tamaño declarado puede mentir: se lee como máximo el límite.
+                        with archive.open(info) as member:
+                            content = member.read(max_bytes + 1)
+                        entries.append(self.__entry(pathlib.PurePosixPath(info.filename).name, content, max_bytes))
+            else:
+                self.__check_batch_size(len(entries) + 1)
+                entries.append(_BatchEntry(filename=filename, error="Invalid file type. Only CSV or ZIP files are allowed."))
+
+        seen = set()
+        for entry in entries:
+            if entry.error is None and entry.study_id in seen:
+                entry.error = "Study duplicated in batch."
+            seen.add(entry.study_id)
+        return entries
+
+    @staticmethod
+    def __check_batch_size(count: int) -> None:
+        if count > settings.DIAGNOSIS_BATCH_MAX_STUDIES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Too many studies in batch (max {settings.DIAGNOSIS_BATCH_MAX_STUDIES}) (DiagnoseService)"
+            )
+
+    @staticmethod
+    def __entry(filename: str, content: bytes, max_bytes: int) -> _BatchEntry:
+        path = pathlib.PurePosixPath(filename)
+        if path.suffix.lower() != ".csv":
+            return _BatchEntry(filename=filename, error="Invalid file type. Only CSV files are allowed.")
+        try:
+            study_id = UUID(path.stem)
+        except ValueError:
+            return _BatchEntry(filename=filename, error="File name must be <study_id>.csv")
+        if len(content) > max_bytes:
+            return _BatchEntry(filename=filename, study_id=study_id, error=f"File too large (max {max_bytes} bytes).")
+        return _BatchEntry(filename=filename, study_id=study_id, content=content)
@@ -1,10 +1,14 @@
-import uuid
+import os
+from datetime import datetime
 from fastapi import UploadFile, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import BinaryIO, NoReturn, Optional, Tuple
 from uuid import UUID
 from loguru import logger as log
+from ..core.config import settings
+from ..core.file_storage import StoredFileWriter, default_storage_codec
 from ..infrastructure.repositories.file_manager_repo import FileStorageRepo
+from ..infrastructure.db.models.file_manager import FileStorage
 from ..infrastructure.db.DTOs.file_manager_dto import FileStorageBaseDTO, FileStorageResponseDTO
 
 class FileStorageService:
@@ -34,48 +38,101 @@ class FileStorageService:
         Returns:
             FileStorageResponseDTO: Información del archivo guardado
         """
-        import os
-        from datetime import datetime
-        
+        writer = None
         try:
-            base_upload_dir = os.path.expanduser("~/uploads")
-            patient_dir = os.path.join(base_upload_dir, str(patient_dni))
-            
-            os.makedirs(patient_dir, exist_ok=True)
-            
-            if custom_filename:
-                filename = custom_filename
-            else:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{timestamp}_{file.filename}"
-                
-            file_path = os.path.join(patient_dir, filename)
-            
-            file_content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-            
-            file_data = FileStorageBaseDTO(
-                filename=filename,
-                original_filename=file.filename,
-                file_type=file.content_type or 'application/octet-stream',
-                file_size=len(file_content),
-                file_content_binary=None,
-                file_path=file_path,
-                description=description,
-                user_id=user_id
-            )
-            
-            saved_file = self.__file_storage_repo.create(db, obj_in=file_data.model_dump())
-            log.success(f"File saved successfully (FileManagerService)")
-            return FileStorageResponseDTO.model_validate(saved_file)
+            filename, file_path = self.__target_path(patient_dni, file.filename, custom_filename)
+            writer = StoredFileWriter(file_path, codec=default_storage_codec())
+            while True:
+                chunk = await file.read(settings.FILE_STORAGE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return self.__record(db, writer, filename, file.filename, file.content_type, user_id, description)
             
         except Exception as e:
-            log.error(f"Error saving file (FileManagerService): {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error saving file (FileManagerService): {str(e)}"
-            )
+            self.__save_failed(writer, e)
+
+    def save_stream_to_db(
+        self,
+        db: Session,
+        stream: BinaryIO,
+        original_filename: str,
+        content_type: Optional[str],
+        user_id: UUID,
+        patient_dni: str,
+        custom_filename: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> FileStorageResponseDTO:
+        """
+        `save_file_to_db` desde un stream síncrono, para hilos fuera del
+        event loop (trabajos de diagnóstico en segundo plano).
+        """
+        writer = None
+        try:
+            filename, file_path = self.__target_path(patient_dni, original_filename, custom_filename)
+            writer = StoredFileWriter(file_path, codec=default_storage_codec())
+            while True:
+                chunk = stream.read(settings.FILE_STORAGE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return self.__record(db, writer, filename, original_filename, content_type, user_id, description)
+
+        except Exception as e:
+            self.__save_failed(writer, e)
+
+    @staticmethod
+    def __target_path(patient_dni: str, original_filename: str, custom_filename: Optional[str]) -> Tuple[str, str]:
+        base_upload_dir = os.path.expanduser(settings.UPLOADS_DIR)
+        patient_dir = os.path.join(base_upload_dir, str(patient_dni))
+        
+        os.makedirs(patient_dir, exist_ok=True)
+        
+        if custom_filename:
+            filename = custom_filename
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{timestamp}_{original_filename}"
+            
+        return filename, os.path.join(patient_dir, filename)
+
+    def __record(
+        self,
+        db: Session,
+        writer: StoredFileWriter,
+        filename: str,
+        original_filename: str,
+        content_type: Optional[str],
+        user_id: UUID,
+        description: Optional[str]
+    ) -> FileStorageResponseDTO:
+        file_size, content_hash = writer.close()
+        
+        file_data = FileStorageBaseDTO(
+            filename=filename,
+            original_filename=original_filename,
+            file_type=content_type or 'application/octet-stream',
+            file_size=file_size,
+            file_path=writer.path,
+            content_hash=content_hash,
+            storage_codec=writer.codec,
+            description=description,
+            user_id=user_id
+        )
+        
+        saved_file = self.__file_storage_repo.create(db, obj_in=file_data.model_dump())
+        log.success(f"File saved successfully (FileManagerService)")
+        return FileStorageResponseDTO.model_validate(saved_file)
+
+    @staticmethod
+    def __save_failed(writer: Optional[StoredFileWriter], error: Exception) -> NoReturn:
+        if writer is not None and not writer.closed:
+            writer.abort()
+        log.error(f"Error saving file (FileManagerService): {error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error saving file (FileManagerService): {str(error)}"
+        )
 
     def get_file_by_id(self, db: Session, file_id: UUID) -> Optional[FileStorageResponseDTO]:
         """
@@ -89,6 +146,27 @@ class FileStorageService:
         log.success(f"File found successfully (FileManagerService)")
         return FileStorageResponseDTO.model_validate(file_record)
 
+    def get_study_file_record(self, db: Session, file_id: UUID) -> FileStorage:
+        """
+        Obtiene el registro de un archivo CSV asociado a un estudio médico
+        (`MedicalStudy.csv_file_id`) y verifica que exista en disco.
+        """
+        file_record = self.__file_storage_repo.get_study_file(db, id=str(file_id))
+        if not file_record or not file_record.file_path:
+            log.error(f"Study file not found (FileManagerService)")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Study file not found (FileManagerService)"
+            )
+
+        if not os.path.isfile(file_record.file_path):
+            log.error(f"Study file missing on disk (FileManagerService): {file_record.file_path}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Study file content not available (FileManagerService)"
+            )
+        return file_record
+
     def delete_file(self, db: Session, file_id: UUID, user_id: UUID) -> bool:
         """
         Elimina un archivo (solo el propietario puede eliminarlo).
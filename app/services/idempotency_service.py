@@ -0,0 +1,143 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import partial
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from loguru import logger as log
+
+from ..core.config import settings
+from ..core.db import BackgroundSessionLocal
+from ..core.db_retry import retry_transient
+from ..core.metrics import IDEMPOTENCY_REQUESTS
+from ..core.unit_of_work import UnitOfWork
+from ..infrastructure.repositories.base_repo import utcnow
+from ..infrastructure.repositories.idempotency_key_repo import IdempotencyKeyRepo
+
+
+@dataclass
+class IdempotencyReservation:
+    """
+    Resultado de `reserve`: `id` si la clave quedó para este request,
+    `replay` con la respuesta ya guardada, o `in_progress` si otro
+    request con la misma clave todavía no terminó.
+    """
+    id: Optional[str] = None
+    status_code: Optional[int] = None
+    body: Any = None
+    in_progress: bool = False
+
+    @property
+    def replay(self) -> bool:
+        return self.status_code is not None
+
+
+class IdempotencyService:
+    """
+    `Idempotency-Key` para endpoints que no se pueden repetir. La clave se
+    reserva en una transacción propia antes de trabajar; al terminar se
+    guarda la respuesta (2xx y 4xx) y los reintentos con la misma clave la
+    reciben sin repetir nada. Ante un 5xx la reserva se borra para que el
+    cliente pueda reintentar.
+    """
+
+    def __init__(
+        self,
+        idempotency_key_repo: IdempotencyKeyRepo,
+        session_factory: Callable[[], Session] = BackgroundSessionLocal
+    ):
+        self.__repo = idempotency_key_repo
+        self.__session_factory = session_factory
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """Huella del request: la misma clave con otro request se rechaza."""
+        return hashlib.sha256("\n".join(str(part) for part in parts).encode()).hexdigest()
+
+    def reserve(self, *, scope: str, key: str, fingerprint: str) -> IdempotencyReservation:
+        reserve = partial(self.__reserve, scope, key, fingerprint)
+        try:
+            reservation = retry_transient(reserve, operation="idempotency_reserve")
+        except IntegrityError:
+            # Otro request insertó la clave entre la lectura y el INSERT.
+            reservation = retry_transient(reserve, operation="idempotency_reserve")
+        outcome = "replayed" if reservation.replay else "in_progress" if reservation.in_progress else "new"
+        IDEMPOTENCY_REQUESTS.labels(scope, outcome).inc()
+        return reservation
+
+    def save(self, reservation: IdempotencyReservation, *, status_code: int, body: Any, db: Optional[Session] = None) -> None:
+        """
+        Guarda la respuesta de la clave. Con `db` se escribe en esa
+        transacción: la respuesta queda confirmada junto con lo que describe.
+        """
+        def complete(session: Session) -> None:
+            self.__repo.complete(
+                session,
+                id=reservation.id,
+                status_code=status_code,
+                response_body=json.dumps(body),
+                expires_at=utcnow() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+            )
+
+        if db is not None:
+            complete(db)
+            return
+
+        def save():
+            with UnitOfWork(self.__session_factory) as session:
+                complete(session)
+        try:
+            retry_transient(save, operation="idempotency_save")
+        except Exception as e:
+            # La respuesta ya está hecha; un reintento con la clave verá la reserva hasta que venza.
+            log.error(f"Could not save idempotent response {reservation.id} (IdempotencyService): {e}")
+
+    def release(self, reservation: IdempotencyReservation) -> None:
+        def release():
+            with UnitOfWork(self.__session_factory) as db:
+                self.__repo.release(db, id=reservation.id)
+        try:
+            retry_transient(release, operation="idempotency_release")
+        except Exception as e:
+            log.error(f"Could not release idempotency key {reservation.id} (IdempotencyService): {e}")
+
+    def purge_expired(self, batch_size: int = 500) -> int:
+        """Borra las claves vencidas, por lotes."""
+        total = 0
+        while True:
+            with UnitOfWork(self.__session_factory) as db:
+                deleted = self.__repo.delete_expired(db, before=utcnow(), limit=batch_size)
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    def __reserve(self, scope: str, key: str, fingerprint: str) -> IdempotencyReservation:
+        lock_until = utcnow() + timedelta(seconds=settings.IDEMPOTENCY_KEY_LOCK_SECONDS)
+        with UnitOfWork(self.__session_factory) as db:
+            record = self.__repo.get(db, scope=scope, key=key)
+            if record is None:
+                record = self.__repo.create(
+                    db, obj_in={"scope": scope, "key": key, "fingerprint": fingerprint, "expires_at": lock_until}
+                )
+                return IdempotencyReservation(id=record.id)
+
+            if record.expires_at <= utcnow():
+                # Respuesta caducada o request que murió sin terminar: la clave es nueva.
+                if self.__repo.take_over(db, id=record.id, fingerprint=fingerprint, expires_at=lock_until):
+                    return IdempotencyReservation(id=record.id)
+                return IdempotencyReservation(in_progress=True)
+
+            if record.fingerprint != fingerprint:
+                IDEMPOTENCY_REQUESTS.labels(scope, "mismatch").inc()
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request (IdempotencyService)"
+                )
+            if record.status_code is None:
+                return IdempotencyReservation(in_progress=True)
+            return IdempotencyReservation(
+                id=record.id, status_code=record.status_code, body=json.loads(record.response_body)
+            )
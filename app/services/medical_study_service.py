@@ -1,16 +1,19 @@
 from uuid import UUID
-from ..core.encryption import decrypt_data
+from ..core.results_codec import results_to_text
 from sqlalchemy.orm import Session, joinedload 
-from sqlalchemy import or_
 from ..infrastructure.db.models.medical_study import MedicalStudy
-from ..infrastructure.db.models.user import User
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from loguru import logger as log
 
 from ..infrastructure.repositories.medical_study_repo import MedicalStudyRepo
 from ..infrastructure.repositories.user_repo import UserRepo
+from ..infrastructure.repositories.loaders import get_loaders
+from ..infrastructure.repositories.role_catalog import get_role_catalog
 from ..infrastructure.db.DTOs.medical_study_dto import MedicalStudyCreateDTO, MedicalStudyUpdateDTO, MedicalStudyResponseDTO
+from ..infrastructure.db.DTOs.study_projection import StudyProjection
+from ..core.config import settings
+from ..core.pagination import Page
 
 
 class MedicalStudyService:
@@ -28,62 +31,38 @@ class MedicalStudyService:
                 detail="Medical Study Service: Access code already exists."
             )
 
-        doctor = self.__user_repo.get(db, id=study_data.doctor_id)
+        # Médico, paciente y técnico (con sus roles) en una sola consulta.
+        doctor, patient, technician = get_loaders(db).load_users(
+            [study_data.doctor_id, study_data.patient_id, study_data.technician_id]
+        )
         if not doctor:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Medical Study Service: Doctor not found.")
         
         admin_role_id, doctor_role_id, patient_role_id, technician_role_id = self.__get_role_ids_from_db(db)
         
-        doctor_role_ids = [str(role.id) for role in doctor.roles]
-        doctor_role_names = [role.name for role in doctor.roles]
-        
-        
-        has_doctor_role = (
-            "Doctor" in doctor_role_names or 
-            str(doctor_role_id) in doctor_role_ids
-        )
-        
-        if not has_doctor_role:
+        if not self.__has_role(doctor, "Doctor", doctor_role_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
-                detail=f"Medical Study Service: User is not a doctor. User has roles: {doctor_role_names}"
+                detail=f"Medical Study Service: User is not a doctor. User has roles: {[role.name for role in doctor.roles]}"
             )
         
-        patient = self.__user_repo.get(db, id=study_data.patient_id)
         if not patient:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Medical Study Service: Patient not found.")
-        
-        patient_role_ids = [str(role.id) for role in patient.roles]
-        patient_role_names = [role.name for role in patient.roles]
 
-        has_patient_role = (
-            "Patient" in patient_role_names or 
-            str(patient_role_id) in patient_role_ids
-        )
-        
-        if not has_patient_role:
+        if not self.__has_role(patient, "Patient", patient_role_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
-                detail=f"Medical Study Service: User is not a patient. User has roles: {patient_role_names}"
+                detail=f"Medical Study Service: User is not a patient. User has roles: {[role.name for role in patient.roles]}"
             )
 
         if study_data.technician_id:
-            technician = self.__user_repo.get(db, id=study_data.technician_id)
             if not technician:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Medical Study Service: Technician not found.")
 
-            technician_role_ids = [str(role.id) for role in technician.roles]
-            technician_role_names = [role.name for role in technician.roles]
-
-            has_technician_role = (
-                "Technician" in technician_role_names or 
-                str(technician_role_id) in technician_role_ids
-            )
-            
-            if not has_technician_role:
+            if not self.__has_role(technician, "Technician", technician_role_id):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST, 
-                    detail=f"Medical Study Service: User is not a technician. User has roles: {technician_role_names}"
+                    detail=f"Medical Study Service: User is not a technician. User has roles: {[role.name for role in technician.roles]}"
                 )
 
         try:
@@ -97,40 +76,118 @@ class MedicalStudyService:
                 detail="Medical Study Service: Error creating medical study, backend error: " + str(e)
             )
 
-    def __get_role_ids_from_db(self, db: Session):
+    def create_studies(self, db: Session, studies_data: List[MedicalStudyCreateDTO]) -> List[MedicalStudyResponseDTO]:
         """
-        Obtiene los IDs reales de roles desde la base de datos
+        Crea varios estudios en una transacción. Códigos de acceso y roles
+        de médicos, pacientes y técnicos se validan con una consulta por
+        conjunto, no por estudio. Si alguno es inválido no se crea ninguno
+        y el error indica cada posición.
         """
-        try:
-            from ..infrastructure.db.models.role import Role
-            roles = db.query(Role).all()
-            
-            role_map = {}
-            for role in roles:
-                role_map[role.name] = role.id
-            
-            return (
-                role_map.get('Admin'),
-                role_map.get('Doctor'), 
-                role_map.get('Patient'),
-                role_map.get('Technician')
+        if len(studies_data) > settings.MEDICAL_STUDY_BATCH_MAX_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Medical Study Service: Too many studies: {len(studies_data)} (max {settings.MEDICAL_STUDY_BATCH_MAX_SIZE})."
             )
-        except Exception as e:
-            print(f"DEBUG: Error in __get_role_ids_from_db: {e}")
-            import traceback
-            traceback.print_exc()
+
+        errors: Dict[int, List[str]] = {}
+        existing_codes = self.__medical_study_repo.existing_access_codes(
+            db, [study.access_code for study in studies_data]
+        )
+        # Se conservan los usuarios para armar las respuestas sin volver a consultarlos.
+        users = self.__user_repo.get_with_role_ids(db, [
+            user_id
+            for study in studies_data
+            for user_id in (study.doctor_id, study.patient_id, study.technician_id)
+            if user_id is not None
+        ])
+        _, doctor_role_id, patient_role_id, technician_role_id = self.__get_role_ids_from_db(db)
+
+        seen_codes = set()
+        for index, study in enumerate(studies_data):
+            study_errors = []
+            if study.access_code in existing_codes:
+                study_errors.append("Access code already exists.")
+            elif study.access_code in seen_codes:
+                study_errors.append("Access code duplicated in batch.")
+            seen_codes.add(study.access_code)
+
+            for label, user_id, role_id in (
+                ("Doctor", study.doctor_id, doctor_role_id),
+                ("Patient", study.patient_id, patient_role_id),
+                ("Technician", study.technician_id, technician_role_id),
+            ):
+                if user_id is None:
+                    continue
+                user = users.get(str(user_id))
+                if user is None:
+                    study_errors.append(f"{label} not found.")
+                elif role_id not in user.role_ids:
+                    study_errors.append(f"User is not a {label.lower()}.")
+            if study_errors:
+                errors[index] = study_errors
+
+        if errors:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error fetching roles from database: " + str(e)
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "Medical Study Service: Invalid studies in batch, none were created.",
+                    "errors": [{"index": index, "errors": study_errors} for index, study_errors in errors.items()],
+                }
             )
 
+        studies = self.__medical_study_repo.create_many(
+            db, objs_in=[study.model_dump() for study in studies_data]
+        )
+        log.success(f"{len(studies)} Medical Studies created successfully (MedicalStudyService)")
+        return [MedicalStudyResponseDTO.model_validate(study) for study in studies]
+
+    def get_for_diagnosis(self, db: Session, study_ids: List[UUID]) -> Dict[str, MedicalStudy]:
+        """Estudios por ID (como string) con su paciente cargado."""
+        return self.__medical_study_repo.get_many_with_patient(db, study_ids)
+
+    def transition_status(self, db: Session, *, study_id: UUID, from_status: str, to_status: str) -> bool:
+        """Cambia el estado solo si el estudio sigue en `from_status`; devuelve si lo cambió."""
+        return self.__medical_study_repo.transition_status(
+            db, id=study_id, from_status=from_status, to_status=to_status
+        )
+
+    @staticmethod
+    def __has_role(user, role_name: str, role_id) -> bool:
+        """El usuario tiene el rol, por nombre o por ID (roles ya precargados)."""
+        return any(role.name == role_name or str(role.id) == str(role_id) for role in user.roles)
+
+    def __get_role_ids_from_db(self, db: Session):
+        """
+        IDs de los roles desde el catálogo en memoria (sin consultar la base).
+        """
+        catalog = get_role_catalog()
+        return tuple(catalog.id_for(db, name) for name in ('Admin', 'Doctor', 'Patient', 'Technician'))
 
+    def _project(self, study: MedicalStudy, projection: StudyProjection) -> Dict[str, Any]:
+        """Serializa un estudio proyectado; descifra `ml_results` solo si fue pedido."""
+        ml_results = results_to_text(study.ml_results) if projection.include_ml_results else None
+        return projection.to_dict(study, ml_results=ml_results)
 
-    def get_by_id(self, db: Session, study_id: UUID) -> Optional[MedicalStudyResponseDTO]:
+    def get_by_id(
+        self,
+        db: Session,
+        study_id: UUID,
+        projection: Optional[StudyProjection] = None
+    ) -> Optional[MedicalStudyResponseDTO | Dict[str, Any]]:
         """
         Obtiene un estudio médico por ID y lo convierte a DTO.
+        Con `projection` devuelve solo los campos pedidos, sin uniones ni
+        descifrado innecesarios (404 si no existe).
         """
-        
+        if projection is not None:
+            study = self.__medical_study_repo.get_by_id_projected(db, study_id, projection)
+            if not study:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Medical study with ID {study_id} not found.(MedicalStudyService)"
+                )
+            return self._project(study, projection)
+
         try:
             study = db.query(MedicalStudy).options(
                 joinedload(MedicalStudy.patient),
@@ -153,7 +210,7 @@ class MedicalStudyService:
                 "access_code": study.access_code,
                 "status": study.status,
                 "creation_date": study.created_at, 
-                "ml_results": decrypt_data(study.ml_results),
+                "ml_results": results_to_text(study.ml_results),
                 "clinical_data": study.clinical_data,
                 "csv_file_id": study.csv_file_id,
                 "patient": study.patient,
@@ -170,7 +227,14 @@ class MedicalStudyService:
                 detail="Error converting medical study to DTO (MedicalStudyService): " + str(e)
             )
     
-    def get_by_patient_dni(self, db: Session, *, dni: str, access_code: str) -> List[MedicalStudy]:
+    def get_by_patient_dni(
+        self,
+        db: Session,
+        *,
+        dni: str,
+        access_code: str,
+        projection: Optional[StudyProjection] = None
+    ) -> List[MedicalStudy] | List[Dict[str, Any]]:
         """
         Obtiene estudios por DNI del paciente con validación de código de acceso.
         """
@@ -179,7 +243,9 @@ class MedicalStudyService:
         
         dni = dni.strip().replace("-", "").replace(".", "")
         
-        studies = self.__medical_study_repo.get_by_patient_dni_and_access_code(db, dni, access_code)
+        studies = self.__medical_study_repo.get_by_patient_dni_and_access_code(
+            db, dni, access_code, projection=projection
+        )
 
         if not studies:
             raise HTTPException(
@@ -187,47 +253,59 @@ class MedicalStudyService:
                 detail="No se encontraron estudios o credenciales inválidas (MedicalStudyService)"
             )
         
+        if projection is not None:
+            return [self._project(study, projection) for study in studies]
         return studies
-    def get_by_patient_name(self, db: Session, *, name: str) -> List[MedicalStudy]:
+    def get_by_patient_name(
+        self,
+        db: Session,
+        *,
+        name: str,
+        skip: int = 0,
+        limit: int = 100,
+        projection: Optional[StudyProjection] = None
+    ) -> List[MedicalStudyResponseDTO] | List[Dict[str, Any]]:
         """
         Busca estudios por nombre o apellido del paciente.
-        Es insensible a mayúsculas/minúsculas.
+        Es insensible a mayúsculas/minúsculas y acentos; resultados por relevancia.
+        Con `projection` devuelve solo los campos pedidos.
         """
-        search_term = f"%{name}%"
-        return (
-            db.query(self.model)
-            .join(User, self.model.patient_id == User.id)
-            .filter(
-                or_(
-                    User.name.ilike(search_term),
-                    User.last_name.ilike(search_term)
-                )
-            )
-            .all()
+        studies = self.__medical_study_repo.get_by_patient_name(
+            db, name=name, skip=skip, limit=limit, projection=projection
         )
+        if projection is not None:
+            return [self._project(study, projection) for study in studies]
+        return [MedicalStudyResponseDTO.model_validate(study) for study in studies]
     
-    def get_all_studies(self, db: Session) -> List[MedicalStudyResponseDTO]:
+    def get_all_studies(
+        self,
+        db: Session,
+        projection: Optional[StudyProjection] = None,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Page[MedicalStudyResponseDTO] | Page[Dict[str, Any]]:
         """
-        Obtiene todos los estudios médicos y los convierte a DTO.
+        Obtiene una página de estudios médicos (más recientes primero) y los
+        convierte a DTO. `page.next_cursor` permite pedir la siguiente.
+        Con `projection` devuelve solo los campos pedidos.
         """
-        studies = self.__medical_study_repo.get_all(db)
-        
-        return [
-            MedicalStudyResponseDTO.model_validate(study) 
-            for study in studies
-        ]
+        try:
+            page = self.__medical_study_repo.get_page(db, cursor=cursor, limit=limit, projection=projection)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        if projection is not None:
+            page.items = [self._project(study, projection) for study in page.items]
+        else:
+            page.items = [MedicalStudyResponseDTO.model_validate(study) for study in page.items]
+        return page
 
     def delete_study(self, db: Session, study_id: UUID):
         """
         Verifica que un estudio exista y luego lo elimina.
         """
-        study_to_delete = self.get_by_id(db, study_id=study_id)
-        if not study_to_delete:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Medical study not found"
-            )
-        result = self.__medical_study_repo.delete(db, id=study_to_delete.id)
+        result = self.__medical_study_repo.delete(db, id=study_id)
         log.success(f"Study deleted successfully (MedicalStudyService)")
         return result
 
@@ -248,11 +326,12 @@ class MedicalStudyService:
         if "doctor_id" in update_data:
             new_doctor_id = update_data["doctor_id"]
             log.success(f"Doctor ID updated successfully (MedicalStudyService)")
-            doctor = self.__user_repo.get(db, id=new_doctor_id)
-            if not doctor or "DOCTOR" not in [role.name for role in doctor.roles]:
+            doctor = get_loaders(db).load_user(new_doctor_id)
+            if not doctor or "Doctor" not in [role.name for role in doctor.roles]:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid new Doctor ID: {new_doctor_id}(MedicalStudyService)")
         
 
         updated_study = self.__medical_study_repo.update(db, db_obj=db_study, obj_in=update_data)
         log.success(f"Study updated successfully (MedicalStudyService)")
-        return MedicalStudyResponseDTO.model_validate(updated_study)
\ No newline at end of file
+        dto = MedicalStudyResponseDTO.model_validate(updated_study)
+        return dto.model_copy(update={"ml_results": results_to_text(updated_study.ml_results)})
\ No newline at end of file
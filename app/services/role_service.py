@@ -3,17 +3,19 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from typing import List, Union
 import uuid
+from loguru import logger as log
 from ..infrastructure.repositories.role_repo import RoleRepo
-from ..infrastructure.db.models.role import Role
+from ..infrastructure.repositories.role_catalog import CachedRole, get_role_catalog
+from ..core.unit_of_work import after_commit
 from ..infrastructure.db.DTOs.role_dto import RoleBaseDTO as RoleDTO, RoleResponseDTO
 
 class RoleService:
     def __init__(self, role_repo: RoleRepo):
         self._role_repo = role_repo
 
-    def get_role(self, role_id: Union[str, uuid.UUID]) -> Role:
-        """Obtiene el rol completo por su ID (acepta string o UUID)"""
-        role = self._role_repo.get_by_id(role_id)
+    def get_role(self, role_id: Union[str, uuid.UUID]) -> CachedRole:
+        """Obtiene el rol (id y nombre) desde el catálogo en memoria"""
+        role = get_role_catalog().get(self._role_repo.db, role_id)
         if not role:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -33,9 +35,9 @@ class RoleService:
 
     def get_all_roles(self) -> List[RoleResponseDTO]:
         """Obtiene todos los roles"""
-        roles = self._role_repo.get_all()
+        roles = get_role_catalog().all(self._role_repo.db)
         return [RoleResponseDTO.model_validate(role) for role in roles]
-    
+
     def create_role(self, name: str) -> RoleDTO:
         """Crea un nuevo rol"""
         if not name:
@@ -44,5 +46,32 @@ class RoleService:
                 detail="Role name is required (RoleService)"
             )
         role = self._role_repo.create(name=name)
+        after_commit(self._role_repo.db, get_role_catalog().invalidate)
         log.success(f"Role created successfully (RoleService)")
-        return RoleDTO.model_validate(role)
\ No newline at end of file
+        return RoleDTO.model_validate(role)
+
+    def update_role(self, role_id: Union[str, uuid.UUID], name: str) -> RoleResponseDTO:
+        """Renombra un rol"""
+        role = self._role_repo.get_by_id(role_id)
+        if not role:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Role with ID {role_id} not found (RoleService)"
+            )
+        role = self._role_repo.update(db_obj=role, name=name)
+        after_commit(self._role_repo.db, get_role_catalog().invalidate)
+        log.success(f"Role updated successfully (RoleService)")
+        return RoleResponseDTO.model_validate(role)
+
+    def delete_role(self, role_id: Union[str, uuid.UUID]) -> RoleResponseDTO:
+        """Elimina un rol y sus asignaciones a usuarios"""
+        try:
+            role = self._role_repo.delete(id=role_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Role with ID {role_id} not found (RoleService)"
+            )
+        after_commit(self._role_repo.db, get_role_catalog().invalidate)
+        log.success(f"Role deleted successfully (RoleService)")
+        return RoleResponseDTO.model_validate(role)
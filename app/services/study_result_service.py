@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from loguru import logger as log
+
+from ..core.config import settings
+from ..infrastructure.repositories.study_result_repo import StudyResultRepo
+from ..infrastructure.db.DTOs.study_result_dto import StudyResultStatsDTO
+
+_MODEL_COLUMNS = {
+    "Random_Forest": "rf",
+    "XGBoost": "xgb",
+    "TensorFlow_Logistic_Regression": "keras",
+}
+
+def _votes(model_votes: Optional[Dict[str, Any]], prefix: str) -> Dict[str, Optional[int]]:
+    predictions = {}
+    if isinstance(model_votes, dict):
+        predictions = model_votes.get("predictions", model_votes)
+    return {
+        f"{prefix}_{suffix}": int(predictions[name]) if predictions.get(name) is not None else None
+        for name, suffix in _MODEL_COLUMNS.items()
+    }
+
+def _confidence(model_votes: Optional[Dict[str, Any]]) -> Optional[float]:
+    if isinstance(model_votes, dict) and model_votes.get("ensemble_confidence") is not None:
+        return float(model_votes["ensemble_confidence"])
+    return None
+
+def build_study_result_row(
+    study_id: str,
+    verdict: Dict[str, Any],
+    diagnosed_at: Optional[datetime] = None,
+    model_version: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Extrae del veredicto del pipeline los campos consultables y no
+    identificatorios que se guardan en `study_results`.
+    """
+    details = verdict.get("details") or {}
+    binary_votes = details.get("binary_model_votes")
+    classification = details.get("classification_details") or {}
+    class_votes = classification.get("model_votes") if classification.get("was_classified") else None
+
+    binary_vote_columns = _votes(binary_votes, "binary_vote")
+    cast_votes = [v for v in binary_vote_columns.values() if v is not None]
+    if len(cast_votes) >= 3:
+        # Misma regla que `should_classify`: positivo con 2 o más votos.
+        is_positive = sum(1 for v in cast_votes if v == 1) >= 2
+    else:
+        # Sin votos o ensamble reducido (desempate por confianza): vale el veredicto.
+        is_positive = str(verdict.get("final_diagnosis", "")).startswith("Posible positivo")
+
+    row = {
+        "study_id": str(study_id),
+        "is_positive": is_positive,
+        "classification_level": int(verdict.get("classification_level") or 0),
+        "binary_confidence": _confidence(binary_votes),
+        "classification_confidence": _confidence(class_votes),
+        "model_version": model_version or settings.MODELS_VERSION,
+        "diagnosed_at": diagnosed_at or datetime.now(timezone.utc),
+    }
+    row.update(binary_vote_columns)
+    row.update(_votes(class_votes, "class_vote"))
+    return row
+
+class StudyResultService:
+    def __init__(self, study_result_repo: StudyResultRepo):
+        self.__study_result_repo = study_result_repo
+
+    def record_verdict(self, db: Session, *, study_id: str, verdict: Dict[str, Any]):
+        """
+        Agrega a la sesión el resultado estructurado del diagnóstico. No hace
+        commit: se persiste en la misma transacción que la actualización del estudio.
+        """
+        row = build_study_result_row(study_id, verdict)
+        result = self.__study_result_repo.upsert(db, obj_in=row)
+        log.info(f"Study result recorded for study {study_id} (StudyResultService)")
+        return result
+
+    def get_stats(
+        self,
+        db: Session,
+        *,
+        is_positive: Optional[bool] = None,
+        classification_level: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[StudyResultStatsDTO]:
+        """Agregados de diagnósticos sin descifrar `ml_results`."""
+        rows = self.__study_result_repo.count_by_level(
+            db,
+            is_positive=is_positive,
+            classification_level=classification_level,
+            date_from=date_from,
+            date_to=date_to
+        )
+        return [StudyResultStatsDTO(**row) for row in rows]
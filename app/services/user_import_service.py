@@ -0,0 +1,272 @@
+import csv
+import io
+import json
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, BinaryIO, Callable, Dict, List, Tuple, Union
+
+from fastapi import HTTPException, status
+from loguru import logger as log
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.db import BackgroundSessionLocal
+from ..core.metrics import USER_IMPORT_PHASE_DURATION, USER_IMPORT_ROWS
+from ..core.security import get_password_hash, hash_passwords
+from ..core.unit_of_work import UnitOfWork, after_commit
+from ..infrastructure.db.DTOs.user_dto import (
+    UserImportReportDTO,
+    UserImportRowDTO,
+    UserImportRowResultDTO,
+)
+from ..infrastructure.repositories.role_catalog import get_role_catalog
+from ..infrastructure.repositories.user_repo import UserRepo
+from ..infrastructure.search import get_name_search_backend
+
+CSV_COLUMNS = ("name", "last_name", "email", "dni", "password")
+# Contraseñas por tarea enviada al pool de procesos.
+HASH_BATCH_SIZE = 32
+
+
+class UserImportService:
+    """
+    Alta masiva de usuarios con un mismo rol desde CSV o NDJSON. Valida
+    todas las filas antes de escribir, hashea las contraseñas en un pool de
+    procesos (`USER_IMPORT_HASH_PROCESSES`) e inserta usuarios y `UserRole`
+    con INSERT multi-fila, en transacciones de `USER_IMPORT_CHUNK_SIZE`
+    filas. Una fila inválida no frena al resto: el reporte indica el
+    resultado de cada una.
+    """
+
+    def __init__(self, user_repo: UserRepo, session_factory: Callable[[], Session] = BackgroundSessionLocal):
+        self.__user_repo = user_repo
+        self.__session_factory = session_factory
+
+    @staticmethod
+    def read_upload(file: BinaryIO) -> bytes:
+        """Lee el archivo del request hasta `USER_IMPORT_MAX_FILE_BYTES`; si es más grande, 413."""
+        max_bytes = settings.USER_IMPORT_MAX_FILE_BYTES
+        content = file.read(max_bytes + 1)
+        if len(content) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large (max {max_bytes} bytes) (UserImportService)"
+            )
+        return content
+
+    def import_users(
+        self,
+        db: Session,
+        *,
+        content: bytes,
+        filename: str,
+        role_id: Union[str, uuid.UUID]
+    ) -> UserImportReportDTO:
+        role = get_role_catalog().get(db, role_id)
+        if not role:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Role with ID {role_id} not found (UserImportService)"
+            )
+
+        started = time.perf_counter()
+        records = self.__parse(content, filename)
+        results = [UserImportRowResultDTO(row=i + 1, status="error") for i in range(len(records))]
+        valid = self.__validate(db, records, results)
+        self.__observe("validate", started)
+
+        started = time.perf_counter()
+        hashes = self.__hash_passwords([row.password for _, row in valid])
+        self.__observe("hash", started)
+
+        started = time.perf_counter()
+        pending = [(index, row, password_hash) for (index, row), password_hash in zip(valid, hashes)]
+        chunk_size = max(1, settings.USER_IMPORT_CHUNK_SIZE)
+        for start in range(0, len(pending), chunk_size):
+            self.__insert_chunk(pending[start:start + chunk_size], role.id, results)
+        self.__observe("insert", started)
+
+        created = sum(1 for result in results if result.status == "created")
+        USER_IMPORT_ROWS.labels("created").inc(created)
+        USER_IMPORT_ROWS.labels("error").inc(len(results) - created)
+        log.success(f"User import finished: {created}/{len(results)} users created with role {role.name} (UserImportService)")
+        return UserImportReportDTO(
+            role_id=role.id,
+            total=len(results),
+            created=created,
+            failed=len(results) - created,
+            rows=results
+        )
+
+    @staticmethod
+    def __observe(phase: str, started: float) -> None:
+        USER_IMPORT_PHASE_DURATION.labels(phase).observe(time.perf_counter() - started)
+
+    def __parse(self, content: bytes, filename: str) -> List[Any]:
+        """Registros del archivo: dicts, o el error de la línea si no se pudo leer."""
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded (UserImportService)")
+
+        extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        if extension == "csv":
+            reader = csv.DictReader(io.StringIO(text))
+            missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Missing CSV columns: {', '.join(missing)} (UserImportService)"
+                )
+            records = list(reader)
+        elif extension in ("ndjson", "jsonl"):
+            records = []
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    records.append(record if isinstance(record, dict) else ValueError("Line is not a JSON object"))
+                except ValueError as e:
+                    records.append(ValueError(f"Invalid JSON: {e}"))
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unsupported file type. Use .csv, .ndjson or .jsonl (UserImportService)"
+            )
+
+        if len(records) > settings.USER_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Too many rows: {len(records)} (max {settings.USER_IMPORT_MAX_ROWS}) (UserImportService)"
+            )
+        return records
+
+    def __validate(
+        self,
+        db: Session,
+        records: List[Any],
+        results: List[UserImportRowResultDTO]
+    ) -> List[Tuple[int, UserImportRowDTO]]:
+        """
+        Valida cada fila, descarta emails y DNIs repetidos en el archivo y
+        los ya registrados (un `IN (...)` por lote). Devuelve las filas válidas.
+        """
+        valid: List[Tuple[int, UserImportRowDTO]] = []
+        seen_emails, seen_dnis = set(), set()
+        for index, record in enumerate(records):
+            result = results[index]
+            if isinstance(record, Exception):
+                result.errors.append(str(record))
+                continue
+            result.email = str(record.get("email") or "") or None
+            try:
+                row = UserImportRowDTO.model_validate(record)
+            except ValidationError as e:
+                result.errors.extend(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                )
+                continue
+            if row.email in seen_emails:
+                result.errors.append("email: duplicated in file")
+            if row.dni in seen_dnis:
+                result.errors.append("dni: duplicated in file")
+            seen_emails.add(row.email)
+            seen_dnis.add(row.dni)
+            if not result.errors:
+                valid.append((index, row))
+
+        existing_emails = self.__user_repo.existing_emails(db, [row.email for _, row in valid])
+        existing_dnis = self.__user_repo.existing_dnis(db, [row.dni for _, row in valid])
+        checked = []
+        for index, row in valid:
+            if row.email in existing_emails:
+                results[index].errors.append("email: already registered")
+            if row.dni in existing_dnis:
+                results[index].errors.append("dni: already registered")
+            if not results[index].errors:
+                checked.append((index, row))
+        return checked
+
+    @staticmethod
+    def __hash_passwords(passwords: List[str]) -> List[str]:
+        """
+        Argon2 en `USER_IMPORT_HASH_PROCESSES` procesos (`spawn`: no heredan
+        hilos ni conexiones del servidor). Imports chicos usan el executor de
+        hashing del proceso.
+        """
+        processes = max(1, settings.USER_IMPORT_HASH_PROCESSES)
+        if processes == 1 or len(passwords) <= HASH_BATCH_SIZE:
+            return [get_password_hash(password) for password in passwords]
+        batches = [passwords[i:i + HASH_BATCH_SIZE] for i in range(0, len(passwords), HASH_BATCH_SIZE)]
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return [password_hash for batch in pool.map(hash_passwords, batches) for password_hash in batch]
+
+    def __insert_chunk(
+        self,
+        chunk: List[Tuple[int, UserImportRowDTO, str]],
+        role_id: str,
+        results: List[UserImportRowResultDTO]
+    ) -> None:
+        """
+        Una transacción por chunk. Si otro request registró un email o DNI
+        después de la validación, el chunk se reintenta fila por fila (con
+        savepoints) para reportar solo las filas en conflicto.
+        """
+        try:
+            with UnitOfWork(self.__session_factory) as chunk_db:
+                rows = self.__user_repo.bulk_create(
+                    chunk_db, users=[self.__user_data(row, password_hash) for _, row, password_hash in chunk], role_id=role_id
+                )
+                after_commit(chunk_db, partial(self.__index, rows))
+        except IntegrityError:
+            log.warning(f"User import chunk of {len(chunk)} rows conflicted, retrying row by row (UserImportService)")
+            self.__insert_rows(chunk, role_id, results)
+            return
+        for (index, _, _), row in zip(chunk, rows):
+            results[index].status = "created"
+            results[index].user_id = row["id"]
+
+    def __insert_rows(
+        self,
+        chunk: List[Tuple[int, UserImportRowDTO, str]],
+        role_id: str,
+        results: List[UserImportRowResultDTO]
+    ) -> None:
+        created: List[Tuple[int, Dict[str, Any]]] = []
+        with UnitOfWork(self.__session_factory) as chunk_db:
+            for index, row, password_hash in chunk:
+                try:
+                    with chunk_db.begin_nested():
+                        rows = self.__user_repo.bulk_create(
+                            chunk_db, users=[self.__user_data(row, password_hash)], role_id=role_id
+                        )
+                    created.append((index, rows[0]))
+                except IntegrityError:
+                    results[index].errors.append("email or dni: already registered")
+            after_commit(chunk_db, partial(self.__index, [row for _, row in created]))
+        for index, row in created:
+            results[index].status = "created"
+            results[index].user_id = row["id"]
+
+    @staticmethod
+    def __user_data(row: UserImportRowDTO, password_hash: str) -> Dict[str, Any]:
+        return {
+            "name": row.name,
+            "last_name": row.last_name or "",
+            "email": row.email,
+            "dni": row.dni,
+            "password": password_hash,
+        }
+
+    @staticmethod
+    def __index(rows: List[Dict[str, Any]]) -> None:
+        # El INSERT masivo no dispara los eventos del ORM que mantienen el índice de nombres.
+        backend = get_name_search_backend()
+        for row in rows:
+            backend.add(row["id"], row["name_normalized"], row["last_name_normalized"])
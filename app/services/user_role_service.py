@@ -4,6 +4,8 @@ from fastapi import HTTPException, status
 from ..infrastructure.repositories.user_role_repo import UserRoleRepo
 from ..infrastructure.repositories.user_repo import UserRepo
 from ..infrastructure.repositories.role_repo import RoleRepo
+from ..infrastructure.repositories.loaders import get_loaders
+from ..infrastructure.repositories.role_catalog import get_role_catalog
 from typing import List, Union
 from ..infrastructure.db.DTOs.user_role_dto import (
     UserRoleCreateDTO,
@@ -50,20 +52,14 @@ class UserRoleService:
         if not user_ids:
             return []
         
-        users = []
-        for user_id in user_ids:
-            user = self.__user_repo.get(db, id=user_id)
-            if user:
-                users.append(user)
-        
-        return users
+        users = get_loaders(db).load_users(user_ids)
+        return [user for user in users if user]
     
     def get_user_roles_by_user_id(self, db: Session, user_id: Union[str, uuid.UUID]) -> List[UserRoleResponseDTO]:
         """
         Obtiene todos los UserRoleResponseDTO para un user_id dado.
         """
-        normalized_user_id = self._normalize_id(user_id)
-        user_roles_orm = self.__user_role_repo.get_by_user_id(db, normalized_user_id)
+        user_roles_orm = get_loaders(db).load_user_roles(user_id)
         return [UserRoleResponseDTO.model_validate(ur) for ur in user_roles_orm]
 
     def create_user_role(self, db: Session, obj_in: UserRoleCreateDTO) -> UserRoleResponseDTO:
@@ -71,11 +67,12 @@ class UserRoleService:
         role_id = self._normalize_id(obj_in.role_id)
 
         
-        user = self.__user_repo.get(db, id=user_id)
+        loaders = get_loaders(db)
+        user = loaders.load_user(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found (UserRoleService)")
         
-        role = self.__role_repo.get_by_id(role_id)
+        role = get_role_catalog().get(db, role_id)
         if not role:
             raise HTTPException(status_code=404, detail="Role not found (UserRoleService)")
 
@@ -89,6 +86,8 @@ class UserRoleService:
         )
         
         user_role = self.__user_role_repo.create(db, obj_in=normalized_obj_in)
+        # Los roles ya cargados del usuario no incluyen la nueva asociación.
+        db.expire(user, ["role_associations"])
         return UserRoleResponseDTO.model_validate(user_role)
 
     def update_user_role(self, db: Session, id: Union[str, uuid.UUID], obj_in: UserRoleUpdateDTO) -> UserRoleResponseDTO:
@@ -99,12 +98,12 @@ class UserRoleService:
 
         if obj_in.user_id:
             normalized_user_id = self._normalize_id(obj_in.user_id)
-            if not self.__user_repo.get(db, normalized_user_id):
+            if not get_loaders(db).load_user(normalized_user_id):
                 raise HTTPException(status_code=404, detail="User not found (UserRoleService)")
         
         if obj_in.role_id:
             normalized_role_id = self._normalize_id(obj_in.role_id)
-            if not self.__role_repo.get_by_id(normalized_role_id):
+            if not get_role_catalog().get(db, normalized_role_id):
                 raise HTTPException(status_code=404, detail="Role not found (UserRoleService)")
             
         updated = self.__user_role_repo.update(db, db_obj=db_user_role, obj_in=obj_in)
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from ..infrastructure.db.DTOs.user_dto import UserCreateInternal, UserUpdateDTO, UserBaseDTO
 from ..infrastructure.repositories.user_repo import UserRepo
-from ..core.security import get_password_hash
+from ..core.pagination import Page
 
 
 class UserService:
@@ -17,6 +17,13 @@ class UserService:
         users = self.__user_repo.get_all(db, skip=skip, limit=limit)
         return users
 
+    def find_page(self, db: Session, *, cursor: str | None = None, limit: int = 100) -> Page[UserBaseDTO]:
+        """Página de usuarios por cursor. Cursor inválido: error 400."""
+        try:
+            return self.__user_repo.get_page(db, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     def find_by_id(self, db: Session, user_id: uuid.UUID) -> UserBaseDTO:
         """Busca un usuario por UUID, si no lo encuentra, lanza error 404."""
         user = self.__user_repo.get(db, id=user_id)
@@ -27,9 +34,9 @@ class UserService:
             )
         return user
 
-    def find_by_name(self, db: Session, name: str) -> List[UserBaseDTO]:
+    def find_by_name(self, db: Session, name: str, *, skip: int = 0, limit: int = 50) -> List[UserBaseDTO]:
         """Busca usuarios por nombre. Devuelve una lista vacía si no hay coincidencias."""
-        users = self.__user_repo.get_by_name(db, name=name)
+        users = self.__user_repo.get_by_name(db, name=name, skip=skip, limit=limit)
         return users
 
     def find_by_dni(self, db: Session, dni: str) -> UserBaseDTO:
@@ -66,11 +73,8 @@ class UserService:
                 detail="DNI already registered (UserService)"
             )
         
-        hashed_password = get_password_hash(user_create.password)
-        user_data = user_create.model_dump()
-        user_data["password"] = hashed_password
-
-        return self.__user_repo.create(db, obj_in=user_data)
+        # `UserRepo.create` hashea la contraseña.
+        return self.__user_repo.create(db, obj_in=user_create.model_dump())
 
     def update(self, db: Session, user_id: uuid.UUID, user_update: UserUpdateDTO) -> UserBaseDTO:
         """Actualiza un usuario."""
@@ -0,0 +1,74 @@
+"""
+Inferencia de N estudios: `run_diagnosis_pipeline` una vez por estudio
+(como `POST /diagnose/{study_id}`) contra `run_diagnosis_pipeline_batch`
+(como `POST /diagnose/batch`), con CSVs sintéticos. Mide el tiempo total y
+por estudio, con y sin explicaciones SHAP. Necesita los modelos de
+`trained_models/`.
+
+Uso:
+    python -m benchmarks.bench_batch_diagnosis --studies 48
+    python -m benchmarks.bench_batch_diagnosis --studies 48 --no-explanations
+
+Referencia (1 CPU, 48 estudios; los modelos XGBoost reemplazados por
+RandomForest porque SHAP 0.49 no lee los modelos de XGBoost 3 del repo):
+                  con SHAP             sin SHAP
+    per-study   9,60 s (200 ms/est.)   9,08 s (189 ms/est.)
+    batch       1,41 s ( 29 ms/est.)   0,38 s (  8 ms/est.)
+Con un estudio ambos caminos tardan lo mismo (~200 ms, casi todo el
+`predict` de Keras). La ganancia viene de una llamada por modelo y un
+`TreeExplainer` por modelo para todo el lote, en lugar de uno por estudio.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.ml_pipeline.helpers import FEATURE_COLUMNS  # noqa: E402
+from app.ml_pipeline.pipeline import (  # noqa: E402
+    read_study_frame,
+    run_diagnosis_pipeline,
+    run_diagnosis_pipeline_batch,
+)
+
+
+def synthetic_csvs(studies: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [
+        pd.DataFrame(rng.random((1, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS).to_csv(index=False)
+        for _ in range(studies)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--studies", type=int, default=48)
+    parser.add_argument("--no-explanations", action="store_true", help="sin SHAP")
+    args = parser.parse_args()
+
+    explain = not args.no_explanations
+    csvs = synthetic_csvs(args.studies)
+    # Primera inferencia fuera de la medición (grafo de Keras, cachés de SHAP).
+    run_diagnosis_pipeline(io.StringIO(csvs[0]), include_explanations=explain)
+
+    started = time.perf_counter()
+    for csv in csvs:
+        run_diagnosis_pipeline(io.StringIO(csv), include_explanations=explain)
+    per_study = time.perf_counter() - started
+
+    started = time.perf_counter()
+    run_diagnosis_pipeline_batch([read_study_frame(io.StringIO(csv)) for csv in csvs], include_explanations=explain)
+    batch = time.perf_counter() - started
+
+    print(f"studies={args.studies} explanations={explain}")
+    for name, elapsed in (("per-study", per_study), ("batch", batch)):
+        print(f"{name:<10} {elapsed:>7.2f} s  {elapsed / args.studies * 1000:>6.0f} ms/study")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Ráfaga de logins contra `POST /api/v1/auth/login` mientras otra tarea
+consulta un endpoint async trivial (`/ping`). Mide logins por segundo,
+latencia de login, latencia de `/ping` (si el event loop o el threadpool
+quedan bloqueados, sube) y el pico de hashes Argon2 simultáneos, que
+determina la memoria: cada uno reserva 64 MiB.
+
+Uso:
+    python -m benchmarks.bench_login_throughput --logins 64
+    PASSWORD_HASH_MAX_CONCURRENCY=4 python -m benchmarks.bench_login_throughput
+    python -m benchmarks.bench_login_throughput --legacy
+
+`--legacy` reproduce la verificación anterior: cada login verifica en un
+hilo del threadpool de la aplicación, sin límite propio (hasta 40
+hashes a la vez) y con un segundo hash cuando la contraseña no coincide.
+Con `--wrong-password` todos los logins fallan.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "bench")
+os.environ.setdefault("DB_USER", "bench")
+os.environ.setdefault("DB_PASS", "bench")
+os.environ.setdefault("ENCRYPTION_KEY", "bench")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+from sqlalchemy import create_engine, event, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.api.v1.auth import router as auth_router  # noqa: E402
+from app.core import metrics  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base, get_db_session  # noqa: E402
+from app.core.security import get_password_hash, pwd_context  # noqa: E402
+from app.infrastructure.db.models import Role, User, UserRole  # noqa: E402
+from app.infrastructure.repositories.role_catalog import get_role_catalog  # noqa: E402
+from app.services import auth_service  # noqa: E402
+
+PASSWORD = "bench-password"
+MIB_PER_HASH = 64
+
+
+def seed(engine, users: int) -> None:
+    Base.metadata.create_all(engine)
+    role_id = str(uuid.uuid4())
+    password_hash = get_password_hash(PASSWORD)
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    with sessionmaker(bind=engine)() as db:
+        db.execute(insert(Role.__table__), [{"id": role_id, "name": "Patient"}])
+        db.execute(insert(User.__table__), [
+            {
+                "id": id, "name": f"Bench{i}", "last_name": "Login", "dni": f"bench-{i}",
+                "email": f"bench{i}@example.com", "password": password_hash
+            }
+            for i, id in enumerate(user_ids)
+        ])
+        db.execute(insert(UserRole.__table__), [{"user_id": id, "role_id": role_id} for id in user_ids])
+        db.commit()
+
+
+def use_legacy_verification() -> None:
+    """Verificación previa: en el threadpool, sin límite, con re-hash al fallar."""
+    in_flight = metrics.AUTH_PASSWORD_HASH_IN_FLIGHT
+
+    def verify(plain_password: str, hashed_password: str) -> bool:
+        in_flight.inc()
+        try:
+            result = pwd_context.verify(plain_password, hashed_password)
+            if not result:
+                pwd_context.hash(plain_password)
+            return result
+        finally:
+            in_flight.dec()
+
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        return await run_in_threadpool(verify, plain_password, hashed_password)
+
+    auth_service.verify_password_async = verify_password_async
+
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def run(app: FastAPI, logins: int, users: int, password: str) -> dict:
+    login_latencies, ping_latencies, in_flight = [], [], []
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def login(i: int) -> None:
+            started = time.perf_counter()
+            response = await client.post("/api/v1/auth/login", data={
+                "username": f"bench{i % users}@example.com", "password": password
+            })
+            assert response.status_code in (200, 401), response.text
+            login_latencies.append(time.perf_counter() - started)
+
+        async def ping() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                ping_latencies.append(time.perf_counter() - started)
+                in_flight.append(metrics.AUTH_PASSWORD_HASH_IN_FLIGHT._value.get())
+                await asyncio.sleep(0.01)
+
+        pinger = asyncio.create_task(ping())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await pinger
+
+    return {
+        "elapsed": elapsed,
+        "login": login_latencies,
+        "ping": ping_latencies,
+        "peak_in_flight": int(max(in_flight, default=0)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--legacy", action="store_true", help="verificación anterior, sin executor")
+    parser.add_argument("--wrong-password", action="store_true", help="todos los logins fallan")
+    args = parser.parse_args()
+
+    # El login usa la sesión desde el threadpool: SQLite en archivo, no en memoria.
+    sqlite3.register_adapter(uuid.UUID, str)
+    path = os.path.join(tempfile.mkdtemp(), "bench_login.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _collation(dbapi_connection, connection_record):
+        dbapi_connection.create_collation("ascii_bin", lambda a, b: (a > b) - (a < b))
+
+    seed(engine, args.users)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    with Session() as db:
+        get_role_catalog().refresh(db)
+
+    def get_bench_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.dependency_overrides[get_db_session] = get_bench_db
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if args.legacy:
+        use_legacy_verification()
+
+    password = "wrong-password" if args.wrong_password else PASSWORD
+    result = asyncio.run(run(app, args.logins, args.users, password))
+
+    mode = "legacy (threadpool)" if args.legacy else f"executor ({settings.PASSWORD_HASH_MAX_CONCURRENCY} workers)"
+    peak = result["peak_in_flight"]
+    print(f"mode                 {mode}")
+    print(f"logins               {args.logins} in {result['elapsed']:.2f}s ({args.logins / result['elapsed']:.1f}/s)")
+    print(f"login latency        p50 {statistics.median(result['login']) * 1000:.0f} ms"
+          f"  p95 {percentile(result['login'], 0.95) * 1000:.0f} ms")
+    print(f"/ping latency        p50 {statistics.median(result['ping']) * 1000:.1f} ms"
+          f"  max {max(result['ping']) * 1000:.1f} ms  ({len(result['ping'])} samples)")
+    print(f"peak Argon2 hashes   {peak} (~{peak * MIB_PER_HASH} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compara el almacenamiento de `ml_results` en el formato anterior
+(Fernet(json)) con el codec v2 (Fernet(zstd(msgpack))).
+
+Uso:
+    python -m benchmarks.bench_results_codec --iterations 2000
+
+Reporta el tamaño almacenado y el tiempo medio de serializar y deserializar
+un veredicto representativo (positivo, clasificado, con explicaciones SHAP).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "bench")
+os.environ.setdefault("DB_USER", "bench")
+os.environ.setdefault("DB_PASS", "bench")
+if not os.getenv("ENCRYPTION_KEY"):
+    from cryptography.fernet import Fernet
+    os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+from app.core.encryption import decrypt_data, encrypt_data  # noqa: E402
+from app.core.results_codec import decode_results, encode_results  # noqa: E402
+
+METRICS = [
+    "standard_deviation", "root_mean_square", "minimum", "maximum", "zero_crossings",
+    "average_amplitude_change", "amplitude_first_burst", "mean_absolute_value",
+    "wave_form_length", "willison_amplitude",
+]
+MODELS = ["Random_Forest", "XGBoost", "TensorFlow_Logistic_Regression"]
+
+
+def _feature_factors(seed: int) -> list:
+    factors = []
+    for i, metric in enumerate(METRICS):
+        for electrode in range(1, 9):
+            value = ((seed + i * 8 + electrode) % 97) / 97
+            factors.append({
+                "feature": f"{metric}_e{electrode}",
+                "metric": metric,
+                "electrode": f"e{electrode}",
+                "shap_value": round(value - 0.5, 6),
+                "actual_value": round(value, 6),
+                "impact": "high" if value > 0.8 else "moderate" if value > 0.5 else "low",
+                "direction": "Aumenta la probabilidad" if value > 0.5 else "Disminuye la probabilidad",
+                "status": "above_normal" if value > 0.7 else "normal",
+                "z_score": round((value - 0.4) / 0.3, 4),
+            })
+    return factors
+
+
+def sample_verdict() -> dict:
+    votes = {
+        "predictions": {m: 1 for m in MODELS},
+        "probabilities": {f"{m}_preds": [0.81234567] for m in MODELS},
+        "ensemble_confidence": 0.8123456789,
+    }
+    classify = {
+        "predictions": {m: 2 for m in MODELS},
+        "probabilities": {f"{m}_preds": [[0.1, 0.2, 0.7]] for m in MODELS},
+        "predicted_class": 2,
+        "ensemble_confidence": 0.71234,
+    }
+    explanations = [
+        {
+            "model": m,
+            "prediction": 1,
+            "top_features": _feature_factors(j)[:10],
+            "feature_importance": _feature_factors(j),
+            "summary": "El modelo identificó patrones consistentes con una posible afección neuromuscular.",
+        }
+        for j, m in enumerate(MODELS)
+    ]
+    return {
+        "final_diagnosis": "Posible positivo para EMG",
+        "classification_level": 2,
+        "details": {
+            "binary_model_votes": votes,
+            "classification_details": {
+                "was_classified": True,
+                "model_votes": classify,
+                "final_level_assigned": 2,
+            },
+        },
+        "explanations": {
+            "binary_decision_factors": explanations,
+            "classification_factors": explanations,
+            "metadata": {
+                "explanation_method": "SHAP (SHapley Additive exPlanations)",
+                "explanation_timestamp": "2026-10-19T10:00:00.000000",
+                "models_explained": 6,
+            },
+        },
+    }
+
+
+def _time(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    verdict = sample_verdict()
+    legacy = encrypt_data(json.dumps(verdict))
+    v2 = encode_results(verdict)
+    assert decode_results(legacy) == verdict
+    assert decode_results(v2) == verdict
+
+    rows = [
+        ("legacy json+fernet", len(legacy),
+         _time(lambda: encrypt_data(json.dumps(verdict)), args.iterations),
+         _time(lambda: json.loads(decrypt_data(legacy)), args.iterations)),
+        ("v2 msgpack+zstd+fernet", len(v2),
+         _time(lambda: encode_results(verdict), args.iterations),
+         _time(lambda: decode_results(v2), args.iterations)),
+    ]
+    print(f"{'format':<24} {'stored bytes':>12} {'encode ms':>10} {'decode ms':>10}")
+    for name, size, enc, dec in rows:
+        print(f"{name:<24} {size:>12} {enc:>10.3f} {dec:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
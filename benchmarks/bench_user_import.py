@@ -0,0 +1,155 @@
+"""
+Alta de N usuarios con rol: uno por uno como `POST /api/v1/users/`
+(`UserService.create_user` + `UserRoleService.create_user_role`, una
+transacción por usuario) contra `UserImportService` (validación en lote,
+hashing en procesos, INSERT multi-fila por chunk). Informa filas por
+segundo, sentencias SQL y, para el import, el tiempo de cada fase.
+
+Uso:
+    python -m benchmarks.bench_user_import --rows 200
+    USER_IMPORT_HASH_PROCESSES=4 python -m benchmarks.bench_user_import --rows 2000 --skip-per-row
+
+Sin `--url` usa SQLite en un archivo temporal. Argon2 domina ambos
+caminos (~0,25 s por contraseña y núcleo); el pool de procesos solo
+acelera con más de un núcleo libre.
+
+Referencia (SQLite, 1 CPU, 200 filas, 2 procesos):
+    per-row   51,5 s (3,9 filas/s)   1401 sentencias  200 COMMIT
+    import    48,4 s (4,1 filas/s)      4 sentencias    1 COMMIT
+              validate 36 ms, hash 48,3 s, insert 49 ms
+Con un solo núcleo el hashing no escala; con N núcleos la fase hash
+se divide por ~`USER_IMPORT_HASH_PROCESSES`.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "bench")
+os.environ.setdefault("DB_USER", "bench")
+os.environ.setdefault("DB_PASS", "bench")
+os.environ.setdefault("ENCRYPTION_KEY", "bench")
+
+from sqlalchemy import create_engine, event, func, insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base  # noqa: E402
+from app.core.metrics import USER_IMPORT_PHASE_DURATION  # noqa: E402
+from app.core.unit_of_work import UnitOfWork  # noqa: E402
+from app.infrastructure.db.DTOs.user_dto import UserCreateInternal  # noqa: E402
+from app.infrastructure.db.DTOs.user_role_dto import UserRoleCreateDTO  # noqa: E402
+from app.infrastructure.db.models import Role, User, UserRole  # noqa: E402
+from app.infrastructure.repositories.role_catalog import get_role_catalog  # noqa: E402
+from app.infrastructure.repositories.role_repo import RoleRepo  # noqa: E402
+from app.infrastructure.repositories.user_repo import UserRepo  # noqa: E402
+from app.infrastructure.repositories.user_role_repo import UserRoleRepo  # noqa: E402
+from app.services.user_import_service import UserImportService  # noqa: E402
+from app.services.user_role_service import UserRoleService  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+
+PHASES = ("validate", "hash", "insert")
+
+
+class Counter:
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+
+    def _statement(self, *args):
+        self.statements += 1
+
+    def _commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = self.commits = 0
+
+
+def rows(prefix: str, count: int):
+    return [
+        {
+            "name": f"Bench{i}", "last_name": f"Importación {prefix}", "email": f"{prefix}{i}@example.com",
+            "dni": f"{prefix}-{i:08d}", "password": "bench-password"
+        }
+        for i in range(count)
+    ]
+
+
+def per_row(Session, role_id: str, users) -> None:
+    for user in users:
+        with UnitOfWork(Session) as db:
+            created = UserService(user_repo=UserRepo()).create_user(db, UserCreateInternal(**user))
+            UserRoleService(UserRoleRepo(UserRole, db), UserRepo(db), RoleRepo(db)).create_user_role(
+                db, UserRoleCreateDTO(user_id=created.id, role_id=role_id)
+            )
+
+
+def bulk_import(Session, role_id: str, users) -> None:
+    content = "\n".join(
+        ["name,last_name,email,dni,password"]
+        + [",".join(user[column] for column in ("name", "last_name", "email", "dni", "password")) for user in users]
+    ).encode()
+    with UnitOfWork(Session) as db:
+        report = UserImportService(UserRepo(db), session_factory=Session).import_users(
+            db, content=content, filename="bench.csv", role_id=role_id
+        )
+    assert report.created == len(users), report.model_dump()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=None, help="URL SQLAlchemy; por defecto SQLite en un archivo temporal")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--skip-per-row", action="store_true", help="solo el import masivo")
+    args = parser.parse_args()
+
+    if args.url is None:
+        sqlite3.register_adapter(uuid.UUID, str)
+        path = os.path.join(tempfile.mkdtemp(), "bench_user_import.db")
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _collation(dbapi_connection, connection_record):
+            dbapi_connection.create_collation("ascii_bin", lambda a, b: (a > b) - (a < b))
+    else:
+        engine = create_engine(args.url)
+
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+    role_id = str(uuid.uuid4())
+    with Session() as db:
+        db.execute(insert(Role.__table__), [{"id": role_id, "name": "Patient"}])
+        db.commit()
+    get_role_catalog().invalidate()
+    counter = Counter(engine)
+
+    modes = [("import", bulk_import)] if args.skip_per_row else [("per-row", per_row), ("import", bulk_import)]
+    print(f"rows={args.rows} chunk={settings.USER_IMPORT_CHUNK_SIZE} processes={settings.USER_IMPORT_HASH_PROCESSES}")
+    print(f"{'mode':<8} {'seconds':>8} {'rows/s':>7} {'statements':>10} {'commits':>7}")
+    for name, run in modes:
+        users = rows(name, args.rows)
+        counter.reset()
+        started = time.perf_counter()
+        run(Session, role_id, users)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<8} {elapsed:>8.2f} {args.rows / elapsed:>7.1f} {counter.statements:>10} {counter.commits:>7}")
+
+    with Session() as db:
+        assigned = db.scalar(select(func.count()).select_from(UserRole).where(UserRole.role_id == role_id))
+        print(f"users with role: {assigned}/{db.scalar(select(func.count()).select_from(User))}")
+    print("import phases: " + "  ".join(
+        f"{phase} {USER_IMPORT_PHASE_DURATION.labels(phase)._sum.get() * 1000:.0f} ms" for phase in PHASES
+    ))
+
+
+if __name__ == "__main__":
+    main()
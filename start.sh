@@ -4,41 +4,43 @@ echo "🚀 Iniciando Miel-IA..."
 
 # Verificar conexión a MySQL
 max_retries=30
-count=0
 
 echo "🔍 Verificando disponibilidad de base de datos..."
 
-# Loop de espera hasta que la base de datos responda
-# Usamos un pequeño script de python para intentar conectar
-while [ $count -lt $max_retries ]; do
-    python3 -c "
+# Un único proceso y un único motor para todos los reintentos; cada intento
+# solo abre (y cierra) una conexión.
+python3 - "$max_retries" <<'PYEOF'
 import sys
-import os
-from sqlalchemy import create_engine, text
+import time
 sys.path.append('/app')
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+max_retries = int(sys.argv[1])
 try:
     from app.core.config import settings
-    db_uri = settings.DATABASE_URL
-    
-    engine = create_engine(db_uri)
-    with engine.connect() as conn:
-        conn.execute(text('SELECT 1'))
-    print('✅ Base de datos lista!')
-    sys.exit(0)
+    engine = create_engine(
+        settings.DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    )
 except Exception as e:
-    print(f'⏳ Esperando a base de datos... ({e})')
+    print(f'❌ Configuración de base de datos inválida: {e}')
     sys.exit(1)
-"
-    if [ $? -eq 0 ]; then
-        break
-    fi
-    
-    count=$((count+1))
-    echo "Retrying in 2 seconds... ($count/$max_retries)"
-    sleep 2
-done
-
-if [ $count -eq $max_retries ]; then
+
+for attempt in range(1, max_retries + 1):
+    try:
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        print('✅ Base de datos lista!')
+        sys.exit(0)
+    except Exception as e:
+        print(f'⏳ Esperando a base de datos... ({e})')
+        print(f'Retrying in 2 seconds... ({attempt}/{max_retries})')
+        time.sleep(2)
+sys.exit(1)
+PYEOF
+if [ $? -ne 0 ]; then
     echo "❌ Error: No se pudo conectar a la base de datos después de $max_retries intentos."
     exit 1
 fi
@@ -0,0 +1,10 @@
+import os
+
+from cryptography.fernet import Fernet
+
+# Settings mínimos para importar `app` sin `.env`; no se abre ninguna conexión.
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASS", "test")
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
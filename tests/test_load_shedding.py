@@ -0,0 +1,37 @@
+from app.core.load_shedding import APPROXIMATE, DEGRADATION_LEVELS, FULL, LoadShedder
+
+
+def _shedder(depth: list) -> LoadShedder:
+    return LoadShedder(
+        levels=DEGRADATION_LEVELS,
+        queue_depth=lambda: depth[0],
+        max_queue_depth=10,
+        max_p95_seconds=1.0,
+        window_seconds=60,
+        cooldown_seconds=0
+    )
+
+
+def test_under_filled_window_keeps_level():
+    depth = [0]
+    shedder = _shedder(depth)
+    for _ in range(10):
+        shedder.observe(2.0)
+    assert shedder.level() == APPROXIMATE
+
+    # La ventana quedó vacía tras el cambio: no se vuelve a FULL sin medir el nivel nuevo.
+    for _ in range(5):
+        shedder.observe(0.1)
+        assert shedder.level() == APPROXIMATE
+
+    for _ in range(5):
+        shedder.observe(0.1)
+    assert shedder.level() == FULL
+
+
+def test_queue_depth_degrades_without_latencies():
+    depth = [50]
+    shedder = _shedder(depth)
+    assert shedder.level() == APPROXIMATE
+    depth[0] = 0
+    assert shedder.level() == APPROXIMATE
@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core import rate_limit
+from app.core.rate_limit import TokenBucketLimiter, enforce_rate_limit
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_refill(clock):
+    limiter = TokenBucketLimiter(rate=2.0, burst=4)
+    assert limiter.acquire("a", 4) == 0
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    clock.now += 1.0
+    assert limiter.acquire("a", 2) == 0
+    assert limiter.acquire("a") > 0
+
+
+def test_cost_is_capped_at_burst(clock):
+    limiter = TokenBucketLimiter(rate=1.0, burst=5)
+    assert limiter.acquire("a", 50) == 0
+    assert limiter.acquire("a") == pytest.approx(1.0)
+    clock.now += 5.0
+    assert limiter.acquire("a", 50) == 0
+
+
+def test_least_recently_used_key_is_evicted(clock):
+    limiter = TokenBucketLimiter(rate=1.0, burst=1, max_keys=2)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    limiter.acquire("c")
+    # `a` se descartó: vuelve con el bucket lleno; `c` sigue sin tokens.
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("c") > 0
+
+
+def test_retry_after(clock, monkeypatch):
+    monkeypatch.setitem(rate_limit._limiters, "diagnose", TokenBucketLimiter(rate=0.4, burst=1))
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_ENABLED", True)
+    enforce_rate_limit("diagnose", "u1")
+    with pytest.raises(HTTPException) as error:
+        enforce_rate_limit("diagnose", "u1")
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "3"
+    # Sin usuario no se limita.
+    enforce_rate_limit("diagnose", None)
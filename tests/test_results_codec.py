@@ -0,0 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.results_codec import RESULTS_PREFIX_V2, decode_results, encode_results
+
+
+def _verdict(i: int) -> dict:
+    return {
+        "final_diagnosis": "Posible positivo para EMG" if i % 2 else "Posible Negativo para EMG",
+        "classification_level": i % 3,
+        "details": {"binary_model_votes": {"predictions": {"Random_Forest": i % 2}}},
+        "explanations": {"metadata": {"degradation_level": "full", "notes": "x" * (i * 97 % 4096)}},
+    }
+
+
+def test_round_trip():
+    encoded = encode_results(_verdict(7))
+    assert encoded.startswith(RESULTS_PREFIX_V2)
+    assert decode_results(encoded) == _verdict(7)
+
+
+def test_concurrent_encode_decode():
+    # Los (de)compresores de zstandard no son thread-safe: compartirlos rompía el proceso.
+    def round_trip(i: int) -> bool:
+        return all(decode_results(encode_results(_verdict(i + n))) == _verdict(i + n) for n in range(50))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(round_trip, range(64)))